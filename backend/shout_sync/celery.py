@@ -0,0 +1,11 @@
+# shout_sync/celery.py
+import os
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shout_sync.settings')
+
+app = Celery('shout_sync')
+
+# All CELERY_* settings in settings.py configure the app
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -21,6 +21,7 @@ ALLOWED_HOSTS = [
 
 # Application definition
 INSTALLED_APPS = [
+    'daphne',  # ASGI server for runserver (HTTP + WebSockets)
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -30,10 +31,12 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework.authtoken',
     'corsheaders',
+    'channels',
     'users',
 ]
 
 MIDDLEWARE = [
+    'users.middleware.QueryCountMiddleware',  # First, so it sees every query
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -42,7 +45,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'users.middleware.UpdateLastActiveMiddleware',
+    'users.middleware.PresenceMiddleware',
 ]
 
 ROOT_URLCONF = 'shout_sync.urls'
@@ -64,6 +67,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'shout_sync.wsgi.application'
+ASGI_APPLICATION = 'shout_sync.asgi.application'
 
 # Database
 DATABASES = {
@@ -76,6 +80,93 @@ DATABASES = {
 db_from_env = dj_database_url.config(conn_max_age=600)
 DATABASES['default'].update(db_from_env)
 
+# Cache (local memory by default, Redis when REDIS_URL is configured)
+REDIS_URL = os.environ.get('REDIS_URL')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+if REDIS_URL:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+
+# Project permission cache
+PERMISSION_CACHE_ALIAS = 'default'
+PERMISSION_CACHE_TIMEOUT = 300  # seconds
+# The permission cache is bypassed on per-process backends (LocMem) because
+# invalidations would only reach one worker. Set this for single-process runs.
+PERMISSION_CACHE_ALLOW_LOCAL = False
+
+# Cached team list entries, invalidated on team, membership and member profile changes
+TEAM_CACHE_ALIAS = 'default'
+TEAM_CACHE_TIMEOUT = 600
+TEAM_MEMBER_PREVIEW_SIZE = 5
+
+# Cached sheet results (aggregates, view results) keyed by sheet data version
+SHEET_CACHE_ALIAS = 'default'
+SHEET_CACHE_TIMEOUT = 600
+
+# Live sheet sessions coalesce cell edits and write them in batches
+SHEET_OP_BATCH_WINDOW = 0.25  # seconds to collect edits before writing
+SHEET_OP_BATCH_SIZE = 500  # write immediately once this many cells are pending
+
+# Presence tracking (last_active is flushed in batches)
+PRESENCE_BACKEND = 'redis' if REDIS_URL else 'local'
+PRESENCE_FLUSH_INTERVAL = 60  # seconds between batched writes
+PRESENCE_MIN_WRITE_INTERVAL = 60  # minimum seconds between writes for one user
+PRESENCE_FLUSH_BATCH_SIZE = 500
+PRESENCE_RETENTION = 3600  # seconds before an idle user's entry is dropped from the store
+PRESENCE_FLUSH_TIMER = True  # local store: each worker also flushes on a timer
+
+# Channels (in-memory layer locally, Redis when REDIS_URL is configured)
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    }
+}
+
+if REDIS_URL:
+    CHANNEL_LAYERS['default'] = {
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {
+            'hosts': [REDIS_URL],
+        },
+    }
+
+# Celery (tasks run in-process when no broker is configured; emails are then
+# left in the outbox for `manage.py dispatch_emails --loop` to send)
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', REDIS_URL)
+CELERY_TASK_ALWAYS_EAGER = not CELERY_BROKER_URL
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_BEAT_SCHEDULE = {
+    'dispatch-pending-emails': {
+        'task': 'users.tasks.dispatch_pending_emails',
+        'schedule': 60.0,
+    },
+    'reconcile-dashboard-stats': {
+        'task': 'users.tasks.reconcile_dashboard_stats',
+        'schedule': 900.0,
+    },
+}
+
+# File imports run on a Celery worker and report progress through the cache,
+# so the import endpoint refuses uploads without a broker and a shared cache.
+# Set this to run imports inside the request on a single-process server.
+IMPORT_ALLOW_IN_REQUEST = False
+
+# Outbound email delivery
+FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')  # base for links in emails
+EMAIL_HTTP_TIMEOUT = (5, 15)  # (connect, read) seconds
+EMAIL_HTTP_POOL_SIZE = 10
+EMAIL_MAX_ATTEMPTS = 5
+EMAIL_RETRY_BACKOFF = 30  # seconds, doubled after every failed attempt
+EMAIL_SEND_LEASE = 120  # seconds a worker may hold a message before it is retried
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -134,6 +225,23 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_EXPOSE_HEADERS = ['X-Query-Count', 'X-Query-Time-Ms', 'X-Request-Time-Ms']
+
+# Per-request query counts (users.middleware.QueryCountMiddleware): headers
+# in DEBUG, one log line per request otherwise
+QUERY_COUNT_HEADERS = DEBUG
+QUERY_COUNT_WARNING = 50
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'users.queries': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
 
 # Email settings (for development)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
\ No newline at end of file
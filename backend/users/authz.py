@@ -0,0 +1,186 @@
+# users/authz.py
+from django.db.models import OuterRef, Subquery
+from .models import User, TeamMember, ProjectAssignee, ProjectMember, ProjectPermission
+from . import permission_cache
+
+PERMISSION_FLAGS = (
+    'can_edit_name', 'can_edit_description', 'can_edit_dates', 'can_edit_status',
+    'can_assign_tasks', 'can_manage_members', 'can_transfer_project', 'can_delete_project',
+)
+
+# Flags granted by each permission level (mirrors ProjectPermission.save)
+LEVEL_FLAGS = {
+    ProjectPermission.PermissionLevel.VIEW_ONLY: frozenset(),
+    ProjectPermission.PermissionLevel.EDIT_BASIC: frozenset({
+        'can_edit_name', 'can_edit_description', 'can_edit_dates', 'can_edit_status',
+        'can_assign_tasks',
+    }),
+    ProjectPermission.PermissionLevel.EDIT_ALL: frozenset({
+        'can_edit_name', 'can_edit_description', 'can_edit_dates', 'can_edit_status',
+        'can_assign_tasks', 'can_manage_members',
+    }),
+    ProjectPermission.PermissionLevel.ADMIN: frozenset(PERMISSION_FLAGS),
+}
+
+TEAM_ADMIN_ROLES = (TeamMember.Role.OWNER, TeamMember.Role.ADMIN)
+
+
+def resolve_permission_level(team_role, assignee_role, stored_level):
+    """
+    Resolve the effective project permission level.
+    Prioritizes Team Role > Project Assignee Role > Stored Permission.
+    Returns None when the user is not an active team member.
+    """
+    if team_role is None:
+        return None
+
+    if team_role in TEAM_ADMIN_ROLES:
+        return ProjectPermission.PermissionLevel.ADMIN
+
+    if assignee_role is not None:
+        if assignee_role == ProjectAssignee.AssigneeRole.LEAD:
+            return ProjectPermission.PermissionLevel.ADMIN  # Leads act as Admins
+        if assignee_role == ProjectAssignee.AssigneeRole.MANAGER:
+            return ProjectPermission.PermissionLevel.EDIT_ALL
+        return ProjectPermission.PermissionLevel.EDIT_BASIC
+
+    if stored_level is not None:
+        return stored_level
+
+    # Default for regular team members
+    return ProjectPermission.PermissionLevel.VIEW_ONLY
+
+
+def build_project_permission(project, user, level):
+    """Construct an unsaved ProjectPermission carrying the flags for a level"""
+    permission = ProjectPermission(project=project, user=user, level=level)
+    granted = LEVEL_FLAGS.get(level, frozenset())
+    for flag in PERMISSION_FLAGS:
+        setattr(permission, flag, flag in granted)
+    return permission
+
+
+class AuthorizationContext:
+    """
+    The caller's team role, project roles and stored project permission for
+    the team/project addressed by a request, loaded lazily with a single query.
+    """
+
+    def __init__(self, user, team_id, project_id=None):
+        self.user = user
+        self.team_id = team_id
+        self.project_id = project_id
+        self._row = None
+        self._project_permission = None
+
+    def _load(self):
+        if self._row is not None:
+            return self._row
+
+        self._row = {}
+        if not self.user or not self.user.is_authenticated:
+            return self._row
+
+        annotations = {
+            'authz_team_role': Subquery(
+                TeamMember.objects.filter(
+                    user=OuterRef('pk'), team_id=self.team_id, is_active=True
+                ).values('role')[:1]
+            ),
+        }
+        if self.project_id is not None:
+            annotations['authz_project_member_role'] = Subquery(
+                ProjectMember.objects.filter(
+                    user=OuterRef('pk'), project_id=self.project_id
+                ).values('role')[:1]
+            )
+            annotations['authz_assignee_role'] = Subquery(
+                ProjectAssignee.objects.filter(
+                    user=OuterRef('pk'), project_id=self.project_id
+                ).values('role')[:1]
+            )
+            annotations['authz_stored_level'] = Subquery(
+                ProjectPermission.objects.filter(
+                    user=OuterRef('pk'), project_id=self.project_id
+                ).values('level')[:1]
+            )
+
+        row = User.objects.filter(pk=self.user.pk).annotate(**annotations).values(*annotations.keys()).first()
+        if row:
+            self._row = row
+        return self._row
+
+    @property
+    def team_role(self):
+        return self._load().get('authz_team_role')
+
+    @property
+    def project_member_role(self):
+        return self._load().get('authz_project_member_role')
+
+    @property
+    def assignee_role(self):
+        return self._load().get('authz_assignee_role')
+
+    @property
+    def stored_level(self):
+        return self._load().get('authz_stored_level')
+
+    @property
+    def is_team_member(self):
+        return self.team_role is not None
+
+    @property
+    def is_team_admin(self):
+        return self.team_role in TEAM_ADMIN_ROLES
+
+    @property
+    def is_team_owner(self):
+        return self.team_role == TeamMember.Role.OWNER
+
+    @property
+    def is_project_member(self):
+        return self.project_member_role is not None
+
+    @property
+    def is_project_manager(self):
+        return self.project_member_role == ProjectMember.Role.MANAGER
+
+    @property
+    def permission_level(self):
+        """Effective permission level, served from the permission cache when possible"""
+        if self.project_id is None or not self.user or not self.user.is_authenticated:
+            return None
+
+        key, hit, level = permission_cache.lookup(self.user.pk, self.project_id)
+        if hit:
+            return level
+
+        level = resolve_permission_level(self.team_role, self.assignee_role, self.stored_level)
+        permission_cache.store(key, level)
+        return level
+
+    def project_permission(self, project):
+        """Effective ProjectPermission for the caller, or None if not authorized"""
+        if self._project_permission is None:
+            level = self.permission_level
+            if level is None:
+                return None
+            self._project_permission = build_project_permission(project, self.user, level)
+        return self._project_permission
+
+
+def get_authz_context(request, team_id, project_id=None):
+    """
+    Return the AuthorizationContext for the caller, memoized on the request so
+    that views and serializers sharing the request reuse the same lookup.
+    """
+    contexts = getattr(request, '_authz_contexts', None)
+    if contexts is None:
+        contexts = {}
+        request._authz_contexts = contexts
+
+    key = (str(team_id), str(project_id) if project_id is not None else None)
+    if key not in contexts:
+        contexts[key] = AuthorizationContext(request.user, team_id, project_id)
+    return contexts[key]
@@ -0,0 +1,129 @@
+# users/benchmarking.py
+import statistics
+import threading
+import time
+from collections import Counter
+from django.db import connection, connections
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from .middleware import QueryStats
+
+# The hot read endpoints, driven by `manage.py benchmark_api`. Paths are
+# filled in with Tenant.urls().
+BENCHMARK_ENDPOINTS = (
+    ('dashboard stats', '/api/auth/dashboard/stats/'),
+    ('projects', '/api/auth/teams/{team}/projects/'),
+    ('tasks', '/api/auth/teams/{team}/projects/{project}/tasks/'),
+    ('notifications', '/api/auth/notifications/'),
+    ('team members', '/api/auth/teams/{team}/members/optimized/'),
+)
+
+
+def _client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+    return client
+
+
+def _summary(values, digits=2):
+    """min/mean/max and p50/p95/p99 of a list of numbers"""
+    if not values:
+        return {}
+    cuts = statistics.quantiles(values, n=100, method='inclusive') if len(values) > 1 else [values[0]] * 99
+    return {
+        'min': round(min(values), digits),
+        'mean': round(statistics.fmean(values), digits),
+        'p50': round(cuts[49], digits),
+        'p95': round(cuts[94], digits),
+        'p99': round(cuts[98], digits),
+        'max': round(max(values), digits),
+    }
+
+
+def _run_phase(path, token, requests, concurrency):
+    """GET `path` `requests` times from `concurrency` threads; returns (results, seconds)"""
+    results = []
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def worker():
+        client = _client(token)
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                stats = QueryStats()
+                started = time.perf_counter()
+                try:
+                    with connection.execute_wrapper(stats):
+                        status_code = client.get(path).status_code
+                except Exception as e:
+                    status_code = type(e).__name__
+                latency = (time.perf_counter() - started) * 1000
+                with lock:
+                    results.append((latency, stats.count, status_code))
+        finally:
+            # Each thread has its own database connections
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(max(1, min(concurrency, requests)))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def run_endpoint(path, token, requests, concurrency, warmup=0):
+    """
+    GET `path` `requests` times from `concurrency` threads, each with its own
+    client and database connection, after `warmup` untimed requests.
+    Returns latency (ms), throughput and query-count statistics.
+    """
+    if warmup:
+        _run_phase(path, token, warmup, concurrency)
+    results, elapsed = _run_phase(path, token, requests, concurrency)
+
+    latencies = [latency for latency, _, _ in results]
+    queries = [count for _, count, _ in results]
+    status_codes = Counter(str(status_code) for _, _, status_code in results)
+    return {
+        'requests': requests,
+        'errors': sum(count for code, count in status_codes.items() if not code.startswith(('2', '3'))),
+        'status_codes': dict(status_codes),
+        'throughput_rps': round(requests / elapsed, 2) if elapsed else None,
+        'latency_ms': _summary(latencies),
+        'queries': _summary(queries, digits=1),
+    }
+
+
+def run_benchmark(tenant, endpoints=BENCHMARK_ENDPOINTS, requests=200, concurrency=8, warmup=10):
+    """Benchmark each endpoint in turn as the tenant's primary user"""
+    token, _ = Token.objects.get_or_create(user=tenant.user)
+    urls = tenant.urls()
+    results = []
+    for name, path in endpoints:
+        result = run_endpoint(path.format(**urls), token.key, requests, concurrency, warmup)
+        results.append({'endpoint': name, 'path': path, **result})
+    return results
+
+
+def compare(results, baseline):
+    """Attach the change against a previous report's results, per endpoint"""
+    previous = {result['endpoint']: result for result in baseline.get('endpoints', [])}
+    for result in results:
+        before = previous.get(result['endpoint'])
+        if not before:
+            continue
+        change = {}
+        for metric in ('p50', 'p95', 'p99'):
+            old, new = before['latency_ms'].get(metric), result['latency_ms'].get(metric)
+            if old:
+                change[f'{metric}_ms_pct'] = round((new - old) / old * 100, 1)
+        if before.get('throughput_rps'):
+            change['throughput_pct'] = round((result['throughput_rps'] - before['throughput_rps']) / before['throughput_rps'] * 100, 1)
+        change['queries_mean'] = round(result['queries'].get('mean', 0) - before['queries'].get('mean', 0), 1)
+        result['change'] = change
+    return results
@@ -0,0 +1,221 @@
+# users/consumers.py
+import asyncio
+import json
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+def notification_group_name(user_id):
+    return f"notifications_{user_id}"
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """Pushes notifications for the connected user as they are created or updated"""
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.group_name = notification_group_name(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # Clients only listen; answer pings so they can detect dead sockets
+        if content.get('type') == 'ping':
+            await self.send_json({'type': 'pong'})
+
+    async def notification_created(self, event):
+        await self.send_json({'type': 'notification.created', 'notification': event['notification']})
+
+    async def notification_updated(self, event):
+        await self.send_json({'type': 'notification.updated', 'notification': event['notification']})
+
+    async def notification_deleted(self, event):
+        await self.send_json({'type': 'notification.deleted', 'notification_id': event['notification_id']})
+
+
+def sheet_group_name(sheet_id):
+    return f"sheet_{sheet_id}"
+
+
+class SheetConsumer(AsyncJsonWebsocketConsumer):
+    """
+    A live editing session on one sheet. Cell edits from the client are
+    coalesced per cell for SHEET_OP_BATCH_WINDOW seconds and written as one
+    batch; other viewers receive the resulting cell changes. Edits carry
+    the cell version the client saw, and stale edits are answered with the
+    current value instead of overwriting someone else's change.
+
+    Client messages:
+        {"type": "cell.update", "op_id", "row_id", "column_key", "value", "version"}
+        {"type": "cells.update", "ops": [<cell.update fields>, ...]}
+        {"type": "flush"}, {"type": "ping"}
+    Server messages:
+        ops.applied {op_ids, cells}, ops.conflict {op_ids, conflicts},
+        ops.rejected {op_ids, errors}, and sheet events from other sessions
+        ({"type": event, "user_id", ...payload}, e.g. cells.updated)
+    """
+
+    @classmethod
+    async def encode_json(cls, content):
+        # Cell payloads carry datetimes
+        return json.dumps(content, cls=DjangoJSONEncoder)
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if not user or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.sheet_id = self.scope['url_route']['kwargs']['sheet_id']
+        if not await self._can_access(user):
+            await self.close(code=4403)
+            return
+
+        self.pending = {}  # (row_id, column_key) -> coalesced edit
+        self.flush_lock = asyncio.Lock()
+        self.flush_timer = None
+        self.group_name = sheet_group_name(self.sheet_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            if self.flush_timer:
+                self.flush_timer.cancel()
+            await self.flush()
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    @database_sync_to_async
+    def _can_access(self, user):
+        from .authz import AuthorizationContext
+        from .models import ProjectSheet
+
+        sheet = ProjectSheet.objects.filter(id=self.sheet_id).select_related('project').first()
+        if sheet is None:
+            return False
+        return AuthorizationContext(user, sheet.project.team_id, sheet.project_id).is_project_member
+
+    async def receive_json(self, content, **kwargs):
+        message_type = content.get('type')
+        if message_type == 'ping':
+            await self.send_json({'type': 'pong'})
+        elif message_type == 'cell.update':
+            await self.queue([content])
+        elif message_type == 'cells.update':
+            await self.queue(content.get('ops') or [])
+        elif message_type == 'flush':
+            await self.flush()
+
+    async def queue(self, ops):
+        for op in ops:
+            if not isinstance(op, dict) or not {'row_id', 'column_key', 'value'} <= op.keys():
+                await self.send_json({
+                    'type': 'ops.rejected',
+                    'op_ids': [op.get('op_id')] if isinstance(op, dict) else [],
+                    'errors': [{'error': 'Each operation needs row_id, column_key and value'}],
+                })
+                continue
+            cell_key = (str(op['row_id']), op['column_key'])
+            edit = self.pending.get(cell_key)
+            if edit is None:
+                # Keep the version seen before the first coalesced edit
+                self.pending[cell_key] = {'value': op['value'], 'version': op.get('version'), 'op_ids': [op.get('op_id')]}
+            else:
+                edit['value'] = op['value']
+                edit['op_ids'].append(op.get('op_id'))
+
+        if len(self.pending) >= getattr(settings, 'SHEET_OP_BATCH_SIZE', 500):
+            await self.flush()
+        elif self.pending and self.flush_timer is None:
+            self.flush_timer = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(getattr(settings, 'SHEET_OP_BATCH_WINDOW', 0.25))
+        self.flush_timer = None
+        await self.flush()
+
+    async def flush(self):
+        async with self.flush_lock:
+            if not self.pending:
+                return
+            pending, self.pending = self.pending, {}
+            edits = list(pending.items())
+            applied, conflicts, errors = await self._apply(edits)
+
+        if applied['op_ids']:
+            await self.send_json({'type': 'ops.applied', **applied})
+        if conflicts['op_ids']:
+            await self.send_json({'type': 'ops.conflict', **conflicts})
+        if errors['op_ids']:
+            await self.send_json({'type': 'ops.rejected', **errors})
+
+    @database_sync_to_async
+    def _apply(self, edits):
+        from .models import ProjectSheet
+        from . import sheet_events, sheets
+
+        user = self.scope['user']
+        updates = [
+            {'row_id': row_id, 'column_key': key, 'value': edit['value'], 'version': edit['version']}
+            for (row_id, key), edit in edits
+        ]
+        applied = {'op_ids': [], 'cells': []}
+        conflicts = {'op_ids': [], 'conflicts': []}
+        errors = {'op_ids': [], 'errors': []}
+
+        sheet = ProjectSheet.objects.filter(id=self.sheet_id).select_related('project').first()
+        if sheet is None:
+            errors['op_ids'] = [op_id for _, edit in edits for op_id in edit['op_ids']]
+            errors['errors'].append({'error': 'Sheet no longer exists'})
+            return applied, conflicts, errors
+
+        # Invalid edits are dropped from the batch rather than failing the
+        # other edits in it; the valid remainder is retried once
+        active = list(range(len(updates)))
+        stale = []
+        changed = None
+        for _ in range(2):
+            try:
+                changed = sheets.apply_cell_updates(sheet, [updates[i] for i in active], user, conflicts=stale)
+                break
+            except sheets.CellUpdateError as e:
+                # Error indexes point into the attempted batch; map them back to edits
+                for error in e.errors:
+                    if 'index' in error:
+                        error['index'] = active[error['index']]
+                rejected = {error['index'] for error in e.errors if 'index' in error} or set(active)
+                errors['errors'] += e.errors
+                errors['op_ids'] += [op_id for i in sorted(rejected) for op_id in edits[i][1]['op_ids']]
+                active = [i for i in active if i not in rejected]
+                stale = []
+                if not active:
+                    break
+        if changed is None:
+            return applied, conflicts, errors
+
+        stale_indexes = {active[conflict['index']] for conflict in stale}
+        for conflict in stale:
+            conflict['index'] = active[conflict['index']]
+        conflicts['conflicts'] = stale
+        conflicts['op_ids'] = [op_id for i in sorted(stale_indexes) for op_id in edits[i][1]['op_ids']]
+        applied['op_ids'] = [op_id for i in active if i not in stale_indexes for op_id in edits[i][1]['op_ids']]
+        applied['cells'] = changed
+
+        sheet_events.publish_cells(sheet.id, changed, user, origin=self.channel_name)
+        return applied, conflicts, errors
+
+    async def sheet_event(self, event):
+        # The session that caused a change already has it from its own ack
+        if event.get('origin') == self.channel_name:
+            return
+        await self.send_json({'type': event['event'], 'user_id': event['user_id'], **event['payload']})
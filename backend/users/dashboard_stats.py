@@ -0,0 +1,183 @@
+# users/dashboard_stats.py
+from collections import defaultdict
+from django.db.models import Count, F, Q
+from .models import Project, Task, Team, TeamMember, TeamStats, UserDashboardStats
+
+# Dashboard totals are materialized in TeamStats and UserDashboardStats.
+# Write hooks (signals.py) keep them current: project and task writes apply
+# F() deltas; membership changes mark the affected users stale, since the
+# number of distinct teammates cannot be adjusted by a delta, and stale rows
+# are recomputed when next read. Rows are created on first read, and
+# reconcile() recomputes everything from the source tables to repair drift
+# from writes that bypass signals (queryset.update(), bulk_create()).
+
+ACTIVE = Project.Status.ACTIVE
+DONE = Task.Status.DONE
+RECONCILE_BATCH_SIZE = 1000
+
+TEAM_FIELDS = ('member_count', 'project_count', 'active_project_count')
+USER_FIELDS = ('team_count', 'project_count', 'active_project_count', 'completed_task_count', 'member_count')
+
+
+# Recomputing from the source tables
+
+def compute_team_stats(team_ids):
+    """{team_id: {field: value}} with two grouped queries"""
+    stats = {team_id: dict.fromkeys(TEAM_FIELDS, 0) for team_id in team_ids}
+    members = (
+        TeamMember.objects.filter(team_id__in=team_ids, is_active=True)
+        .values('team_id').annotate(count=Count('id'))
+    )
+    for row in members:
+        stats[row['team_id']]['member_count'] = row['count']
+    projects = (
+        Project.objects.filter(team_id__in=team_ids)
+        .values('team_id').annotate(count=Count('id'), active=Count('id', filter=Q(status=ACTIVE)))
+    )
+    for row in projects:
+        stats[row['team_id']]['project_count'] = row['count']
+        stats[row['team_id']]['active_project_count'] = row['active']
+    return stats
+
+
+def compute_user_stats(user_ids):
+    """{user_id: {field: value}} with three grouped queries"""
+    stats = {user_id: dict.fromkeys(USER_FIELDS, 0) for user_id in user_ids}
+    memberships = TeamMember.objects.filter(user_id__in=user_ids, is_active=True).values('user_id')
+    for row in memberships.annotate(
+        teams=Count('team', distinct=True),
+        projects=Count('team__projects', distinct=True),
+        active=Count('team__projects', filter=Q(team__projects__status=ACTIVE), distinct=True),
+    ):
+        stats[row['user_id']].update(team_count=row['teams'], project_count=row['projects'], active_project_count=row['active'])
+    # Counted separately so the project join does not multiply the member rows
+    for row in memberships.annotate(
+        members=Count('team__members__user', filter=Q(team__members__is_active=True), distinct=True),
+    ):
+        stats[row['user_id']]['member_count'] = row['members']
+    completed = (
+        Task.objects.filter(assignee_id__in=user_ids, status=DONE)
+        .values('assignee_id').annotate(count=Count('id'))
+    )
+    for row in completed:
+        stats[row['assignee_id']]['completed_task_count'] = row['count']
+    return stats
+
+
+def refresh_teams(team_ids):
+    """Recompute and store the stats of these teams; returns {team_id: TeamStats}"""
+    rows = [TeamStats(team_id=team_id, **values) for team_id, values in compute_team_stats(list(team_ids)).items()]
+    TeamStats.objects.bulk_create(
+        rows, batch_size=RECONCILE_BATCH_SIZE,
+        update_conflicts=True, unique_fields=['team'], update_fields=[*TEAM_FIELDS, 'updated_at'],
+    )
+    return {row.team_id: row for row in rows}
+
+
+def refresh_users(user_ids):
+    """Recompute and store the stats of these users; returns {user_id: UserDashboardStats}"""
+    rows = [
+        UserDashboardStats(user_id=user_id, is_stale=False, **values)
+        for user_id, values in compute_user_stats(list(user_ids)).items()
+    ]
+    UserDashboardStats.objects.bulk_create(
+        rows, batch_size=RECONCILE_BATCH_SIZE,
+        update_conflicts=True, unique_fields=['user'], update_fields=[*USER_FIELDS, 'is_stale', 'updated_at'],
+    )
+    return {row.user_id: row for row in rows}
+
+
+def _batches(queryset):
+    ids = list(queryset.values_list('pk', flat=True))
+    for start in range(0, len(ids), RECONCILE_BATCH_SIZE):
+        yield ids[start:start + RECONCILE_BATCH_SIZE]
+
+
+def reconcile():
+    """
+    Recompute every team's stats and every existing user row. Returns
+    (teams, users) recomputed.
+    """
+    teams = users = 0
+    for team_ids in _batches(Team.objects.all()):
+        teams += len(refresh_teams(team_ids))
+    for user_ids in _batches(UserDashboardStats.objects.all()):
+        users += len(refresh_users(user_ids))
+    return teams, users
+
+
+# Reading
+
+def get_user_stats(user):
+    """The user's dashboard totals: one indexed read unless the row is missing or stale"""
+    stats = UserDashboardStats.objects.filter(user=user, is_stale=False).first()
+    if stats is None:
+        stats = refresh_users([user.id])[user.id]
+    return stats
+
+
+def get_team_stats(team_ids):
+    """{team_id: TeamStats}, creating missing rows"""
+    stats = {row.team_id: row for row in TeamStats.objects.filter(team_id__in=team_ids)}
+    missing = [team_id for team_id in team_ids if team_id not in stats]
+    if missing:
+        stats.update(refresh_teams(missing))
+    return stats
+
+
+# Write hooks
+
+def _active_members(team_id):
+    return TeamMember.objects.filter(team_id=team_id, is_active=True).values('user_id')
+
+
+def project_changed(old, new):
+    """
+    Apply a project write. old and new are (team_id, is_active) before and
+    after it, or None for a project that did not / no longer exists.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for state, sign in ((old, -1), (new, 1)):
+        if state is not None:
+            team_id, is_active = state
+            deltas[team_id][0] += sign
+            deltas[team_id][1] += sign if is_active else 0
+    for team_id, (projects, active) in deltas.items():
+        if not projects and not active:
+            continue
+        changes = {
+            'project_count': F('project_count') + projects,
+            'active_project_count': F('active_project_count') + active,
+        }
+        TeamStats.objects.filter(team_id=team_id).update(**changes)
+        UserDashboardStats.objects.filter(user_id__in=_active_members(team_id)).update(**changes)
+
+
+def task_changed(old, new):
+    """
+    Apply a task write. old and new are (assignee_id, is_done) before and
+    after it, or None for a task that did not / no longer exists.
+    """
+    deltas = defaultdict(int)
+    for state, sign in ((old, -1), (new, 1)):
+        if state is not None and state[0] is not None and state[1]:
+            deltas[state[0]] += sign
+    add_completed_tasks(deltas)
+
+
+def add_completed_tasks(deltas):
+    """Apply {user_id: change} to completed task counts, e.g. after a bulk insert"""
+    for user_id, delta in deltas.items():
+        if delta:
+            UserDashboardStats.objects.filter(user_id=user_id).update(completed_task_count=F('completed_task_count') + delta)
+
+
+def membership_changed(team_id, user_id, was_active, is_active):
+    """Apply a member joining, leaving, or being (de)activated"""
+    if was_active == is_active:
+        return
+    TeamStats.objects.filter(team_id=team_id).update(member_count=F('member_count') + (1 if is_active else -1))
+    # Every teammate's distinct member count may change, as do the user's own totals
+    UserDashboardStats.objects.filter(
+        Q(user_id__in=_active_members(team_id)) | Q(user_id=user_id)
+    ).update(is_stale=True)
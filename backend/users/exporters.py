@@ -0,0 +1,294 @@
+# users/exporters.py
+import csv
+import itertools
+import json
+import re
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+from .models import ProjectSheet, Subtask, Task, TaskComment
+from . import sheets
+
+try:
+    import openpyxl
+except ImportError:  # listed in requirements.txt; without it XLSX export is unavailable
+    openpyxl = None
+
+# Exports are produced as a stream: every table is read with
+# .iterator(chunk_size=EXPORT_CHUNK_SIZE) and written out as it is read, so
+# memory use stays flat however large the project is.
+EXPORT_CHUNK_SIZE = 2000
+STREAM_BUFFER_SIZE = 64 * 1024
+
+FORMATS = ('csv', 'json', 'xlsx')
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'json': 'application/json',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+TASK_FIELDS = (
+    ('id', 'id'),
+    ('title', 'title'),
+    ('description', 'description'),
+    ('status', 'status'),
+    ('priority', 'priority'),
+    ('assignee', 'assignee__email'),
+    ('created_by', 'created_by__email'),
+    ('start_date', 'start_date'),
+    ('end_date', 'end_date'),
+    ('due_date', 'due_date'),
+    ('created_at', 'created_at'),
+    ('completed_at', 'completed_at'),
+)
+SUBTASK_FIELDS = (
+    ('id', 'id'),
+    ('task_id', 'task_id'),
+    ('title', 'title'),
+    ('description', 'description'),
+    ('status', 'status'),
+    ('assignee', 'assignee__email'),
+    ('created_by', 'created_by__email'),
+    ('due_date', 'due_date'),
+    ('created_at', 'created_at'),
+)
+COMMENT_FIELDS = (
+    ('id', 'id'),
+    ('task_id', 'task_id'),
+    ('user', 'user__email'),
+    ('content', 'content'),
+    ('created_at', 'created_at'),
+)
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    Lets ?format=csv|xlsx through DRF content negotiation. Export bodies are
+    streamed by the view, so only error payloads are rendered here (as JSON).
+    """
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = CONTENT_TYPES['csv']
+    format = 'csv'
+
+
+class XLSXRenderer(ExportRenderer):
+    media_type = CONTENT_TYPES['xlsx']
+    format = 'xlsx'
+
+
+def chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', EXPORT_CHUNK_SIZE)
+
+
+class Section:
+    """One table of an export; rows lazily yields lists matching fields"""
+
+    def __init__(self, key, title, fields, rows, labels=None, meta=None):
+        self.key = key
+        self.title = title
+        self.fields = fields
+        self.rows = rows
+        self.labels = labels or fields
+        self.meta = meta or {}
+
+
+def _labelled(rows, positions):
+    """Replace IntegerChoices values with their labels, {position: choices}"""
+    labels = {position: dict(choices.choices) for position, choices in positions.items()}
+    for row in rows:
+        row = list(row)
+        for position, names in labels.items():
+            row[position] = names.get(row[position], row[position])
+        yield row
+
+
+def _model_section(key, title, queryset, fields, choices=None):
+    names = [name for name, _ in fields]
+    rows = queryset.order_by('created_at', 'id').values_list(*[path for _, path in fields]).iterator(chunk_size=chunk_size())
+    if choices:
+        rows = _labelled(rows, {names.index(name): field_choices for name, field_choices in choices.items()})
+    return Section(key, title, names, rows)
+
+
+def _sheet_rows(sheet, columns):
+    keys = [column['key'] for column in columns]
+    row_ids = sheets.ordered_rows(sheet).values_list('id', flat=True).iterator(chunk_size=chunk_size())
+    while True:
+        batch = list(itertools.islice(row_ids, chunk_size()))
+        if not batch:
+            return
+        grid = sheets.load_grid(sheet, columns, row_ids=batch)
+        values = [grid['values'][key] for key in keys]
+        for index, row_id in enumerate(grid['row_ids']):
+            yield [row_id] + [column_values[index] for column_values in values]
+
+
+def project_sections(project):
+    """Yield the export's sections: tasks, subtasks, comments, then each sheet"""
+    yield _model_section(
+        'tasks', 'Tasks', Task.objects.filter(project=project), TASK_FIELDS,
+        {'status': Task.Status, 'priority': Task.Priority},
+    )
+    yield _model_section(
+        'subtasks', 'Subtasks', Subtask.objects.filter(task__project=project), SUBTASK_FIELDS,
+        {'status': Subtask.Status},
+    )
+    yield _model_section('comments', 'Comments', TaskComment.objects.filter(task__project=project), COMMENT_FIELDS)
+    for sheet in ProjectSheet.objects.filter(project=project).order_by('created_at', 'id'):
+        columns = sheets.load_columns(sheet)
+        yield Section(
+            'sheets',
+            f'Sheet - {sheet.name}',
+            ['row_id'] + [column['key'] for column in columns],
+            _sheet_rows(sheet, columns),
+            labels=['Row ID'] + [column['name'] for column in columns],
+            meta={
+                'id': sheet.id,
+                'name': sheet.name,
+                'columns': [
+                    {'key': column['key'], 'name': column['name'], 'column_type': column['column_type']}
+                    for column in columns
+                ],
+            },
+        )
+
+
+def _buffered(parts, size=STREAM_BUFFER_SIZE):
+    """Join small string pieces into chunks of about `size` characters"""
+    buffer, length = [], 0
+    for part in parts:
+        buffer.append(part)
+        length += len(part)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+# JSON
+
+def _dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder)
+
+
+def _json_parts(project):
+    yield '{"project": ' + _dumps({
+        'id': project.id,
+        'name': project.name,
+        'description': project.description,
+        'status': project.get_status_display(),
+        'start_date': project.start_date,
+        'end_date': project.end_date,
+        'exported_at': timezone.now(),
+    })
+    in_sheets = False
+    for section in project_sections(project):
+        if section.key == 'sheets':
+            yield ', "sheets": [' if not in_sheets else ', '
+            in_sheets = True
+            yield _dumps(section.meta)[:-1] + ', "rows": ['
+            for index, row in enumerate(section.rows):
+                yield (', ' if index else '') + _dumps({'id': row[0], 'values': dict(zip(section.fields[1:], row[1:]))})
+            yield ']}'
+        else:
+            yield f', "{section.key}": ['
+            for index, row in enumerate(section.rows):
+                yield (', ' if index else '') + _dumps(dict(zip(section.fields, row)))
+            yield ']'
+    yield ']}' if in_sheets else ', "sheets": []}'
+
+
+def stream_json(project):
+    return _buffered(_json_parts(project))
+
+
+# CSV
+
+class _Echo:
+    """File-like object whose write() returns what was written, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_parts(project):
+    # Sections follow each other in one file: a title line, the header,
+    # the rows, then a blank line
+    writer = csv.writer(_Echo())
+    for index, section in enumerate(project_sections(project)):
+        if index:
+            yield writer.writerow([])
+        yield writer.writerow([section.title])
+        yield writer.writerow(section.labels)
+        for row in section.rows:
+            yield writer.writerow([_csv_value(value) for value in row])
+
+
+def stream_csv(project):
+    # A BOM so spreadsheet apps read the file as UTF-8
+    return _buffered(itertools.chain(['\ufeff'], _csv_parts(project)))
+
+
+# XLSX
+
+def _xlsx_value(value):
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        # Excel has no time zones; export UTC
+        return timezone.make_naive(value, dt_timezone.utc)
+    if value is not None and not isinstance(value, (str, int, float, bool, datetime)):
+        return str(value)
+    return value
+
+
+def _worksheet_title(title, taken):
+    base = re.sub(r'[\[\]:*?/\\]', '', title)[:31] or 'Sheet'
+    name, suffix = base, 2
+    while name.lower() in taken:
+        name = f'{base[:31 - len(str(suffix)) - 1]}~{suffix}'
+        suffix += 1
+    taken.add(name.lower())
+    return name
+
+
+def write_xlsx(project, fileobj):
+    """
+    Write the export as a workbook with one worksheet per section. The
+    write-only workbook spools rows to disk as they are appended.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    taken = set()
+    for section in project_sections(project):
+        worksheet = workbook.create_sheet(_worksheet_title(section.title, taken))
+        worksheet.append(section.labels)
+        for row in section.rows:
+            worksheet.append([_xlsx_value(value) for value in row])
+    workbook.save(fileobj)
+
+
+def export_xlsx(project):
+    """Return a temporary file holding the workbook, positioned at its start"""
+    fileobj = tempfile.TemporaryFile()
+    write_xlsx(project, fileobj)
+    fileobj.seek(0)
+    return fileobj
+
+
+def filename(project, file_format):
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', project.name).strip('-').lower() or 'project'
+    return f"{slug}-{timezone.now():%Y%m%d}.{file_format}"
@@ -0,0 +1,448 @@
+# users/formulas.py
+import math
+import operator
+import re
+from functools import lru_cache
+
+# Formulas are evaluated per row and reference other columns of the same
+# row by key, either bare (qty * price) or in braces ({unit price} * 2).
+# A leading "=" is optional.
+
+MAX_FORMULA_LENGTH = 1000
+
+TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+      | (?P<string>"(?:[^"]|"")*")
+      | (?P<ref>\{[^{}]+\})
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<op><=|>=|<>|!=|==|[-+*/^%&=<>(),])
+    )
+''', re.VERBOSE)
+
+
+class FormulaError(ValueError):
+    """A formula that cannot be parsed or whose columns form a cycle"""
+
+
+class FormulaValueError(Exception):
+    """Raised while evaluating a row; the code is stored as the cell's value"""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise FormulaError(f"Unexpected character at position {position + 1}: {text[position:position + 10]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+    return tokens
+
+
+# Value coercion follows spreadsheet conventions: blanks are 0 in arithmetic
+# and "" in text, booleans count as 1/0.
+
+def _to_number(value):
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise FormulaValueError('#VALUE!')
+
+
+def _to_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ('true', 'false'):
+            return lowered == 'true'
+        return bool(lowered)
+    return bool(_to_number(value))
+
+
+def _divide(a, b):
+    if b == 0:
+        raise FormulaValueError('#DIV/0!')
+    return a / b
+
+
+def _modulo(a, b):
+    if b == 0:
+        raise FormulaValueError('#DIV/0!')
+    return a % b
+
+
+def _power(a, b):
+    # Float operands: an integer exponent would build an arbitrarily large
+    # int (9^9^9 never finishes), and a negative base with a fractional
+    # exponent would give a complex number. math.pow raises for both.
+    try:
+        return math.pow(float(a), float(b))
+    except (OverflowError, ValueError, ZeroDivisionError):
+        raise FormulaValueError('#NUM!')
+
+
+def _compare(op):
+    def compare(a, b):
+        if isinstance(a, str) or isinstance(b, str):
+            return op(_to_text(a).lower(), _to_text(b).lower())
+        return op(_to_number(a), _to_number(b))
+    return compare
+
+
+ARITHMETIC = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': _divide,
+    '%': _modulo,
+    '^': _power,
+}
+
+COMPARISONS = {
+    '=': _compare(operator.eq),
+    '==': _compare(operator.eq),
+    '<>': _compare(operator.ne),
+    '!=': _compare(operator.ne),
+    '<': _compare(operator.lt),
+    '>': _compare(operator.gt),
+    '<=': _compare(operator.le),
+    '>=': _compare(operator.ge),
+}
+
+
+def _round(value, digits=0):
+    return round(_to_number(value), int(_to_number(digits)))
+
+
+FUNCTIONS = {
+    'ABS': lambda value: abs(_to_number(value)),
+    'ROUND': _round,
+    'FLOOR': lambda value: math.floor(_to_number(value)),
+    'CEILING': lambda value: math.ceil(_to_number(value)),
+    'SQRT': lambda value: math.sqrt(_to_number(value)) if _to_number(value) >= 0 else _raise('#NUM!'),
+    'SUM': lambda *values: sum(_to_number(value) for value in values),
+    'AVERAGE': lambda *values: _divide(sum(_to_number(value) for value in values), len(values)),
+    'MIN': lambda *values: min(_to_number(value) for value in values),
+    'MAX': lambda *values: max(_to_number(value) for value in values),
+    'LEN': lambda value: len(_to_text(value)),
+    'UPPER': lambda value: _to_text(value).upper(),
+    'LOWER': lambda value: _to_text(value).lower(),
+    'TRIM': lambda value: _to_text(value).strip(),
+    'CONCAT': lambda *values: ''.join(_to_text(value) for value in values),
+    'AND': lambda *values: all(_to_bool(value) for value in values),
+    'OR': lambda *values: any(_to_bool(value) for value in values),
+    'NOT': lambda value: not _to_bool(value),
+    'ISBLANK': lambda value: value is None or value == '',
+}
+
+# Functions evaluated lazily (arguments are compiled closures, not values)
+LAZY_FUNCTIONS = {'IF', 'IFERROR'}
+
+CONSTANTS = {'TRUE': True, 'FALSE': False}
+
+
+def _raise(code):
+    raise FormulaValueError(code)
+
+
+class _Parser:
+    """Recursive-descent parser producing an AST of nested tuples"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        kind, text = self.peek()
+        if kind is None or (value is not None and text != value):
+            raise FormulaError(f"Expected {value!r}" if value else "Unexpected end of formula")
+        self.position += 1
+        return kind, text
+
+    def parse(self):
+        node = self.comparison()
+        if self.position != len(self.tokens):
+            raise FormulaError(f"Unexpected {self.peek()[1]!r}")
+        return node
+
+    def _binary(self, operand, operators):
+        node = operand()
+        while self.peek()[0] == 'op' and self.peek()[1] in operators:
+            _, op = self.take()
+            node = ('binary', op, node, operand())
+        return node
+
+    def comparison(self):
+        return self._binary(self.concat, COMPARISONS)
+
+    def concat(self):
+        return self._binary(self.additive, ('&',))
+
+    def additive(self):
+        return self._binary(self.multiplicative, ('+', '-'))
+
+    def multiplicative(self):
+        return self._binary(self.unary, ('*', '/', '%'))
+
+    def unary(self):
+        if self.peek() in (('op', '-'), ('op', '+')):
+            _, op = self.take()
+            operand = self.unary()
+            return ('negate', operand) if op == '-' else operand
+        return self.power()
+
+    def power(self):
+        base = self.primary()
+        if self.peek() == ('op', '^'):
+            self.take()
+            return ('binary', '^', base, self.unary())  # Right associative
+        return base
+
+    def primary(self):
+        kind, text = self.take()
+        if kind == 'number':
+            return ('literal', float(text) if any(c in text for c in '.eE') else int(text))
+        if kind == 'string':
+            return ('literal', text[1:-1].replace('""', '"'))
+        if kind == 'ref':
+            return ('ref', text[1:-1].strip())
+        if kind == 'name':
+            if self.peek() == ('op', '('):
+                return self.call(text.upper())
+            if text.upper() in CONSTANTS:
+                return ('literal', CONSTANTS[text.upper()])
+            return ('ref', text)
+        if (kind, text) == ('op', '('):
+            node = self.comparison()
+            self.take(')')
+            return node
+        raise FormulaError(f"Unexpected {text!r}")
+
+    def call(self, name):
+        if name not in FUNCTIONS and name not in LAZY_FUNCTIONS:
+            raise FormulaError(f"Unknown function {name}")
+        self.take('(')
+        args = []
+        if self.peek() != ('op', ')'):
+            args.append(self.comparison())
+            while self.peek() == ('op', ','):
+                self.take()
+                args.append(self.comparison())
+        self.take(')')
+        return ('call', name, tuple(args))
+
+
+def _compile(node):
+    """Turn an AST node into a closure taking the row's {key: value} context"""
+    kind = node[0]
+
+    if kind == 'literal':
+        value = node[1]
+        return lambda row: value
+
+    if kind == 'ref':
+        key = node[1]
+        return lambda row: row.get(key)
+
+    if kind == 'negate':
+        operand = _compile(node[1])
+        return lambda row: -_to_number(operand(row))
+
+    if kind == 'binary':
+        op, left, right = node[1], _compile(node[2]), _compile(node[3])
+        if op == '&':
+            return lambda row: _to_text(left(row)) + _to_text(right(row))
+        if op in COMPARISONS:
+            compare = COMPARISONS[op]
+            return lambda row: compare(left(row), right(row))
+        arithmetic = ARITHMETIC[op]
+        return lambda row: arithmetic(_to_number(left(row)), _to_number(right(row)))
+
+    if kind == 'call':
+        name, args = node[1], [_compile(arg) for arg in node[2]]
+        if name == 'IF':
+            if len(args) not in (2, 3):
+                raise FormulaError("IF takes 2 or 3 arguments")
+            condition, then = args[0], args[1]
+            otherwise = args[2] if len(args) == 3 else (lambda row: False)
+            return lambda row: then(row) if _to_bool(condition(row)) else otherwise(row)
+        if name == 'IFERROR':
+            if len(args) != 2:
+                raise FormulaError("IFERROR takes 2 arguments")
+            value, fallback = args
+
+            def if_error(row):
+                try:
+                    return value(row)
+                except FormulaValueError:
+                    return fallback(row)
+            return if_error
+        function = FUNCTIONS[name]
+        return lambda row: function(*[arg(row) for arg in args])
+
+    raise FormulaError(f"Unsupported expression {kind}")
+
+
+def _references(node):
+    kind = node[0]
+    if kind == 'ref':
+        return {node[1]}
+    if kind == 'negate':
+        return _references(node[1])
+    if kind == 'binary':
+        return _references(node[2]) | _references(node[3])
+    if kind == 'call':
+        refs = set()
+        for arg in node[2]:
+            refs |= _references(arg)
+        return refs
+    return set()
+
+
+class CompiledFormula:
+    def __init__(self, source, evaluate, references):
+        self.source = source
+        self.evaluate = evaluate
+        self.references = references
+
+    def __call__(self, row):
+        """Evaluate for one row; returns (display value, raw value)"""
+        try:
+            result = self.evaluate(row)
+        except FormulaValueError as e:
+            return e.code, None
+        except (ArithmeticError, TypeError, ValueError):
+            return '#VALUE!', None
+        if isinstance(result, float):
+            if not math.isfinite(result):
+                return '#NUM!', None
+            if result.is_integer() and abs(result) < 2 ** 53:
+                result = int(result)
+        return _to_text(result), result
+
+
+ERROR_FORMULA = CompiledFormula('', lambda row: _raise('#ERROR!'), frozenset())
+
+
+@lru_cache(maxsize=1024)
+def compile_formula(source):
+    """Parse a formula once into a compiled expression tree"""
+    text = (source or '').strip()
+    if text.startswith('='):
+        text = text[1:]
+    if not text:
+        raise FormulaError("Formula is empty")
+    if len(text) > MAX_FORMULA_LENGTH:
+        raise FormulaError(f"Formulas are limited to {MAX_FORMULA_LENGTH} characters")
+    tree = _Parser(_tokenize(text)).parse()
+    return CompiledFormula(source, _compile(tree), frozenset(_references(tree)))
+
+
+class FormulaGraph:
+    """
+    Dependency graph between a sheet's columns. Formula columns depend on
+    the columns they reference; order lists them so that every formula
+    comes after the formulas it reads.
+    """
+
+    def __init__(self, columns, strict=True):
+        """
+        columns: iterable of objects with key, column_type and formula.
+        With strict=False, broken formulas (saved before validation, or
+        referencing a deleted column) evaluate to #ERROR! instead of raising.
+        """
+        from .models import SheetColumn
+
+        self.strict = strict
+        self.keys = {column.key for column in columns}
+        self.formulas = {}
+        for column in columns:
+            if column.column_type != SheetColumn.ColumnType.FORMULA:
+                continue
+            try:
+                compiled = compile_formula(column.formula)
+                unknown = compiled.references - self.keys
+                if unknown:
+                    raise FormulaError(f"unknown column {', '.join(sorted(unknown))}")
+            except FormulaError as e:
+                if strict:
+                    raise FormulaError(f"{column.key}: {e}")
+                compiled = ERROR_FORMULA
+            self.formulas[column.key] = compiled
+
+        # Reverse edges: column key -> formula columns that read it
+        self.dependents = {}
+        for key, compiled in self.formulas.items():
+            for reference in compiled.references:
+                self.dependents.setdefault(reference, set()).add(key)
+
+        self.order = self._topological_order()
+        self._rank = {key: index for index, key in enumerate(self.order)}
+
+    def _topological_order(self):
+        # Kahn's algorithm over formula columns; leftovers are in a cycle
+        pending = {
+            key: len(compiled.references & self.formulas.keys())
+            for key, compiled in self.formulas.items()
+        }
+        ready = sorted(key for key, count in pending.items() if count == 0)
+        order = []
+        while ready:
+            key = ready.pop()
+            order.append(key)
+            for dependent in sorted(self.dependents.get(key, ())):
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.formulas):
+            cycle = sorted(set(self.formulas) - set(order))
+            if self.strict:
+                raise FormulaError(f"Circular reference between columns: {', '.join(cycle)}")
+            for key in cycle:
+                self.formulas[key] = ERROR_FORMULA
+            order.extend(cycle)
+        return order
+
+    def downstream(self, keys):
+        """Formula columns affected by changes to keys, in evaluation order"""
+        affected = set()
+        stack = list(keys)
+        while stack:
+            for dependent in self.dependents.get(stack.pop(), ()):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    stack.append(dependent)
+        return sorted(affected, key=self._rank.__getitem__)
+
+    def inputs(self, formula_keys):
+        """Every column read while evaluating formula_keys"""
+        needed = set()
+        for key in formula_keys:
+            needed |= self.formulas[key].references
+        return needed
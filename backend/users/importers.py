@@ -0,0 +1,542 @@
+# users/importers.py
+import csv
+import io
+import itertools
+import re
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from .models import Cell, ProjectSheet, SheetColumn, SheetRow, Task, User
+from . import dashboard_stats, project_stats, sheet_cache, sheet_events, sheets
+from .permission_cache import LOCAL_BACKENDS
+from .sheet_storage import get_storage
+
+try:
+    import openpyxl
+except ImportError:  # listed in requirements.txt; without it only CSV can be imported
+    openpyxl = None
+
+# Files are read one row at a time and written in batches of
+# IMPORT_BATCH_SIZE rows, so memory use does not grow with the file size.
+IMPORT_BATCH_SIZE = 2000
+IMPORT_SAMPLE_SIZE = 200
+MAX_REPORTED_ERRORS = 100
+MAX_SELECT_OPTIONS = 20
+PROGRESS_KEY = 'import:{}'
+
+FORMATS = ('csv', 'xlsx')
+TARGETS = ('sheet', 'tasks')
+
+TASK_FIELDS = {
+    'title': ('title', 'name', 'task'),
+    'description': ('description', 'details', 'notes'),
+    'status': ('status', 'state'),
+    'priority': ('priority',),
+    'assignee': ('assignee', 'assignee email', 'assigned to', 'owner'),
+    'start_date': ('start date', 'start', 'start_date'),
+    'end_date': ('end date', 'end', 'end_date'),
+    'due_date': ('due date', 'due', 'due_date', 'deadline'),
+}
+
+
+class ImportFileError(Exception):
+    """Raised when an uploaded file cannot be imported at all"""
+
+
+def batch_size():
+    return getattr(settings, 'IMPORT_BATCH_SIZE', IMPORT_BATCH_SIZE)
+
+
+def file_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension not in FORMATS:
+        raise ImportFileError("Only .csv and .xlsx files can be imported")
+    if extension == 'xlsx' and openpyxl is None:
+        raise ImportFileError("XLSX import is not available on this server; upload a CSV instead")
+    return extension
+
+
+# Progress
+
+def unavailable_reason():
+    """
+    Why uploads cannot be imported in the background here, or None. Jobs run
+    on a Celery worker and report progress through the cache, so both a
+    broker and a cache shared between processes are needed; without them the
+    import would block the request and other workers could not see progress.
+    """
+    if getattr(settings, 'IMPORT_ALLOW_IN_REQUEST', False):
+        return None
+    if getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+        return "Imports need a task broker; set CELERY_BROKER_URL"
+    if settings.CACHES.get('default', {}).get('BACKEND') in LOCAL_BACKENDS:
+        return "Imports need a shared cache; set REDIS_URL"
+    return None
+
+
+def get_progress(job_id):
+    return cache.get(PROGRESS_KEY.format(job_id))
+
+
+def set_progress(job_id, **fields):
+    progress = get_progress(job_id) or {'id': str(job_id)}
+    progress.update(fields)
+    cache.set(PROGRESS_KEY.format(job_id), progress, getattr(settings, 'IMPORT_PROGRESS_TIMEOUT', 24 * 3600))
+    return progress
+
+
+# Reading
+
+def _csv_rows(fileobj, size):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    for row in csv.reader(text):
+        # The position is that of the buffered reader, close enough for progress
+        yield row, (fileobj.tell() / size if size else None)
+
+
+def _xlsx_rows(fileobj):
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[0]
+        total = worksheet.max_row
+        for index, row in enumerate(worksheet.iter_rows(values_only=True), 1):
+            yield list(row), (index / total if total else None)
+    finally:
+        workbook.close()
+
+
+def read_rows(fileobj, file_format, size=None):
+    """
+    Return (header, rows) where rows lazily yields (values, fraction read).
+    Blank lines are skipped; the first non-blank line is the header.
+    """
+    if file_format == 'xlsx':
+        rows = _xlsx_rows(fileobj)
+    else:
+        rows = _csv_rows(fileobj, size)
+    rows = ((values, fraction) for values, fraction in rows if any(not _is_blank(value) for value in values))
+    try:
+        header, _ = next(rows)
+    except StopIteration:
+        raise ImportFileError("The file is empty")
+    except (UnicodeDecodeError, csv.Error):
+        raise ImportFileError("Could not read the CSV file")
+    header = [str(name).strip() if name is not None else '' for name in header]
+    return header, rows
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value == '' else value
+
+
+def _batches(rows, size):
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+# Column type inference
+
+def _is_number(value):
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return True
+    try:
+        float(value.replace(',', ''))
+    except (AttributeError, ValueError):
+        return False
+    return True
+
+
+def _is_date(value):
+    if isinstance(value, (date, datetime)):
+        return True
+    try:
+        date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return False
+    return True
+
+
+def _is_checkbox(value):
+    return isinstance(value, bool) or str(value).lower() in ('true', 'false', 'yes', 'no')
+
+
+def infer_column_type(values):
+    """Pick a column type (and dropdown options) from sample values"""
+    values = [value for value in values if not _is_blank(value)]
+    if not values:
+        return SheetColumn.ColumnType.TEXT, []
+    if all(_is_checkbox(value) for value in values):
+        return SheetColumn.ColumnType.CHECKBOX, []
+    if all(_is_number(value) for value in values):
+        return SheetColumn.ColumnType.NUMBER, []
+    if all(_is_date(value) for value in values):
+        return SheetColumn.ColumnType.DATE, []
+    distinct = list(dict.fromkeys(str(value) for value in values))
+    # Repeated short labels look like categories
+    if len(distinct) <= MAX_SELECT_OPTIONS and len(values) >= 2 * len(distinct) and all(len(v) <= 50 for v in distinct):
+        return SheetColumn.ColumnType.SELECT, distinct
+    return SheetColumn.ColumnType.TEXT, []
+
+
+def _column_key(name, index, taken):
+    base = re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')[:40] or f'column_{index + 1}'
+    key, suffix = base, 2
+    while key in taken:
+        key = f'{base}_{suffix}'
+        suffix += 1
+    taken.add(key)
+    return key
+
+
+def _import_value(value):
+    """Normalize spreadsheet values before coercion"""
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str) and _is_number(value) and ',' in value:
+        return value.replace(',', '')
+    return value
+
+
+# Sheet import
+
+class _ImportColumn:
+    """Where one file column goes, and whether its type may still be relaxed"""
+
+    def __init__(self, column, position, inferred):
+        self.column = column
+        self.position = position
+        self.inferred = inferred
+        self.changed = False
+
+
+def _coerce_batch(target, values, member_ids, errors, first_row):
+    """
+    Coerce one column of a batch. A value that does not fit a column created
+    by this import turns that column into text (keeping everything written
+    so far, which is text already); for existing columns it is skipped.
+    """
+    column = target.column
+    if column.column_type == SheetColumn.ColumnType.SELECT and target.inferred:
+        # Dropdowns created by the import grow to hold every value
+        options = column.options
+        known = set(options)
+        for value in values:
+            if not _is_blank(value) and str(value) not in known:
+                known.add(str(value))
+                options.append(str(value))
+                target.changed = True
+        if len(options) > MAX_SELECT_OPTIONS * 5:
+            column.column_type = SheetColumn.ColumnType.TEXT
+            column.options = []
+    try:
+        return sheets.coerce_column(column, values, member_ids)
+    except sheets.InvalidCellValue:
+        if target.inferred and not column.is_required:
+            column.column_type = SheetColumn.ColumnType.TEXT
+            column.options = []
+            target.changed = True
+            return sheets.coerce_column(column, values, member_ids)
+
+    # Slow path: coerce value by value so only the bad ones are dropped
+    coerced = []
+    for index, value in enumerate(values):
+        try:
+            coerced.extend(sheets.coerce_column(column, [value], member_ids))
+        except sheets.InvalidCellValue as error:
+            coerced.append((None, None))
+            _add_error(errors, first_row + index, column.name, str(error))
+    return coerced
+
+
+def _add_error(errors, row, column, message):
+    """row counts data rows from 1, after the header"""
+    errors['count'] += 1
+    if len(errors['items']) < MAX_REPORTED_ERRORS:
+        errors['items'].append({'row': row, 'column': column, 'error': message})
+
+
+def import_sheet(project, user, header, rows, name=None, sheet=None, storage=None, on_progress=None):
+    """
+    Import rows into a new sheet (or append them to `sheet`). Column types
+    of new columns are inferred from the first IMPORT_SAMPLE_SIZE rows;
+    existing columns are matched by name or key. Rows and cells are written
+    with one bulk insert per batch, all inside a single transaction.
+    """
+    sample = list(itertools.islice(rows, getattr(settings, 'IMPORT_SAMPLE_SIZE', IMPORT_SAMPLE_SIZE)))
+    rows = itertools.chain(sample, rows)
+    errors = {'count': 0, 'items': []}
+    imported = 0
+
+    with transaction.atomic():
+        if sheet is None:
+            sheet = ProjectSheet.objects.create(
+                project=project,
+                name=name or 'Imported sheet',
+                created_by=user,
+                storage=storage or ProjectSheet.Storage.CELLS,
+            )
+            existing = {}
+        else:
+            existing = {}
+            for column in SheetColumn.objects.filter(sheet=sheet):
+                existing.setdefault(column.name.lower(), column)
+                existing.setdefault(column.key, column)
+
+        targets = []
+        new_columns = []
+        taken = set(SheetColumn.objects.filter(sheet=sheet).values_list('key', flat=True))
+        column_order = sheets.next_order(SheetColumn.objects.filter(sheet=sheet))
+        for position, column_name in enumerate(header):
+            column = existing.get(column_name.lower()) or existing.get(column_name)
+            if column is not None:
+                if column.column_type != SheetColumn.ColumnType.FORMULA:
+                    targets.append(_ImportColumn(column, position, inferred=False))
+                continue
+            sample_values = [_import_value(values[position]) for values, _ in sample if position < len(values)]
+            column_type, options = infer_column_type(sample_values)
+            column = SheetColumn(
+                sheet=sheet,
+                name=column_name or f'Column {position + 1}',
+                key=_column_key(column_name, position, taken),
+                column_type=column_type,
+                options=options,
+                order=column_order,
+            )
+            column_order += sheets.ORDER_GAP
+            new_columns.append(column)
+            targets.append(_ImportColumn(column, position, inferred=True))
+        SheetColumn.objects.bulk_create(new_columns)
+
+        member_ids = None
+        if any(target.column.column_type == SheetColumn.ColumnType.USER for target in targets):
+            member_ids = sheets._team_member_ids(sheet)
+
+        storage_backend = get_storage(sheet)
+        order = sheets.next_order(SheetRow.objects.filter(sheet=sheet))
+        first_row = 1
+        for batch in _batches(rows, batch_size()):
+            batch_rows = [
+                SheetRow(id=uuid.uuid4(), sheet=sheet, created_by=user, order=order + index * sheets.ORDER_GAP)
+                for index in range(len(batch))
+            ]
+            order += len(batch) * sheets.ORDER_GAP
+            cells = []
+            for target in targets:
+                values = [
+                    _clean(_import_value(values[target.position])) if target.position < len(values) else None
+                    for values, _ in batch
+                ]
+                coerced = _coerce_batch(target, values, member_ids, errors, first_row)
+                for row, (value, raw_value) in zip(batch_rows, coerced):
+                    if value is not None:
+                        cells.append(Cell(
+                            row_id=row.id,
+                            column_id=target.column.id,
+                            value=value,
+                            raw_value=raw_value,
+                            version=1,
+                            updated_by=user,
+                        ))
+            storage_backend.insert(sheet, batch_rows, cells, batch_size=batch_size())
+            imported += len(batch)
+            first_row += len(batch)
+            if on_progress:
+                on_progress(imported, batch[-1][1])
+
+        changed_columns = [target.column for target in targets if target.changed]
+        if changed_columns:
+            SheetColumn.objects.bulk_update(changed_columns, ['column_type', 'options'])
+
+        formula_keys = SheetColumn.objects.filter(
+            sheet=sheet, column_type=SheetColumn.ColumnType.FORMULA
+        ).values_list('key', flat=True)
+        if imported and formula_keys:
+            sheets.recalculate_formulas(sheet, {key: None for key in formula_keys}, user)
+        sheet_cache.bump_data_version(sheet.id)
+        sheet_events.publish_sheet_event(sheet.id, 'rows.imported', {'count': imported}, user)
+
+    return {
+        'sheet_id': str(sheet.id),
+        'rows': imported,
+        'columns_created': len(new_columns),
+        'error_count': errors['count'],
+        'errors': errors['items'],
+    }
+
+
+# Task import
+
+def _compact(text):
+    return re.sub(r'[\s_-]+', '', text.lower())
+
+
+def _choice(choices, value):
+    """
+    Accept an IntegerChoices member as its number, its label ("To Do") or
+    its stored name ("todo", "in_progress"), ignoring case and separators
+    """
+    text = str(value).strip()
+    if text.isdigit() and int(text) in choices.values:
+        return int(text)
+    compact = _compact(text)
+    for member in choices:
+        if compact in (_compact(member.label), _compact(member.name)):
+            return member.value
+    raise ValueError(f"Unknown {choices.__name__.lower()}: {text}")
+
+
+def _datetime(value):
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        parsed = datetime(value.year, value.month, value.day)
+    else:
+        text = str(value).strip()
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            raise ValueError(f"{text!r} is not a date (YYYY-MM-DD)")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _task_columns(header):
+    positions = {}
+    for position, name in enumerate(header):
+        normalized = name.lower().strip()
+        for field, aliases in TASK_FIELDS.items():
+            if normalized in aliases and field not in positions:
+                positions[field] = position
+    if 'title' not in positions:
+        raise ImportFileError("The file needs a \"title\" column")
+    return positions
+
+
+def import_tasks(project, user, header, rows, on_progress=None):
+    """
+    Import tasks, one per row. Status and priority accept numbers, labels or names;
+    assignees are matched by email among the team's active members. Rows
+    that fail validation are skipped and reported.
+    """
+    positions = _task_columns(header)
+    ignored = [name for position, name in enumerate(header) if position not in positions.values()]
+    errors = {'count': 0, 'items': []}
+    assignees = {}
+    imported = 0
+    completed = defaultdict(int)
+    statuses = Counter()
+    now = timezone.now()
+
+    def field(values, name):
+        position = positions.get(name)
+        return _clean(values[position]) if position is not None and position < len(values) else None
+
+    with transaction.atomic():
+        first_row = 1
+        for batch in _batches(rows, batch_size()):
+            emails = {
+                str(email).lower() for email in (field(values, 'assignee') for values, _ in batch)
+                if email is not None
+            } - assignees.keys()
+            if emails:
+                for user_id, email in User.objects.annotate(email_lower=Lower('email')).filter(
+                    email_lower__in=emails,
+                    team_memberships__team_id=project.team_id,
+                    team_memberships__is_active=True,
+                ).values_list('id', 'email_lower'):
+                    assignees[email] = user_id
+                # Remember misses too so they are not looked up again
+                for email in emails:
+                    assignees.setdefault(email, None)
+
+            tasks = []
+            for index, (values, _) in enumerate(batch):
+                try:
+                    title = field(values, 'title')
+                    if title is None:
+                        raise ValueError("Title is required")
+                    task = Task(
+                        project=project,
+                        created_by=user,
+                        title=str(title)[:255],
+                        description=field(values, 'description'),
+                    )
+                    for name, choices in (('status', Task.Status), ('priority', Task.Priority)):
+                        value = field(values, name)
+                        if value is not None:
+                            setattr(task, name, _choice(choices, value))
+                    for name in ('start_date', 'end_date', 'due_date'):
+                        value = field(values, name)
+                        if value is not None:
+                            setattr(task, name, _datetime(value))
+                    email = field(values, 'assignee')
+                    if email is not None:
+                        task.assignee_id = assignees.get(str(email).lower())
+                        if task.assignee_id is None:
+                            raise ValueError(f"{email} is not a member of this team")
+                except ValueError as e:
+                    _add_error(errors, first_row + index, None, str(e))
+                    continue
+                # bulk_create skips Task.save(), which maintains completed_at,
+                # and the signals that maintain dashboard and project stats
+                if task.status == Task.Status.DONE:
+                    task.completed_at = now
+                    if task.assignee_id is not None:
+                        completed[task.assignee_id] += 1
+                statuses[task.status] += 1
+                tasks.append(task)
+            Task.objects.bulk_create(tasks, batch_size=batch_size())
+            imported += len(tasks)
+            first_row += len(batch)
+            if on_progress:
+                on_progress(first_row - 1, batch[-1][1])
+        dashboard_stats.add_completed_tasks(completed)
+        project_stats.add_tasks(project.id, statuses)
+
+    return {
+        'tasks': imported,
+        'ignored_columns': ignored,
+        'error_count': errors['count'],
+        'errors': errors['items'],
+    }
+
+
+# Jobs
+
+def run_import(job_id, fileobj, file_format, target, project, user, size=None, name=None, sheet=None, storage=None):
+    """Run one import job, recording its progress and result under job_id"""
+    set_progress(job_id, status='running', processed=0, percent=0)
+
+    def on_progress(processed, fraction):
+        set_progress(job_id, processed=processed, percent=round(fraction * 100) if fraction is not None else None)
+
+    try:
+        header, rows = read_rows(fileobj, file_format, size)
+        if target == 'tasks':
+            result = import_tasks(project, user, header, rows, on_progress=on_progress)
+        else:
+            result = import_sheet(project, user, header, rows, name=name, sheet=sheet, storage=storage, on_progress=on_progress)
+    except ImportFileError as e:
+        return set_progress(job_id, status='failed', error=str(e))
+    except (UnicodeDecodeError, csv.Error):
+        return set_progress(job_id, status='failed', error="Could not read the CSV file")
+    return set_progress(job_id, status='done', percent=100, result=result)
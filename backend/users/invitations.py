@@ -0,0 +1,171 @@
+# users/invitations.py
+import csv
+import io
+import uuid
+from datetime import timedelta
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from .models import User, TeamMember, TeamInvitation, Notification
+from .notifications import publish_notifications
+from .email_service import enqueue_invitation_emails
+
+INVITATION_LIFETIME = timedelta(days=7)
+MAX_BULK_INVITES = 1000
+
+
+def parse_role(value):
+    """Accept a role as its number or its label ("Admin", "member", ...)"""
+    if value in (None, ''):
+        return None
+    value = str(value).strip()
+    if value.isdigit() and int(value) in TeamMember.Role.values:
+        return int(value)
+    for role_value, label in TeamMember.Role.choices:
+        if label.lower() == value.lower():
+            return role_value
+    raise ValidationError(f"Unknown role: {value}")
+
+
+def parse_invitation_csv(upload):
+    """
+    Read invitees from an uploaded CSV. Either the first row is a header with
+    an "email" (and optionally "role") column, or every row is email[,role].
+    Returns a list of (email, role or None).
+    """
+    text = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    entries = []
+    email_col, role_col = 0, 1
+    for index, row in enumerate(reader):
+        cells = [cell.strip() for cell in row]
+        if not any(cells):
+            continue
+        if index == 0:
+            header = [cell.lower() for cell in cells]
+            if 'email' in header:
+                email_col = header.index('email')
+                role_col = header.index('role') if 'role' in header else None
+                continue
+        email = cells[email_col] if email_col < len(cells) else ''
+        role = cells[role_col] if role_col is not None and role_col < len(cells) else None
+        entries.append((email, role))
+        if len(entries) > MAX_BULK_INVITES:
+            raise ValidationError(f"A maximum of {MAX_BULK_INVITES} invitations can be sent at once")
+    return entries
+
+
+def bulk_invite(team, inviter, entries, default_role=TeamMember.Role.MEMBER):
+    """
+    Invite many emails to a team with set-based checks and batched inserts.
+    entries is an iterable of (email, role or None). Returns
+    {'invited': [...], 'skipped': [{'email', 'reason'}]}.
+    """
+    skipped = []
+    candidates = {}  # lowercased email -> (email, role)
+    for raw_email, raw_role in entries:
+        email = User.objects.normalize_email((raw_email or '').strip())
+        try:
+            validate_email(email)
+            role = parse_role(raw_role)
+        except ValidationError as e:
+            skipped.append({'email': raw_email, 'reason': e.messages[0]})
+            continue
+        key = email.lower()
+        if key in candidates:
+            skipped.append({'email': raw_email, 'reason': 'Duplicate email'})
+            continue
+        candidates[key] = (email, role or default_role)
+
+    if not candidates:
+        return {'invited': [], 'skipped': skipped}
+
+    # Resolve existing users, memberships and pending invitations in three queries
+    users = {
+        row['email_lower']: row
+        for row in User.objects.annotate(email_lower=Lower('email'))
+        .filter(email_lower__in=candidates.keys())
+        .values('id', 'email', 'email_lower')
+    }
+    member_ids = set(
+        TeamMember.objects.filter(team=team, user_id__in=[row['id'] for row in users.values()])
+        .values_list('user_id', flat=True)
+    )
+    pending = set(
+        TeamInvitation.objects.filter(
+            team=team,
+            status=TeamInvitation.Status.PENDING,
+            expires_at__gt=timezone.now()
+        ).annotate(email_lower=Lower('email'))
+        .filter(email_lower__in=candidates.keys())
+        .values_list('email_lower', flat=True)
+    )
+
+    now = timezone.now()
+    invitations = []
+    invitee_ids = {}  # invitation id -> existing user id
+    for key, (email, role) in candidates.items():
+        user = users.get(key)
+        if user and user['id'] in member_ids:
+            skipped.append({'email': email, 'reason': 'User is already a member of this team'})
+            continue
+        if key in pending:
+            skipped.append({'email': email, 'reason': 'An active invitation already exists for this email'})
+            continue
+        invitation = TeamInvitation(
+            # Match the account's stored email so acceptance checks line up
+            email=user['email'] if user else email,
+            team=team,
+            invited_by=inviter,
+            token=str(uuid.uuid4()),
+            role=role,
+            expires_at=now + INVITATION_LIFETIME
+        )
+        invitations.append(invitation)
+        if user:
+            invitee_ids[invitation.id] = user['id']
+
+    if not invitations:
+        return {'invited': [], 'skipped': skipped}
+
+    inviter_name = f"{inviter.first_name} {inviter.last_name}"
+    with transaction.atomic():
+        TeamInvitation.objects.bulk_create(invitations)
+
+        notifications = [
+            Notification(
+                user_id=invitee_ids[invitation.id],
+                type=Notification.Type.INVITATION,
+                title="Team Invitation",
+                message=f"{inviter_name} invited you to join {team.name}",
+                related_id=invitation.id,
+                action_url=f"/invitation/accept/{invitation.token}"
+            )
+            for invitation in invitations if invitation.id in invitee_ids
+        ]
+        # One summary notification for the inviter instead of one per invite
+        notifications.append(Notification(
+            user=inviter,
+            type=Notification.Type.INVITATION,
+            title="Invitations Sent",
+            message=f"You invited {len(invitations)} people to join {team.name}"
+        ))
+        Notification.objects.bulk_create(notifications)
+        publish_notifications(notifications)
+
+        enqueue_invitation_emails(invitations, inviter_name, team.name)
+
+    return {
+        'invited': [
+            {
+                'email': invitation.email,
+                'invitation_id': invitation.id,
+                'role': invitation.role,
+                'user_exists': invitation.id in invitee_ids
+            }
+            for invitation in invitations
+        ],
+        'skipped': skipped
+    }
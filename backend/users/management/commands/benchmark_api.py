@@ -0,0 +1,75 @@
+import json
+import logging
+import platform
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from users import benchmarking, seeding
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic tenant in a throwaway database (on the configured '
+        'backend, e.g. SQLite or a local Postgres via DATABASE_URL), drive the '
+        'hot API endpoints with concurrent in-process clients and report '
+        'latency percentiles, throughput and query counts as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1, help='Multiply every seeded count')
+        for key, value in seeding.DEFAULT_SIZES.items():
+            parser.add_argument(f'--{key}', type=int, help=f'Seeded {key} (default {value})')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per endpoint first')
+        parser.add_argument('--endpoints', nargs='+', metavar='NAME', help='Only these endpoints')
+        parser.add_argument('--output', help='Write the report to this file instead of stdout')
+        parser.add_argument('--compare', metavar='REPORT', help='Include the change against a previous report')
+
+    def handle(self, *args, **options):
+        endpoints = [
+            endpoint for endpoint in benchmarking.BENCHMARK_ENDPOINTS
+            if not options['endpoints'] or endpoint[0] in options['endpoints']
+        ]
+        if not endpoints:
+            raise CommandError(f"No matching endpoints; choose from: {', '.join(name for name, _ in benchmarking.BENCHMARK_ENDPOINTS)}")
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as report:
+                    baseline = json.load(report)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read {options['compare']}: {e}")
+
+        sizes = seeding.scaled_sizes(options['scale'], **{key: options[key] for key in seeding.DEFAULT_SIZES})
+        # One log line per request would swamp the report
+        logging.getLogger('users.queries').disabled = True
+        with seeding.throwaway_database():
+            self.stderr.write(f"Seeding {', '.join(f'{value} {key}' for key, value in sizes.items())}")
+            tenant = seeding.seed_tenant(**sizes)
+            results = benchmarking.run_benchmark(
+                tenant,
+                endpoints,
+                requests=options['requests'],
+                concurrency=options['concurrency'],
+                warmup=options['warmup'],
+            )
+            database = connection.vendor
+        if baseline:
+            benchmarking.compare(results, baseline)
+
+        report = json.dumps({
+            'created_at': timezone.now().isoformat(),
+            'database': database,
+            'python': platform.python_version(),
+            'sizes': sizes,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'endpoints': results,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(report)
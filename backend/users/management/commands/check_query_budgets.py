@@ -0,0 +1,76 @@
+import json
+import logging
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIClient
+from users import presence, seeding
+from users.middleware import QueryStats
+from users.query_budgets import QUERY_BUDGETS
+
+
+def count_queries(client, path):
+    """Queries one GET issues with cold caches, as (status code, count)"""
+    for cache in caches.all():
+        cache.clear()
+    presence.flush(force=True)
+    stats = QueryStats()
+    with connection.execute_wrapper(stats):
+        response = client.get(path)
+    return response.status_code, stats.count
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a small and a larger tenant in a throwaway database and check '
+        'the SQL queries of each endpoint in users/query_budgets.py'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1, help='Size of the small tenant, as a multiple of the default sizes')
+        parser.add_argument('--growth', type=float, default=3, help='How much larger the second tenant is')
+        parser.add_argument('--only', nargs='+', metavar='NAME', help='Only check these endpoints')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+
+    def handle(self, *args, **options):
+        budgets = [entry for entry in QUERY_BUDGETS if not options['only'] or entry[0] in options['only']]
+        if not budgets:
+            raise CommandError('No matching endpoints')
+
+        # The per-request log lines would only repeat the counts reported here
+        logging.getLogger('users.queries').disabled = True
+        with seeding.throwaway_database():
+            small = seeding.seed_tenant(seed=1, **seeding.scaled_sizes(options['scale']))
+            large = seeding.seed_tenant(seed=2, **seeding.scaled_sizes(options['scale'] * options['growth']))
+            results = []
+            for name, path, budget in budgets:
+                counts = {}
+                for label, tenant in (('small', small), ('large', large)):
+                    client = APIClient()
+                    client.force_authenticate(tenant.user)
+                    status_code, count = count_queries(client, path.format(**tenant.urls()))
+                    if status_code >= 400:
+                        raise CommandError(f'{name}: GET {path} returned {status_code}')
+                    counts[label] = count
+                problems = []
+                if counts['large'] > budget:
+                    problems.append(f'over budget ({counts["large"]} > {budget})')
+                if counts['large'] > counts['small']:
+                    problems.append(f'grows with data ({counts["small"]} -> {counts["large"]})')
+                results.append({'endpoint': name, 'path': path, 'budget': budget, **counts, 'problems': problems})
+
+        failed = [result for result in results if result['problems']]
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            width = max(len(result['endpoint']) for result in results)
+            for result in results:
+                line = f"{result['endpoint']:<{width}}  {result['small']:>4} {result['large']:>4} / {result['budget']:<4}"
+                if result['problems']:
+                    self.stdout.write(self.style.ERROR(f"{line} {'; '.join(result['problems'])}"))
+                else:
+                    self.stdout.write(f"{line} ok")
+        if failed:
+            raise CommandError(f'{len(failed)} of {len(results)} endpoints exceeded their query budget')
+        if not options['json']:
+            self.stdout.write(self.style.SUCCESS(f'All {len(results)} endpoints are within their query budgets'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from users import query_plans, seeding
+from users.query_plans import HOT_QUERIES
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a tenant in a throwaway database, EXPLAIN the hot queries in '
+        'users/query_plans.py and fail if any of them scans a whole table'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1, help='Size of the tenant, as a multiple of the default sizes')
+        parser.add_argument('--only', nargs='+', metavar='NAME', help='Only check these queries')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only failing ones')
+
+    def handle(self, *args, **options):
+        queries = [entry for entry in HOT_QUERIES if not options['only'] or entry[0] in options['only']]
+        if not queries:
+            raise CommandError('No matching queries')
+
+        failed = 0
+        with seeding.throwaway_database():
+            tenant = seeding.seed_tenant(seed=1, **seeding.scaled_sizes(options['scale']))
+            query_plans.analyze()
+            width = max(len(name) for name, _ in queries)
+            for name, build in queries:
+                plan = query_plans.explain(build(tenant))
+                scans = query_plans.sequential_scans(plan)
+                if scans:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f"{name:<{width}}  sequential scan of {', '.join(scans)}"))
+                else:
+                    self.stdout.write(f'{name:<{width}}  ok')
+                if scans or options['verbose_plans']:
+                    self.stdout.write(plan)
+
+        if failed:
+            raise CommandError(f'{failed} of {len(queries)} queries scan a whole table')
+        self.stdout.write(self.style.SUCCESS(f'All {len(queries)} queries use an index'))
@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from users.tasks import dispatch_pending_emails
+
+
+class Command(BaseCommand):
+    help = (
+        'Send due outbox emails and retries. Run with --loop where no Celery '
+        'broker (and so no beat schedule) is configured.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping until interrupted')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between sweeps with --loop')
+        parser.add_argument('--limit', type=int, default=100, help='Messages per sweep')
+
+    def handle(self, *args, **options):
+        while True:
+            sent = dispatch_pending_emails(limit=options['limit'])
+            self.stdout.write(f'Sent {sent} emails')
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
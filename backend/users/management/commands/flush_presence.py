@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from users import presence
+
+
+class Command(BaseCommand):
+    help = (
+        'Persist pending last_active values from the Redis presence store '
+        '(PRESENCE_BACKEND = "redis"). The local store lives inside each '
+        'worker process, which flushes it on a timer; this command cannot reach it.'
+    )
+
+    def handle(self, *args, **options):
+        if not isinstance(presence.get_store(), presence.RedisPresenceStore):
+            raise CommandError('flush_presence needs the Redis presence store; local stores are flushed by their workers')
+        count = presence.flush(force=True)
+        self.stdout.write(self.style.SUCCESS(f'Flushed last_active for {count} users'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from users import dashboard_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute materialized dashboard stats from the source tables'
+
+    def handle(self, *args, **options):
+        teams, users = dashboard_stats.reconcile()
+        self.stdout.write(self.style.SUCCESS(f'Reconciled stats for {teams} teams and {users} users'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from users import project_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute materialized project counters from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_ids', nargs='*', help='Only these projects (default: all)')
+
+    def handle(self, *args, **options):
+        if options['project_ids']:
+            count = len(project_stats.refresh_projects(options['project_ids']))
+        else:
+            count = project_stats.reconcile()
+        self.stdout.write(self.style.SUCCESS(f'Reconciled stats for {count} projects'))
@@ -1,24 +1,120 @@
 # users/middleware.py
-from django.utils import timezone
-from django.contrib.auth import get_user_model
 import logging
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from . import presence
 
 logger = logging.getLogger(__name__)
+query_logger = logging.getLogger('users.queries')
 
-class UpdateLastActiveMiddleware:
+class QueryStats:
+    """Database execute wrapper that counts queries and their total time"""
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+class QueryCountMiddleware:
+    """
+    Count the SQL queries each request issues and the time spent in them.
+    With QUERY_COUNT_HEADERS (on in DEBUG) the numbers are returned as
+    X-Query-Count / X-Query-Time-Ms / X-Request-Time-Ms headers; otherwise one
+    line per request is logged to users.queries, as a warning once a request
+    issues more than QUERY_COUNT_WARNING queries. Queries run while a
+    streaming response is being sent are not included.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.headers = getattr(settings, 'QUERY_COUNT_HEADERS', settings.DEBUG)
+        self.warning = getattr(settings, 'QUERY_COUNT_WARNING', 50)
+
+    def __call__(self, request):
+        stats = QueryStats()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        elapsed = (time.perf_counter() - started) * 1000
+        query_time = stats.duration * 1000
+        
+        if self.headers:
+            response['X-Query-Count'] = str(stats.count)
+            response['X-Query-Time-Ms'] = f'{query_time:.1f}'
+            response['X-Request-Time-Ms'] = f'{elapsed:.1f}'
+        
+        over_budget = stats.count > self.warning
+        if over_budget or not self.headers:
+            match = request.resolver_match
+            query_logger.log(
+                logging.WARNING if over_budget else logging.INFO,
+                "%s %s view=%s status=%s queries=%d query_ms=%.1f total_ms=%.1f",
+                request.method,
+                request.path,
+                match.view_name if match else '-',
+                response.status_code,
+                stats.count,
+                query_time,
+                elapsed,
+            )
+        return response
+
+class PresenceMiddleware:
+    """
+    Record activity for authenticated users in the presence store and let it
+    flush last_active in batches instead of writing on every request.
+    """
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
         response = self.get_response(request)
         
-        # Update last_active for authenticated users
         if request.user.is_authenticated:
             try:
-                User = get_user_model()
-                # Use update() for better performance
-                User.objects.filter(id=request.user.id).update(last_active=timezone.now())
+                presence.record_activity(request.user.id)
+                presence.flush()
             except Exception as e:
-                logger.error(f"Failed to update last_active for user {request.user.email}: {e}")
+                logger.error(f"Failed to record activity for user {request.user.email}: {e}")
             
-        return response
\ No newline at end of file
+        return response
+
+class TokenAuthMiddleware:
+    """
+    Channels middleware that authenticates WebSocket connections with the
+    same DRF token the REST API uses, passed as ?token=<key>.
+    """
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def __call__(self, scope, receive, send):
+        from urllib.parse import parse_qs
+        from django.contrib.auth.models import AnonymousUser
+
+        query = parse_qs(scope.get('query_string', b'').decode())
+        token_key = (query.get('token') or [None])[0]
+        scope['user'] = await _get_token_user(token_key) if token_key else AnonymousUser()
+        return await self.inner(scope, receive, send)
+
+async def _get_token_user(token_key):
+    from channels.db import database_sync_to_async
+    from django.contrib.auth.models import AnonymousUser
+    from rest_framework.authtoken.models import Token
+
+    @database_sync_to_async
+    def get_user():
+        try:
+            return Token.objects.select_related('user').get(key=token_key).user
+        except Token.DoesNotExist:
+            return AnonymousUser()
+
+    return await get_user()
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0008_alter_user_username"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "created_at", "id"], name="notif_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("status", 1)),
+                fields=["user"],
+                name="notif_user_unread_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0010_email_outbox"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="sheetrow",
+            index=models.Index(
+                fields=["sheet", "order", "created_at", "id"],
+                name="sheetrow_window_idx",
+            ),
+        ),
+    ]
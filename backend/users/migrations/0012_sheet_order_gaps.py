@@ -0,0 +1,30 @@
+from django.db import migrations
+
+ORDER_GAP = 1024
+
+
+def spread_orders(apps, schema_editor):
+    """Respace existing row and column orders ORDER_GAP apart per sheet"""
+    SheetRow = apps.get_model('users', 'SheetRow')
+    SheetColumn = apps.get_model('users', 'SheetColumn')
+    for model, ordering in ((SheetRow, ('sheet_id', 'order', 'created_at', 'id')),
+                            (SheetColumn, ('sheet_id', 'order', 'key'))):
+        positions = list(model.objects.order_by(*ordering).values_list('id', 'sheet_id'))
+        items = []
+        sheet_id, index = None, 0
+        for item_id, item_sheet_id in positions:
+            if item_sheet_id != sheet_id:
+                sheet_id, index = item_sheet_id, 0
+            items.append(model(id=item_id, order=index * ORDER_GAP))
+            index += 1
+        model.objects.bulk_update(items, ['order'], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0011_sheet_row_window_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_orders, migrations.RunPython.noop),
+    ]
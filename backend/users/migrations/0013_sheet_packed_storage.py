@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0012_sheet_order_gaps"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="projectsheet",
+            name="storage",
+            field=models.IntegerField(choices=[(1, "Cells"), (2, "Packed")], default=1),
+        ),
+        migrations.AddField(
+            model_name="sheetrow",
+            name="data",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="sheetrow",
+            name="raw_data",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0013_sheet_packed_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cell",
+            name="version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="sheetrow",
+            name="versions",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0014_sheet_cell_versions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TeamStats",
+            fields=[
+                (
+                    "team",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="users.team",
+                    ),
+                ),
+                ("member_count", models.IntegerField(default=0)),
+                ("project_count", models.IntegerField(default=0)),
+                ("active_project_count", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="UserDashboardStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="dashboard_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("team_count", models.IntegerField(default=0)),
+                ("project_count", models.IntegerField(default=0)),
+                ("active_project_count", models.IntegerField(default=0)),
+                ("completed_task_count", models.IntegerField(default=0)),
+                ("member_count", models.IntegerField(default=0)),
+                ("is_stale", models.BooleanField(default=False)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
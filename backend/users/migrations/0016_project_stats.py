@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0015_dashboard_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectStats",
+            fields=[
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="users.project",
+                    ),
+                ),
+                ("task_count", models.IntegerField(default=0)),
+                ("backlog_task_count", models.IntegerField(default=0)),
+                ("todo_task_count", models.IntegerField(default=0)),
+                ("in_progress_task_count", models.IntegerField(default=0)),
+                ("in_review_task_count", models.IntegerField(default=0)),
+                ("done_task_count", models.IntegerField(default=0)),
+                ("member_count", models.IntegerField(default=0)),
+                ("assignee_count", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
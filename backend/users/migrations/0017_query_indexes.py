@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0016_project_stats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="activitylog",
+            index=models.Index(
+                fields=["team", "-created_at"], name="activity_team_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="activitylog",
+            index=models.Index(
+                fields=["project", "-created_at"], name="activity_project_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                fields=["team", "-created_at"], name="project_team_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["project", "status"], name="task_project_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["assignee", "due_date"], name="task_assignee_due_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="teaminvitation",
+            index=models.Index(
+                fields=["email", "status", "expires_at"],
+                name="invite_email_pending_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="teamjoinrequest",
+            index=models.Index(
+                fields=["team", "status"], name="joinrequest_team_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="teammember",
+            index=models.Index(
+                fields=["team", "is_active"], name="teammember_team_active_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0017_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="sheetcolumn",
+            name="order",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="sheetrow",
+            name="order",
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -4,6 +4,7 @@ import uuid
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.utils import timezone
 
 
 # User model (keep your existing User model, just remove the circular imports)
@@ -67,6 +68,14 @@ class Notification(models.Model):
     related_id = models.UUIDField(null=True, blank=True)
     action_url = models.CharField(max_length=500, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination over a user's feed: (created_at, id) per user
+            models.Index(fields=['user', 'created_at', 'id'], name='notif_user_created_idx'),
+            # Unread counter only needs the unread slice
+            models.Index(fields=['user'], condition=models.Q(status=1), name='notif_user_unread_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.title}"
@@ -195,6 +204,10 @@ class TeamMember(models.Model):
 
     class Meta:
         unique_together = ['user', 'team']
+        indexes = [
+            # Active members of a team (member lists, counts, notifications)
+            models.Index(fields=['team', 'is_active'], name='teammember_team_active_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.team.name}"
@@ -216,6 +229,12 @@ class TeamInvitation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            # Pending, unexpired invitations for an email
+            models.Index(fields=['email', 'status', 'expires_at'], name='invite_email_pending_idx'),
+        ]
+
     def __str__(self):
         return f"{self.email} - {self.team.name}"
 
@@ -251,6 +270,10 @@ class Project(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # A team's project list, newest first
+            models.Index(fields=['team', '-created_at'], name='project_team_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.team.name}"
@@ -325,6 +348,12 @@ class Task(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Task lists filtered by status, and per-status counts
+            models.Index(fields=['project', 'status'], name='task_project_status_idx'),
+            # A user's tasks by due date (dashboard due tasks)
+            models.Index(fields=['assignee', 'due_date'], name='task_assignee_due_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.project.name}"
@@ -396,6 +425,10 @@ class ProjectSheet(models.Model):
         TABLE = 3, 'Data Table'
         FORM = 4, 'Form'
 
+    class Storage(models.IntegerChoices):
+        CELLS = 1, 'Cells'  # one Cell row per cell
+        PACKED = 2, 'Packed'  # cell values packed into SheetRow.data
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     project = models.ForeignKey('Project', on_delete=models.CASCADE, related_name='sheets')
     name = models.CharField(max_length=255)
@@ -406,6 +439,7 @@ class ProjectSheet(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_public = models.BooleanField(default=False)
     settings = models.JSONField(default=dict, blank=True)  # For custom settings
+    storage = models.IntegerField(choices=Storage.choices, default=Storage.CELLS)
 
     class Meta:
         ordering = ['-created_at']
@@ -430,7 +464,7 @@ class SheetColumn(models.Model):
     key = models.CharField(max_length=50)  # Unique identifier for the column
     column_type = models.IntegerField(choices=ColumnType.choices, default=ColumnType.TEXT)
     width = models.IntegerField(default=150)
-    order = models.IntegerField(default=0)
+    order = models.BigIntegerField(default=0)
     is_required = models.BooleanField(default=False)
     options = models.JSONField(default=list, blank=True)  # For dropdown options
     formula = models.TextField(blank=True, null=True)  # For formula columns
@@ -446,13 +480,22 @@ class SheetColumn(models.Model):
 class SheetRow(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     sheet = models.ForeignKey('ProjectSheet', on_delete=models.CASCADE, related_name='rows')
-    order = models.IntegerField(default=0)
+    order = models.BigIntegerField(default=0)
+    # Packed storage only: {column id: value}, {column id: raw_value} and
+    # {column id: version} for cells that have been written
+    data = models.JSONField(default=dict, blank=True)
+    raw_data = models.JSONField(default=dict, blank=True)
+    versions = models.JSONField(default=dict, blank=True)
     created_by = models.ForeignKey('User', on_delete=models.CASCADE, related_name='created_rows')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            # Row windows: keyset over (order, created_at, id) within a sheet
+            models.Index(fields=['sheet', 'order', 'created_at', 'id'], name='sheetrow_window_idx'),
+        ]
 
 class Cell(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -460,6 +503,8 @@ class Cell(models.Model):
     column = models.ForeignKey('SheetColumn', on_delete=models.CASCADE, related_name='cells')
     value = models.TextField(blank=True, null=True)
     raw_value = models.JSONField(blank=True, null=True)  # For structured data
+    # Bumped on every write; editors send the version they saw to detect conflicts
+    version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     updated_by = models.ForeignKey('User', on_delete=models.CASCADE, related_name='updated_cells')
@@ -521,6 +566,12 @@ class TeamJoinRequest(models.Model):
     processed_by = models.ForeignKey('User', on_delete=models.SET_NULL, null=True, blank=True, related_name='processed_join_requests')
     processed_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Pending requests of a team
+            models.Index(fields=['team', 'status'], name='joinrequest_team_status_idx'),
+        ]
+
     def __str__(self):
         return f"{self.email} - {self.team.name}"
     
@@ -602,6 +653,11 @@ class ActivityLog(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Team and project activity feeds, newest first
+            models.Index(fields=['team', '-created_at'], name='activity_team_created_idx'),
+            models.Index(fields=['project', '-created_at'], name='activity_project_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.get_action_type_display()} - {self.created_at}"
@@ -675,4 +731,75 @@ class ProjectPermission(models.Model):
             self.can_transfer_project = True
             self.can_delete_project = True
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+class EmailOutbox(models.Model):
+    class Status(models.IntegerChoices):
+        PENDING = 1, 'Pending'
+        SENDING = 2, 'Sending'
+        SENT = 3, 'Sent'
+        FAILED = 4, 'Failed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    template = models.CharField(max_length=50)
+    to_email = models.EmailField()
+    context = models.JSONField(default=dict, blank=True)
+    related_id = models.UUIDField(null=True, blank=True)  # e.g. the TeamInvitation
+    status = models.IntegerField(choices=Status.choices, default=Status.PENDING)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.template} -> {self.to_email} ({self.get_status_display()})"
+
+class TeamStats(models.Model):
+    """Materialized team counters, maintained by users.dashboard_stats"""
+    team = models.OneToOneField('Team', on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    member_count = models.IntegerField(default=0)  # active members
+    project_count = models.IntegerField(default=0)
+    active_project_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for team {self.team_id}"
+
+class UserDashboardStats(models.Model):
+    """
+    Materialized dashboard totals for a user across their active teams,
+    maintained by users.dashboard_stats. Stale rows are recomputed on read.
+    """
+    user = models.OneToOneField('User', on_delete=models.CASCADE, primary_key=True, related_name='dashboard_stats')
+    team_count = models.IntegerField(default=0)
+    project_count = models.IntegerField(default=0)
+    active_project_count = models.IntegerField(default=0)
+    completed_task_count = models.IntegerField(default=0)  # assigned to the user and done
+    member_count = models.IntegerField(default=0)  # distinct active members across the user's teams
+    is_stale = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dashboard stats for user {self.user_id}"
+
+class ProjectStats(models.Model):
+    """Materialized project counters, maintained by users.project_stats"""
+    project = models.OneToOneField('Project', on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    task_count = models.IntegerField(default=0)
+    backlog_task_count = models.IntegerField(default=0)
+    todo_task_count = models.IntegerField(default=0)
+    in_progress_task_count = models.IntegerField(default=0)
+    in_review_task_count = models.IntegerField(default=0)
+    done_task_count = models.IntegerField(default=0)
+    member_count = models.IntegerField(default=0)  # ProjectMember rows
+    assignee_count = models.IntegerField(default=0)  # ProjectAssignee rows
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for project {self.project_id}"
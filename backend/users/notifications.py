@@ -1,8 +1,45 @@
 # utils/notifications.py
+import json
+import logging
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
 from django.db.models import Q
 from datetime import datetime
 from .models import Notification, ActivityLog, TeamMember, User, ProjectMember
 
+logger = logging.getLogger(__name__)
+
+def _send_to_groups(messages):
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+    from .consumers import notification_group_name
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    for user_id, message in messages:
+        try:
+            async_to_sync(channel_layer.group_send)(notification_group_name(user_id), message)
+        except Exception as e:
+            logger.error(f"Failed to push notification to user {user_id}: {e}")
+
+def publish_notifications(notifications, event='notification.created'):
+    """Push notifications to their recipients' WebSocket connections after commit"""
+    from .serializers import NotificationSerializer
+
+    messages = []
+    for notification in notifications:
+        if event == 'notification.deleted':
+            message = {'type': event, 'notification_id': str(notification.id)}
+        else:
+            # Round-trip through JSON so UUIDs/datetimes survive any channel layer
+            data = json.loads(json.dumps(NotificationSerializer(notification).data, cls=DjangoJSONEncoder))
+            message = {'type': event, 'notification': data}
+        messages.append((notification.user_id, message))
+
+    if messages:
+        transaction.on_commit(lambda: _send_to_groups(messages))
+
 def create_activity_log(user, action_type, description, details=None, team=None, project=None):
     """Create an activity log entry"""
     activity = ActivityLog.objects.create(
@@ -36,8 +73,9 @@ def notify_team_members(team, title, message, related_id=None, action_url=None,
         )
         notifications.append(notification)
     
-    # Bulk create notifications
+    # Bulk create notifications (bulk_create skips signals, so push explicitly)
     Notification.objects.bulk_create(notifications)
+    publish_notifications(notifications)
     return notifications
 
 def notify_project_members(project, title, message, related_id=None, action_url=None, sender=None):
@@ -60,6 +98,7 @@ def notify_project_members(project, title, message, related_id=None, action_url=
         notifications.append(notification)
     
     Notification.objects.bulk_create(notifications)
+    publish_notifications(notifications)
     return notifications
 
 def create_project_transfer_notifications(source_team, target_team, project, transferrer):
@@ -0,0 +1,116 @@
+# users/permission_cache.py
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# Key prefixes
+USER_VERSION_KEY = 'perm:v:user:{}'
+PROJECT_VERSION_KEY = 'perm:v:project:{}'
+PERMISSION_KEY = 'perm:{user_id}:{project_id}:{user_version}:{project_version}'
+
+# Marker stored for users with no access, so denials are cached too
+NO_ACCESS = 0
+
+# Backends that keep entries inside one process. A version bump made by the
+# worker that handled a write never reaches the other workers, so grants are
+# not cached on these unless PERMISSION_CACHE_ALLOW_LOCAL says it is safe.
+LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def _get_cache():
+    return caches[getattr(settings, 'PERMISSION_CACHE_ALIAS', 'default')]
+
+
+def enabled():
+    """Whether permissions may be cached on the configured backend"""
+    if getattr(settings, 'PERMISSION_CACHE_ALLOW_LOCAL', False):
+        return True
+    alias = getattr(settings, 'PERMISSION_CACHE_ALIAS', 'default')
+    return settings.CACHES.get(alias, {}).get('BACKEND') not in LOCAL_BACKENDS
+
+
+def _timeout():
+    return getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 300)
+
+
+def _new_version():
+    # Random tokens instead of counters: if a version key is evicted, the
+    # replacement can never collide with entries written under the old one.
+    return uuid.uuid4().hex
+
+
+def _get_versions(cache, user_id, project_id):
+    user_key = USER_VERSION_KEY.format(user_id)
+    project_key = PROJECT_VERSION_KEY.format(project_id)
+    versions = cache.get_many([user_key, project_key])
+
+    for key in (user_key, project_key):
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+
+    return versions[user_key], versions[project_key]
+
+
+def _permission_key(cache, user_id, project_id):
+    user_version, project_version = _get_versions(cache, user_id, project_id)
+    return PERMISSION_KEY.format(
+        user_id=user_id,
+        project_id=project_id,
+        user_version=user_version,
+        project_version=project_version,
+    )
+
+
+def lookup(user_id, project_id):
+    """
+    Return (key, hit, level) for a user's effective permission level on a
+    project. level is None when the cached answer is "no access". The key
+    is resolved before any database read so that a computed level is always
+    stored under the versions that were current when the read started.
+    The key is None when the cache is disabled, and the lookup always misses.
+    """
+    if not enabled():
+        return None, False, None
+
+    cache = _get_cache()
+    key = _permission_key(cache, user_id, project_id)
+    value = cache.get(key)
+    if value is None:
+        return key, False, None
+    return key, True, (None if value == NO_ACCESS else value)
+
+
+def store(key, level):
+    if key is None:
+        return
+    _get_cache().set(key, NO_ACCESS if level is None else int(level), _timeout())
+
+
+def _bump(key):
+    cache = _get_cache()
+    cache.set(key, _new_version(), None)
+
+
+def _bump_now_and_on_commit(key):
+    if not enabled():
+        return
+    # Bump immediately so no request reuses the old grant while the write is
+    # in flight, and again after commit so anything cached from a pre-commit
+    # read is discarded as well.
+    _bump(key)
+    transaction.on_commit(lambda: _bump(key))
+
+
+def invalidate_user(user_id):
+    """Invalidate every cached project permission for a user"""
+    _bump_now_and_on_commit(USER_VERSION_KEY.format(user_id))
+
+
+def invalidate_project(project_id):
+    """Invalidate every cached permission on a project"""
+    _bump_now_and_on_commit(PROJECT_VERSION_KEY.format(project_id))
@@ -0,0 +1,273 @@
+# users/presence.py
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+logger = logging.getLogger(__name__)
+
+
+def _flush_interval():
+    return getattr(settings, 'PRESENCE_FLUSH_INTERVAL', 60)
+
+
+def _min_write_interval():
+    return getattr(settings, 'PRESENCE_MIN_WRITE_INTERVAL', 60)
+
+
+def _retention():
+    return getattr(settings, 'PRESENCE_RETENTION', 3600)
+
+
+def _to_datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+class LocalPresenceStore:
+    """
+    In-process presence store. Each worker flushes its own pending writes,
+    from requests and from a background timer (see start_flush_timer), so
+    the values are persisted even when the worker goes quiet.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_seen = {}     # user_id -> timestamp of latest request
+        self._last_written = {}  # user_id -> timestamp last persisted
+        self._dirty = set()
+        self._last_flush = time.time()
+
+    def record(self, user_id, timestamp):
+        with self._lock:
+            self._last_seen[user_id] = timestamp
+            if timestamp - self._last_written.get(user_id, 0) >= _min_write_interval():
+                self._dirty.add(user_id)
+
+    def get_many(self, user_ids):
+        with self._lock:
+            return {uid: self._last_seen[uid] for uid in user_ids if uid in self._last_seen}
+
+    def claim_flush(self, now, force=False):
+        """Return pending {user_id: timestamp} if a flush is due, else None"""
+        with self._lock:
+            if not force and now - self._last_flush < _flush_interval():
+                return None
+            self._last_flush = now
+            pending = {uid: self._last_seen[uid] for uid in self._dirty}
+            self._dirty.clear()
+            # Forget users idle for longer than the retention, writing their
+            # last value first if throttling held it back
+            cutoff = now - _retention()
+            for uid in [uid for uid, timestamp in self._last_seen.items() if timestamp < cutoff]:
+                timestamp = self._last_seen.pop(uid)
+                if timestamp > self._last_written.pop(uid, 0):
+                    pending[uid] = timestamp
+            for uid, timestamp in pending.items():
+                if uid in self._last_seen:
+                    self._last_written[uid] = timestamp
+            return pending
+
+
+class RedisPresenceStore:
+    """
+    Presence shared across workers; a lock makes one worker flush per
+    interval. Entries idle for longer than PRESENCE_RETENTION are dropped
+    after their last value is written, so the hashes stay bounded.
+    """
+
+    SEEN_KEY = 'presence:seen'
+    WRITTEN_KEY = 'presence:written'
+    DIRTY_KEY = 'presence:dirty'
+    FLUSHING_KEY = 'presence:flushing'
+    LOCK_KEY = 'presence:flush-lock'
+
+    # Drop a user's entries only if they were not seen again meanwhile.
+    # ARGV holds uid, seen value pairs.
+    PRUNE_SCRIPT = """
+    for i = 1, #ARGV, 2 do
+        if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+            redis.call('HDEL', KEYS[1], ARGV[i])
+            redis.call('HDEL', KEYS[2], ARGV[i])
+        end
+    end
+    """
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def record(self, user_id, timestamp):
+        uid = str(user_id)
+        pipe = self.client.pipeline()
+        pipe.hset(self.SEEN_KEY, uid, timestamp)
+        pipe.hget(self.WRITTEN_KEY, uid)
+        _, written = pipe.execute()
+        if timestamp - float(written or 0) >= _min_write_interval():
+            self.client.sadd(self.DIRTY_KEY, uid)
+
+    def get_many(self, user_ids):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        values = self.client.hmget(self.SEEN_KEY, [str(uid) for uid in user_ids])
+        return {uid: float(value) for uid, value in zip(user_ids, values) if value is not None}
+
+    def claim_flush(self, now, force=False):
+        if not force and not self.client.set(self.LOCK_KEY, 1, nx=True, ex=max(int(_flush_interval()), 1)):
+            return None
+        pending = {}
+        try:
+            self.client.rename(self.DIRTY_KEY, self.FLUSHING_KEY)
+        except Exception:
+            uids = []  # Nothing dirty
+        else:
+            uids = [uid.decode() for uid in self.client.smembers(self.FLUSHING_KEY)]
+            self.client.delete(self.FLUSHING_KEY)
+        if uids:
+            values = self.client.hmget(self.SEEN_KEY, uids)
+            pending = {uid: float(value) for uid, value in zip(uids, values) if value is not None}
+            if pending:
+                self.client.hset(self.WRITTEN_KEY, mapping=pending)
+        pending.update(self._prune(now - _retention()))
+        return pending
+
+    def _prune(self, cutoff):
+        """Drop entries last seen before cutoff; returns those never written"""
+        idle = {
+            uid.decode(): value for uid, value in self.client.hscan_iter(self.SEEN_KEY, count=1000)
+            if float(value) < cutoff
+        }
+        if not idle:
+            return {}
+        written = self.client.hmget(self.WRITTEN_KEY, list(idle))
+        unwritten = {
+            uid: float(value) for (uid, value), last in zip(idle.items(), written)
+            if float(value) > float(last or 0)
+        }
+        args = [item for pair in idle.items() for item in pair]
+        self.client.eval(self.PRUNE_SCRIPT, 2, self.SEEN_KEY, self.WRITTEN_KEY, *args)
+        return unwritten
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = getattr(settings, 'PRESENCE_BACKEND', 'local')
+                if backend == 'redis':
+                    _store = RedisPresenceStore(settings.REDIS_URL)
+                else:
+                    _store = LocalPresenceStore()
+        if _timer is None and isinstance(_store, LocalPresenceStore) and getattr(settings, 'PRESENCE_FLUSH_TIMER', True):
+            start_flush_timer()
+    return _store
+
+
+def record_activity(user_id, timestamp=None):
+    """Record that a user was active; persisted later by flush()"""
+    get_store().record(user_id, timestamp or time.time())
+
+
+def flush(force=False):
+    """
+    Persist pending last_active values in batched bulk updates.
+    Returns the number of users written.
+    """
+    pending = get_store().claim_flush(time.time(), force=force)
+    if not pending:
+        return 0
+
+    User = get_user_model()
+    users = [User(pk=uid, last_active=_to_datetime(timestamp)) for uid, timestamp in pending.items()]
+    try:
+        User.objects.bulk_update(users, ['last_active'], batch_size=getattr(settings, 'PRESENCE_FLUSH_BATCH_SIZE', 500))
+    except Exception as e:
+        logger.error(f"Failed to flush last_active for {len(users)} users: {e}")
+        return 0
+    return len(users)
+
+
+def last_active_map(user_ids):
+    """Return {user_id: datetime} of activity not yet persisted to the database"""
+    return {uid: _to_datetime(timestamp) for uid, timestamp in get_store().get_many(user_ids).items()}
+
+
+def apply_recent_activity(users):
+    """Overlay unflushed activity onto the last_active of the given users"""
+    recent = last_active_map([user.id for user in users])
+    for user in users:
+        pending = recent.get(user.id)
+        if pending and (not user.last_active or pending > user.last_active):
+            user.last_active = pending
+    return users
+
+
+def _flush_periodically(interval):
+    from django.db import connection
+    while True:
+        time.sleep(interval)
+        try:
+            flush(force=True)
+        except Exception:
+            logger.exception("Periodic last_active flush failed")
+        finally:
+            connection.close()
+
+
+_timer = None
+
+
+def start_flush_timer():
+    """
+    Flush this worker's local store on a timer, so pending values reach the
+    database even when no further requests arrive. Started on first use of
+    the local store; the Redis store is flushed by requests or by
+    `manage.py flush_presence`.
+    """
+    global _timer
+    with _store_lock:
+        if _timer is None:
+            _timer = threading.Thread(target=_flush_periodically, args=(_flush_interval(),), name='presence-flush', daemon=True)
+            _timer.start()
+            _register_exit_flush()
+
+
+_exit_flush_registered = False
+
+
+def _under_test_runner():
+    # Django's test runner installs mail.outbox for the duration of the run
+    from django.core import mail
+    return hasattr(mail, 'outbox')
+
+
+def _register_exit_flush():
+    """Flush what the timer has not written yet when the worker exits"""
+    global _exit_flush_registered
+    if not _exit_flush_registered and not _under_test_runner():
+        atexit.register(_flush_at_exit)
+        _exit_flush_registered = True
+
+
+def _user_table_exists():
+    from django.db import connection
+    try:
+        return get_user_model()._meta.db_table in connection.introspection.table_names()
+    except Exception:
+        return False
+
+
+def _flush_at_exit():
+    if isinstance(_store, LocalPresenceStore) and _user_table_exists():
+        try:
+            flush(force=True)
+        except Exception:
+            pass
@@ -0,0 +1,129 @@
+# users/project_stats.py
+from collections import Counter, defaultdict
+from django.db.models import Count, F
+from .models import Project, ProjectAssignee, ProjectMember, ProjectStats, Task
+
+# Per-project counters are materialized in ProjectStats so project lists do
+# not group over the task table. Write hooks (signals.py) apply F() deltas
+# in the same statement as the increment, so concurrent writers cannot lose
+# updates. Rows are created with the project, or on first read for projects
+# that predate them, and reconcile() recomputes everything from the source
+# tables to repair drift from writes that bypass signals (queryset.update(),
+# bulk_create()).
+
+RECONCILE_BATCH_SIZE = 1000
+
+STATUS_FIELDS = {
+    Task.Status.BACKLOG: 'backlog_task_count',
+    Task.Status.TODO: 'todo_task_count',
+    Task.Status.IN_PROGRESS: 'in_progress_task_count',
+    Task.Status.IN_REVIEW: 'in_review_task_count',
+    Task.Status.DONE: 'done_task_count',
+}
+FIELDS = ('task_count', *STATUS_FIELDS.values(), 'member_count', 'assignee_count')
+
+
+# Recomputing from the source tables
+
+def compute_project_stats(project_ids):
+    """{project_id: {field: value}} with three grouped queries"""
+    stats = {project_id: dict.fromkeys(FIELDS, 0) for project_id in project_ids}
+    tasks = Task.objects.filter(project_id__in=project_ids).values('project_id', 'status').annotate(count=Count('id'))
+    for row in tasks:
+        stats[row['project_id']]['task_count'] += row['count']
+        if row['status'] in STATUS_FIELDS:
+            stats[row['project_id']][STATUS_FIELDS[row['status']]] = row['count']
+    for model, field in ((ProjectMember, 'member_count'), (ProjectAssignee, 'assignee_count')):
+        rows = model.objects.filter(project_id__in=project_ids).values('project_id').annotate(count=Count('id'))
+        for row in rows:
+            stats[row['project_id']][field] = row['count']
+    return stats
+
+
+def refresh_projects(project_ids):
+    """Recompute and store the stats of these projects; returns {project_id: ProjectStats}"""
+    rows = [ProjectStats(project_id=project_id, **values) for project_id, values in compute_project_stats(list(project_ids)).items()]
+    ProjectStats.objects.bulk_create(
+        rows, batch_size=RECONCILE_BATCH_SIZE,
+        update_conflicts=True, unique_fields=['project'], update_fields=[*FIELDS, 'updated_at'],
+    )
+    return {row.project_id: row for row in rows}
+
+
+def reconcile():
+    """Recompute every project's stats. Returns the number of projects."""
+    ids = list(Project.objects.values_list('pk', flat=True))
+    for start in range(0, len(ids), RECONCILE_BATCH_SIZE):
+        refresh_projects(ids[start:start + RECONCILE_BATCH_SIZE])
+    return len(ids)
+
+
+# Reading
+
+def get_project_stats(project_ids):
+    """{project_id: ProjectStats}, creating missing rows"""
+    stats = {row.project_id: row for row in ProjectStats.objects.filter(project_id__in=project_ids)}
+    missing = [project_id for project_id in project_ids if project_id not in stats]
+    if missing:
+        stats.update(refresh_projects(missing))
+    return stats
+
+
+def with_counts(projects):
+    """
+    Set the count attributes ProjectSerializer looks for (active_task_count,
+    active_member_count, active_assignee_count) from the stored stats, with
+    one query for the whole list. Returns the projects as a list.
+    """
+    projects = list(projects)
+    stats = get_project_stats([project.id for project in projects])
+    for project in projects:
+        project.active_task_count = stats[project.id].task_count
+        project.active_member_count = stats[project.id].member_count
+        project.active_assignee_count = stats[project.id].assignee_count
+    return projects
+
+
+# Write hooks
+
+def _apply(project_id, deltas):
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if changes:
+        ProjectStats.objects.filter(project_id=project_id).update(**changes)
+
+
+def project_created(project_id):
+    ProjectStats.objects.get_or_create(project_id=project_id)
+
+
+def task_changed(old, new):
+    """
+    Apply a task write. old and new are (project_id, status) before and
+    after it, or None for a task that did not / no longer exists.
+    """
+    deltas = defaultdict(Counter)
+    for state, sign in ((old, -1), (new, 1)):
+        if state is not None:
+            project_id, task_status = state
+            deltas[project_id]['task_count'] += sign
+            if task_status in STATUS_FIELDS:
+                deltas[project_id][STATUS_FIELDS[task_status]] += sign
+    for project_id, changes in deltas.items():
+        _apply(project_id, changes)
+
+
+def add_tasks(project_id, statuses):
+    """Apply {status: count} of newly inserted tasks, e.g. after a bulk insert"""
+    changes = Counter(task_count=sum(statuses.values()))
+    for task_status, count in statuses.items():
+        if task_status in STATUS_FIELDS:
+            changes[STATUS_FIELDS[task_status]] += count
+    _apply(project_id, changes)
+
+
+def members_changed(project_id, delta):
+    _apply(project_id, {'member_count': delta})
+
+
+def assignees_changed(project_id, delta):
+    _apply(project_id, {'assignee_count': delta})
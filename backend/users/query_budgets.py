@@ -0,0 +1,31 @@
+# users/query_budgets.py
+
+# Most queries each endpoint may issue for the seeded tenant's owner, checked
+# by `manage.py check_query_budgets`. Paths are filled in with Tenant.urls().
+# Budgets must hold for any data size: the command also fails an endpoint
+# whose count grows when the tenant is seeded larger (an N+1).
+
+QUERY_BUDGETS = (
+    ('dashboard stats', '/api/auth/dashboard/stats/', 9),
+    ('profile', '/api/auth/profile/', 0),
+    ('teams', '/api/auth/teams/', 4),
+    ('teams (paginated)', '/api/auth/teams/?page=1', 5),
+    ('team detail', '/api/auth/teams/{team}/', 4),
+    ('team members', '/api/auth/teams/{team}/members/', 3),
+    ('team members (paginated)', '/api/auth/teams/{team}/members/optimized/', 4),
+    ('projects', '/api/auth/teams/{team}/projects/', 7),
+    ('project detail', '/api/auth/teams/{team}/projects/{project}/', 7),
+    ('project members', '/api/auth/teams/{team}/projects/{project}/members/', 4),
+    ('tasks', '/api/auth/teams/{team}/projects/{project}/tasks/', 4),
+    ('task detail', '/api/auth/teams/{team}/projects/{project}/tasks/{task}/', 8),
+    ('subtasks', '/api/auth/teams/{team}/projects/{project}/tasks/{task}/subtasks/', 5),
+    ('task comments', '/api/auth/teams/{team}/projects/{project}/tasks/{task}/comments/', 5),
+    ('sheets', '/api/auth/teams/{team}/projects/{project}/sheets/', 4),
+    ('sheet detail', '/api/auth/teams/{team}/projects/{project}/sheets/{sheet}/', 7),
+    ('sheet aggregates', '/api/auth/teams/{team}/projects/{project}/sheets/{sheet}/aggregates/', 7),
+    ('notifications', '/api/auth/notifications/', 1),
+    ('unread notifications', '/api/auth/notifications/unread-count/', 1),
+    ('team activity', '/api/auth/teams/{team}/activity/', 3),
+    ('project activity', '/api/auth/teams/{team}/projects/{project}/activity/', 4),
+    ('recent activity', '/api/auth/teams/{team}/activity/recent/', 3),
+)
@@ -0,0 +1,78 @@
+# users/query_plans.py
+import re
+from datetime import timedelta
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import (
+    ActivityLog, Notification, Project, ProjectStats, Subtask, Task, TaskComment,
+    Team, TeamInvitation, TeamJoinRequest, TeamMember,
+)
+
+# The hot querysets of views.py, notifications.py and serializers.py, as
+# functions of a seeded Tenant. `manage.py check_query_plans` EXPLAINs each
+# one and fails if the plan reads a whole table. Keep these in step with the
+# views when their filters or orderings change.
+HOT_QUERIES = (
+    ('user teams', lambda t: Team.objects.filter(members__user=t.user, members__is_active=True)),
+    ('team members', lambda t: TeamMember.objects.filter(team=t.teams[0], is_active=True).select_related('user')),
+    ('notification feed', lambda t: Notification.objects.filter(user=t.user).order_by('-created_at', '-id')[:20]),
+    ('unread notifications', lambda t: Notification.objects.filter(user=t.user, status=Notification.Status.UNREAD)),
+    ('team projects', lambda t: Project.objects.filter(team=t.teams[0]).order_by('-created_at')),
+    ('project stats', lambda t: ProjectStats.objects.filter(project_id__in=[project.id for project in t.projects[:5]])),
+    ('project tasks', lambda t: Task.objects.filter(project=t.projects[0])),
+    ('project tasks by status', lambda t: Task.objects.filter(project=t.projects[0], status=Task.Status.TODO)),
+    ('due tasks', lambda t: Task.objects.filter(
+        assignee=t.user, due_date__lte=timezone.now() + timedelta(days=1), status__lt=Task.Status.DONE,
+    ).order_by('due_date')),
+    ('subtasks', lambda t: Subtask.objects.filter(task=t.tasks[0])),
+    ('task comments', lambda t: TaskComment.objects.filter(task=t.tasks[0])),
+    ('team activity', lambda t: ActivityLog.objects.filter(
+        team=t.teams[0], created_at__gte=timezone.now() - timedelta(days=30),
+    ).order_by('-created_at')),
+    ('project activity', lambda t: ActivityLog.objects.filter(
+        project=t.projects[0], created_at__gte=timezone.now() - timedelta(days=30),
+    ).order_by('-created_at')),
+    ('pending invitations', lambda t: TeamInvitation.objects.filter(
+        email=t.user.email, status=TeamInvitation.Status.PENDING, expires_at__gt=timezone.now(),
+    )),
+    ('pending join requests', lambda t: TeamJoinRequest.objects.filter(team=t.teams[0], status=TeamJoinRequest.Status.PENDING)),
+)
+
+# A table read in full: PostgreSQL's "Seq Scan on <table>", SQLite's
+# "SCAN <table>" without an index
+SEQUENTIAL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)\s*$', re.MULTILINE),
+}
+
+
+def analyze():
+    """
+    Refresh PostgreSQL's planner statistics after seeding. SQLite is left
+    without statistics: it then assumes every table is large, so its plans
+    show whether an index applies rather than what suits a tiny table.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+def explain(queryset):
+    """
+    The query's plan. On PostgreSQL sequential scans are disabled for the
+    query, so the planner only falls back to one when no index applies; on a
+    small seeded database it would otherwise prefer them anyway.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+
+def sequential_scans(plan):
+    """Tables the plan reads in full"""
+    pattern = SEQUENTIAL_SCAN.get(connection.vendor)
+    if pattern is None:
+        raise NotImplementedError(f'Plans cannot be checked on {connection.vendor}')
+    return sorted(set(pattern.findall(plan)))
@@ -0,0 +1,8 @@
+# users/routing.py
+from django.urls import path
+from . import consumers
+
+websocket_urlpatterns = [
+    path('ws/notifications/', consumers.NotificationConsumer.as_asgi()),
+    path('ws/sheets/<uuid:sheet_id>/', consumers.SheetConsumer.as_asgi()),
+]
@@ -0,0 +1,233 @@
+# users/seeding.py
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from .models import (
+    User, Team, TeamMember, TeamInvitation, Project, ProjectMember, Task, Subtask, TaskComment,
+    Notification, ProjectSheet, SheetColumn, SheetRow, Cell, ActivityLog,
+)
+from .sheet_storage import get_storage
+from . import dashboard_stats, project_stats, sheets
+
+# Synthetic tenants for query budgets and benchmarks. Everything is
+# bulk-inserted, so seeding bypasses model signals and save() hooks; the
+# stats tables are filled in directly at the end.
+SEED_PASSWORD = 'seeded-password'
+
+DEFAULT_SIZES = {
+    'users': 20,
+    'teams': 2,
+    'projects': 3,  # per team
+    'tasks': 50,  # per project
+    'subtasks': 2,  # per task
+    'comments': 2,  # per task
+    'sheets': 1,  # per project
+    'rows': 100,  # per sheet
+    'columns': 5,  # per sheet
+    'notifications': 20,  # per user
+    'activities': 50,  # per team
+    'invitations': 10,  # per team
+}
+
+
+class Tenant:
+    """What seed_tenant created. `user` owns every team and is in every project."""
+
+    def __init__(self, user, users, teams, projects, tasks, sheets):
+        self.user = user
+        self.users = users
+        self.teams = teams
+        self.projects = projects
+        self.tasks = tasks
+        self.sheets = sheets
+
+    def urls(self):
+        """Ids to fill endpoint URL templates with: the first of each kind"""
+        return {
+            'team': self.teams[0].id,
+            'project': self.projects[0].id,
+            'task': self.tasks[0].id,
+            'sheet': self.sheets[0].id if self.sheets else None,
+        }
+
+
+def scaled_sizes(scale=1, **sizes):
+    """DEFAULT_SIZES (overridden by sizes) with every count multiplied by scale"""
+    merged = {**DEFAULT_SIZES, **{key: value for key, value in sizes.items() if value is not None}}
+    return {key: max(int(value * scale), 1 if key in ('users', 'teams', 'projects') else 0) for key, value in merged.items()}
+
+
+def _seed_sheet(project, owner, columns, rows, rng):
+    sheet = ProjectSheet.objects.create(project=project, name='Seeded sheet', created_by=owner)
+    column_types = (SheetColumn.ColumnType.TEXT, SheetColumn.ColumnType.NUMBER, SheetColumn.ColumnType.SELECT)
+    sheet_columns = SheetColumn.objects.bulk_create([
+        SheetColumn(
+            sheet=sheet,
+            name=f'Column {index + 1}',
+            key=f'col_{index + 1}',
+            column_type=column_types[index % len(column_types)],
+            options=['Low', 'Medium', 'High'] if column_types[index % len(column_types)] == SheetColumn.ColumnType.SELECT else [],
+            order=(index + 1) * sheets.ORDER_GAP,
+        )
+        for index in range(columns)
+    ])
+    sheet_rows = [
+        SheetRow(id=uuid.uuid4(), sheet=sheet, created_by=owner, order=(index + 1) * sheets.ORDER_GAP)
+        for index in range(rows)
+    ]
+    cells = []
+    for row in sheet_rows:
+        for column in sheet_columns:
+            if column.column_type == SheetColumn.ColumnType.NUMBER:
+                number = rng.randint(0, 10000)
+                value, raw_value = str(number), number
+            elif column.column_type == SheetColumn.ColumnType.SELECT:
+                value, raw_value = rng.choice(column.options), None
+            else:
+                value, raw_value = f'Value {rng.randint(0, 999)}', None
+            cells.append(Cell(row_id=row.id, column_id=column.id, value=value, raw_value=raw_value, version=1, updated_by=owner))
+    get_storage(sheet).insert(sheet, sheet_rows, cells)
+    return sheet
+
+
+def seed_tenant(seed=0, **sizes):
+    """
+    Create a synthetic tenant sized by DEFAULT_SIZES (override any count as a
+    keyword). Emails are unique per call, so tenants can be seeded side by
+    side. Returns a Tenant.
+    """
+    sizes = {**DEFAULT_SIZES, **sizes}
+    rng = random.Random(seed)
+    tag = uuid.uuid4().hex[:8]
+    now = timezone.now()
+    password = make_password(SEED_PASSWORD)
+
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(
+                email=f'{tag}-user{index}@example.com',
+                username=f'{tag}-user{index}',
+                first_name='Seeded',
+                last_name=f'User {index}',
+                password=password,
+            )
+            for index in range(sizes['users'])
+        ])
+        owner = users[0]
+
+        teams = Team.objects.bulk_create([
+            Team(name=f'Team {index + 1} ({tag})', created_by=owner) for index in range(sizes['teams'])
+        ])
+        TeamMember.objects.bulk_create([
+            TeamMember(team=team, user=user, role=TeamMember.Role.OWNER if user is owner else TeamMember.Role.MEMBER)
+            for team in teams for user in users
+        ])
+
+        projects = Project.objects.bulk_create([
+            Project(
+                team=team,
+                name=f'Project {index + 1}',
+                start_date=now - timedelta(days=30),
+                end_date=now + timedelta(days=60),
+                status=Project.Status.ACTIVE,
+                created_by=owner,
+            )
+            for team in teams for index in range(sizes['projects'])
+        ])
+        ProjectMember.objects.bulk_create([
+            ProjectMember(project=project, user=user, role=ProjectMember.Role.MANAGER if user is owner else ProjectMember.Role.CONTRIBUTOR)
+            for project in projects for user in users
+        ])
+
+        tasks = []
+        for project in projects:
+            for index in range(sizes['tasks']):
+                task_status = rng.choice(Task.Status.values)
+                tasks.append(Task(
+                    project=project,
+                    title=f'Task {index + 1}',
+                    description='Seeded task',
+                    status=task_status,
+                    priority=rng.choice(Task.Priority.values),
+                    assignee=rng.choice(users),
+                    created_by=owner,
+                    due_date=now + timedelta(days=rng.randint(-10, 30)),
+                    completed_at=now if task_status == Task.Status.DONE else None,
+                ))
+        tasks = Task.objects.bulk_create(tasks, batch_size=1000)
+        Subtask.objects.bulk_create([
+            Subtask(task=task, title=f'Subtask {index + 1}', created_by=owner, assignee=rng.choice(users))
+            for task in tasks for index in range(sizes['subtasks'])
+        ], batch_size=1000)
+        TaskComment.objects.bulk_create([
+            TaskComment(task=task, user=rng.choice(users), content='Seeded comment')
+            for task in tasks for _ in range(sizes['comments'])
+        ], batch_size=1000)
+
+        project_sheets = [
+            _seed_sheet(project, owner, sizes['columns'], sizes['rows'], rng)
+            for project in projects for _ in range(sizes['sheets'])
+        ]
+
+        Notification.objects.bulk_create([
+            Notification(
+                user=user,
+                type=Notification.Type.TASK_ASSIGNED,
+                status=rng.choice(Notification.Status.values),
+                title='Task assigned',
+                message='You were assigned a seeded task',
+                related_id=rng.choice(tasks).id if tasks else None,
+            )
+            for user in users for _ in range(sizes['notifications'])
+        ], batch_size=1000)
+
+        team_projects = {team.id: [project for project in projects if project.team_id == team.id] for team in teams}
+        ActivityLog.objects.bulk_create([
+            ActivityLog(
+                user=rng.choice(users),
+                team=team,
+                project=rng.choice(team_projects[team.id]) if team_projects[team.id] else None,
+                action_type=rng.choice(ActivityLog.ActionType.values),
+                description='Seeded activity',
+            )
+            for team in teams for _ in range(sizes['activities'])
+        ], batch_size=1000)
+        TeamInvitation.objects.bulk_create([
+            TeamInvitation(
+                email=f'{tag}-invitee{team_index}-{index}@example.com',
+                team=team,
+                invited_by=owner,
+                token=uuid.uuid4().hex,
+                status=rng.choice(TeamInvitation.Status.values),
+                expires_at=now + timedelta(days=rng.randint(-7, 7)),
+            )
+            for team_index, team in enumerate(teams) for index in range(sizes['invitations'])
+        ], batch_size=1000)
+
+        # Bulk inserts skip the signals that maintain the stats tables
+        project_stats.refresh_projects([project.id for project in projects])
+        dashboard_stats.refresh_teams([team.id for team in teams])
+        dashboard_stats.refresh_users([user.id for user in users])
+
+    return Tenant(owner, users, teams, projects, tasks, project_sheets)
+
+
+@contextmanager
+def throwaway_database():
+    """
+    Point the default connection at a fresh test database, created the way
+    the test runner does it, and destroy it afterwards. Seeded tenants never
+    touch the configured database.
+    """
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -118,6 +118,38 @@ class TeamSerializer(serializers.ModelSerializer):
         validated_data['created_by'] = user
         return super().create(validated_data)
 
+class TeamMemberPreviewSerializer(serializers.ModelSerializer):
+    """A member's avatar and name, for the capped preview in team lists"""
+    user = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = TeamMember
+        fields = ('id', 'user', 'role')
+    
+    def get_user(self, obj):
+        return {
+            'id': str(obj.user.id),
+            'first_name': obj.user.first_name,
+            'last_name': obj.user.last_name,
+            'avatar': obj.user.avatar.url if obj.user.avatar else None,
+        }
+
+class TeamListSerializer(serializers.ModelSerializer):
+    """
+    Lean team representation for team lists: no nested member list, only a
+    capped preview (expects `preview_members` prefetched and `created_by`
+    selected). Counts are added by users.team_cache from TeamStats.
+    """
+    created_by_name = serializers.SerializerMethodField()
+    member_preview = TeamMemberPreviewSerializer(source='preview_members', many=True, read_only=True)
+    
+    class Meta:
+        model = Team
+        fields = ('id', 'name', 'description', 'logo', 'created_by', 'created_by_name', 'member_preview', 'created_at', 'updated_at')
+    
+    def get_created_by_name(self, obj):
+        return f"{obj.created_by.first_name} {obj.created_by.last_name}"
+
 # Invitation serializers
 class TeamInvitationSerializer(serializers.ModelSerializer):
     team_name = serializers.CharField(source='team.name', read_only=True)
@@ -134,6 +166,17 @@ class InvitationCreateSerializer(serializers.Serializer):
     email = serializers.EmailField()
     role = serializers.ChoiceField(choices=TeamMember.Role.choices, default=TeamMember.Role.MEMBER)
 
+class BulkInvitationSerializer(serializers.Serializer):
+    # Emails are validated one by one so a bad address skips only itself
+    emails = serializers.ListField(child=serializers.CharField(), required=False, allow_empty=False, max_length=1000)
+    file = serializers.FileField(required=False)
+    role = serializers.ChoiceField(choices=TeamMember.Role.choices, default=TeamMember.Role.MEMBER)
+
+    def validate(self, data):
+        if not data.get('emails') and not data.get('file'):
+            raise serializers.ValidationError("Provide a list of emails or a CSV file")
+        return data
+
 # Notification serializers
 class NotificationSerializer(serializers.ModelSerializer):
     time_ago = serializers.SerializerMethodField()
@@ -414,6 +457,9 @@ class TaskSerializer(serializers.ModelSerializer):
         read_only_fields = ('created_by', 'created_by_details', 'subtask_count', 'completed_at')
     
     def get_subtask_count(self, obj):
+        # Annotated by list views
+        if hasattr(obj, 'active_subtask_count'):
+            return obj.active_subtask_count
         return obj.subtasks.count()
     
     def create(self, validated_data):
@@ -494,6 +540,7 @@ class SheetColumnSerializer(serializers.ModelSerializer):
         model = SheetColumn
         fields = ('id', 'sheet', 'name', 'key', 'column_type', 'width', 'order', 
                  'is_required', 'options', 'formula', 'settings')
+        read_only_fields = ('sheet',)
 
 class CellSerializer(serializers.ModelSerializer):
     column_key = serializers.CharField(source='column.key', read_only=True)
@@ -501,7 +548,7 @@ class CellSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Cell
-        fields = ('id', 'row', 'column', 'column_key', 'value', 'raw_value', 
+        fields = ('id', 'row', 'column', 'column_key', 'value', 'raw_value', 'version',
                  'updated_by', 'updated_by_name', 'updated_at')
 
     def get_updated_by_name(self, obj):
@@ -537,6 +584,20 @@ class ProjectSheetSerializer(serializers.ModelSerializer):
     def get_row_count(self, obj):
         return obj.rows.count()
 
+class ProjectSheetListSerializer(serializers.ModelSerializer):
+    """Sheet metadata without rows; row_count comes from an annotation"""
+    created_by_name = serializers.SerializerMethodField()
+    row_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = ProjectSheet
+        fields = ('id', 'project', 'name', 'description', 'sheet_type', 
+                 'created_by', 'created_by_name', 'is_public', 'settings', 'storage',
+                 'row_count', 'created_at', 'updated_at')
+
+    def get_created_by_name(self, obj):
+        return f"{obj.created_by.first_name} {obj.created_by.last_name}"
+
 class SheetViewSerializer(serializers.ModelSerializer):
     created_by_name = serializers.SerializerMethodField()
 
@@ -544,6 +605,7 @@ class SheetViewSerializer(serializers.ModelSerializer):
         model = SheetView
         fields = ('id', 'sheet', 'name', 'view_type', 'filters', 'sort_by',
                  'group_by', 'created_by', 'created_by_name', 'is_shared', 'settings')
+        read_only_fields = ('sheet', 'created_by')
 
     def get_created_by_name(self, obj):
         return f"{obj.created_by.first_name} {obj.created_by.last_name}"
@@ -556,6 +618,7 @@ class SheetCommentSerializer(serializers.ModelSerializer):
         model = SheetComment
         fields = ('id', 'sheet', 'cell', 'user', 'user_name', 'user_avatar',
                  'content', 'resolved', 'created_at', 'updated_at')
+        read_only_fields = ('sheet', 'user')
 
     def get_user_name(self, obj):
         return f"{obj.user.first_name} {obj.user.last_name}"
@@ -566,7 +629,8 @@ class SheetCommentSerializer(serializers.ModelSerializer):
 class ProjectSheetCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProjectSheet
-        fields = ('name', 'description', 'sheet_type', 'project', 'is_public', 'settings')
+        fields = ('name', 'description', 'sheet_type', 'project', 'is_public', 'settings', 'storage')
+        read_only_fields = ('project',)
 
     def create(self, validated_data):
         validated_data['created_by'] = self.context['request'].user
@@ -581,6 +645,9 @@ class BulkCellUpdateSerializer(serializers.Serializer):
         for update in value:
             if 'row_id' not in update or 'column_key' not in update or 'value' not in update:
                 raise serializers.ValidationError("Each update must contain row_id, column_key, and value")
+            version = update.get('version')
+            if version is not None and (not isinstance(version, int) or isinstance(version, bool) or version < 0):
+                raise serializers.ValidationError("version must be a non-negative integer")
         return value
 
 # Team join request serializers
@@ -0,0 +1,171 @@
+# users/sheet_aggregates.py
+import math
+from array import array
+from collections import Counter
+from datetime import date
+from .models import SheetColumn, SheetRow
+from . import sheet_cache
+from .sheet_storage import get_storage
+
+try:
+    import numpy
+except ImportError:  # numpy is optional; array('d') + sorted() is the fallback
+    numpy = None
+
+AGGREGATE_KEY = 'sheet:agg:{sheet_id}:{column_id}:{version}'
+PERCENTILES = (25, 50, 75, 90)
+TOP_VALUES = 50
+
+NUMERIC_TYPES = (SheetColumn.ColumnType.NUMBER, SheetColumn.ColumnType.FORMULA)
+CATEGORY_TYPES = (
+    SheetColumn.ColumnType.SELECT,
+    SheetColumn.ColumnType.STATUS,
+    SheetColumn.ColumnType.USER,
+    SheetColumn.ColumnType.CHECKBOX,
+)
+
+
+def _as_number(value, raw_value):
+    if isinstance(raw_value, (int, float)) and not isinstance(raw_value, bool):
+        return float(raw_value)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _percentiles(values):
+    """Linear-interpolated percentiles (numpy's default method)"""
+    if not len(values):
+        return {f'p{p}': None for p in PERCENTILES}
+    if numpy is not None:
+        results = numpy.percentile(numpy.frombuffer(values, dtype=numpy.float64), PERCENTILES)
+        return {f'p{p}': float(result) for p, result in zip(PERCENTILES, results)}
+
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    results = {}
+    for p in PERCENTILES:
+        position = last * p / 100
+        lower = math.floor(position)
+        upper = min(lower + 1, last)
+        results[f'p{p}'] = ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+    return results
+
+
+def _numeric_summary(numbers):
+    """numbers: array('d') of every numeric value in the column"""
+    count = len(numbers)
+    if not count:
+        return {'sum': 0, 'avg': None, 'min': None, 'max': None, **_percentiles(numbers)}
+    if numpy is not None:
+        data = numpy.frombuffer(numbers, dtype=numpy.float64)
+        total, low, high = float(data.sum()), float(data.min()), float(data.max())
+    else:
+        total, low, high = math.fsum(numbers), min(numbers), max(numbers)
+    return {
+        'sum': total,
+        'avg': total / count,
+        'min': low,
+        'max': high,
+        **_percentiles(numbers),
+    }
+
+
+def summarize_column(column, cells, row_count):
+    """
+    Summarize one column from (value, raw_value) pairs in a single pass.
+    Numbers and dates are packed into typed arrays before reducing.
+    """
+    filled = 0
+    distinct = set()
+    counts = Counter()
+    numbers = array('d')
+    dates = array('l')
+    non_numeric = 0
+
+    is_numeric = column.column_type in NUMERIC_TYPES
+    is_date = column.column_type == SheetColumn.ColumnType.DATE
+    is_category = column.column_type in CATEGORY_TYPES
+
+    for value, raw_value in cells:
+        if value is None or value == '':
+            continue
+        filled += 1
+        distinct.add(value)
+        if is_numeric:
+            number = _as_number(value, raw_value)
+            if number is None:
+                non_numeric += 1
+            else:
+                numbers.append(number)
+        elif is_date:
+            try:
+                dates.append(date.fromisoformat(value[:10]).toordinal())
+            except ValueError:
+                pass
+        elif is_category:
+            counts[value] += 1
+
+    summary = {
+        'column_type': column.column_type,
+        'count': filled,
+        'blank': max(row_count - filled, 0),
+        'distinct': len(distinct),
+    }
+    if is_numeric:
+        summary.update(_numeric_summary(numbers))
+        summary['non_numeric'] = non_numeric
+    elif is_date:
+        summary['min'] = date.fromordinal(min(dates)).isoformat() if dates else None
+        summary['max'] = date.fromordinal(max(dates)).isoformat() if dates else None
+    elif is_category:
+        summary['counts'] = dict(counts.most_common(TOP_VALUES))
+    return summary
+
+
+def column_aggregates(sheet, keys=None):
+    """
+    Return {column_key: summary} for the requested columns (all by default).
+    Summaries are cached per (sheet, column, data version); columns that
+    miss the cache are computed together from a single cell query.
+    """
+    columns = SheetColumn.objects.filter(sheet=sheet)
+    if keys:
+        columns = columns.filter(key__in=keys)
+    columns = list(columns)
+    if not columns:
+        return {}
+
+    cache = sheet_cache.get_cache()
+    version = sheet_cache.data_version(sheet.id)
+    cache_keys = {
+        column.id: AGGREGATE_KEY.format(sheet_id=sheet.id, column_id=column.id, version=version)
+        for column in columns
+    }
+    cached = cache.get_many(list(cache_keys.values()))
+
+    results = {}
+    missing = []
+    for column in columns:
+        summary = cached.get(cache_keys[column.id])
+        if summary is None:
+            missing.append(column)
+        else:
+            results[column.key] = summary
+
+    if missing:
+        row_count = SheetRow.objects.filter(sheet=sheet).count()
+        cells_by_column = {column.id: [] for column in missing}
+        for _, column_id, _, value, raw_value, _ in get_storage(sheet).read(sheet, column_ids=cells_by_column.keys()):
+            cells_by_column[column_id].append((value, raw_value))
+
+        computed = {}
+        for column in missing:
+            summary = summarize_column(column, cells_by_column.pop(column.id), row_count)
+            results[column.key] = summary
+            computed[cache_keys[column.id]] = summary
+        cache.set_many(computed, sheet_cache.timeout())
+
+    return results
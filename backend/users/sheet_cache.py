@@ -0,0 +1,38 @@
+# users/sheet_cache.py
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# Every write to a sheet's rows, columns or cells replaces its data version,
+# so anything cached under the old version (aggregates, view results) is
+# simply never read again.
+DATA_VERSION_KEY = 'sheet:v:{}'
+
+
+def get_cache():
+    return caches[getattr(settings, 'SHEET_CACHE_ALIAS', 'default')]
+
+
+def timeout():
+    return getattr(settings, 'SHEET_CACHE_TIMEOUT', 600)
+
+
+def data_version(sheet_id):
+    cache = get_cache()
+    key = DATA_VERSION_KEY.format(sheet_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(sheet_id):
+    get_cache().set(DATA_VERSION_KEY.format(sheet_id), uuid.uuid4().hex, None)
+
+
+def bump_data_version(sheet_id):
+    """Invalidate cached results for a sheet, now and again after commit"""
+    _bump(sheet_id)
+    transaction.on_commit(lambda: _bump(sheet_id))
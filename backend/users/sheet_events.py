@@ -0,0 +1,43 @@
+# users/sheet_events.py
+import json
+import logging
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def _send_to_sheet(sheet_id, message):
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+    from .consumers import sheet_group_name
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(sheet_group_name(sheet_id), message)
+    except Exception as e:
+        logger.error(f"Failed to push sheet event to sheet {sheet_id}: {e}")
+
+
+def publish_sheet_event(sheet_id, event, payload, user=None, origin=None):
+    """
+    Push an event to everyone viewing a sheet after commit. origin is the
+    channel name of the WebSocket session that caused it, which skips it.
+    """
+    # Round-trip through JSON so UUIDs/datetimes survive any channel layer
+    message = json.loads(json.dumps({
+        'type': 'sheet.event',
+        'event': event,
+        'payload': payload,
+        'user_id': user.id if user else None,
+        'origin': origin,
+    }, cls=DjangoJSONEncoder))
+    transaction.on_commit(lambda: _send_to_sheet(sheet_id, message))
+
+
+def publish_cells(sheet_id, cells, user=None, origin=None):
+    """Broadcast changed cells (as returned by sheets.apply_cell_updates)"""
+    if cells:
+        publish_sheet_event(sheet_id, 'cells.updated', {'cells': cells}, user, origin)
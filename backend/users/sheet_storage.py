@@ -0,0 +1,212 @@
+# users/sheet_storage.py
+import uuid
+from django.db import transaction
+from django.db.models import CharField
+from django.db.models.functions import Cast
+from django.utils import timezone
+from .models import Cell, ProjectSheet, SheetColumn, SheetComment, SheetRow
+
+# Sheets store their cells in one of two ways:
+#   CELLS  - one Cell row per cell (the default; supports cell ids, per-cell
+#            updated_by and cell comments)
+#   PACKED - each SheetRow holds its values in `data` ({column id: value}),
+#            with `raw_data` only for cells that have structured values
+# The sheet code reads and writes cells only through get_storage(sheet).
+
+
+def text_id(column):
+    # Cell grids hold tens of thousands of ids; reading them as text skips
+    # building a uuid.UUID per value, which dominates grid load time.
+    return Cast(column, output_field=CharField())
+
+
+def dashed(value):
+    """Canonical UUID text (SQLite stores UUIDs as 32 hex chars)"""
+    if value is not None and len(value) == 32:
+        return f"{value[:8]}-{value[8:12]}-{value[12:16]}-{value[16:20]}-{value[20:]}"
+    return value
+
+
+class CellStorage:
+    """One Cell row per (row, column)"""
+
+    # What read() reports for a cell it does not yield, as (cell_id, value,
+    # raw_value, version): no stored cell at all
+    missing = None
+    supports_sql = True
+
+    def read(self, sheet, column_ids=None, row_ids=None, lock=False):
+        """
+        Yield (row_id, column_id, cell_id, value, raw_value, version) for
+        stored cells. lock=True locks them until the transaction ends.
+        """
+        if column_ids is not None:
+            cells = Cell.objects.filter(column_id__in=column_ids)
+        else:
+            cells = Cell.objects.filter(column__sheet=sheet)
+        if row_ids is not None:
+            cells = cells.filter(row_id__in=row_ids)
+        if lock:
+            cells = cells.select_for_update()
+        return cells.values_list('row_id', 'column_id', 'id', 'value', 'raw_value', 'version').iterator(chunk_size=5000)
+
+    def read_grid(self, sheet, columns, row_ids=None):
+        """Yield (row id text, column key, cell id text, value, raw_value, version) for load_grid"""
+        # The column join is needed for the sheet filter anyway, so read the key from it
+        cells = Cell.objects.filter(column__sheet=sheet)
+        if row_ids is not None:
+            cells = cells.filter(row_id__in=row_ids)
+        cells = cells.values_list(text_id('row_id'), 'column__key', text_id('id'), 'value', 'raw_value', 'version')
+        for row_id, key, cell_id, value, raw_value, version in cells.iterator(chunk_size=5000):
+            yield row_id, key, dashed(cell_id), value, raw_value, version
+
+    def write(self, sheet, cells):
+        """Upsert unsaved Cell instances"""
+        Cell.objects.bulk_create(
+            cells,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['row', 'column'],
+            update_fields=['value', 'raw_value', 'version', 'updated_by', 'updated_at'],
+        )
+
+    def insert(self, sheet, rows, cells, batch_size=1000):
+        """Insert brand-new rows together with their (unsaved) cells"""
+        SheetRow.objects.bulk_create(rows, batch_size=batch_size)
+        Cell.objects.bulk_create(cells, batch_size=batch_size)
+
+
+class PackedStorage:
+    """A row's cells packed into SheetRow.data / raw_data, keyed by column id"""
+
+    # Absent keys are blank cells; cell ids do not exist in this mode
+    missing = (None, None, None, 0)
+    supports_sql = False
+
+    def _column_ids(self, sheet, column_ids=None):
+        if column_ids is None:
+            column_ids = SheetColumn.objects.filter(sheet=sheet).values_list('id', flat=True)
+        return {str(column_id): column_id for column_id in column_ids}
+
+    def read(self, sheet, column_ids=None, row_ids=None, lock=False):
+        columns = self._column_ids(sheet, column_ids)
+        rows = SheetRow.objects.filter(sheet=sheet)
+        if row_ids is not None:
+            rows = rows.filter(id__in=row_ids)
+        if lock:
+            rows = rows.select_for_update()
+        rows = rows.values_list('id', 'data', 'raw_data', 'versions')
+        for row_id, data, raw_data, versions in rows.iterator(chunk_size=2000):
+            for key, value in data.items():
+                column_id = columns.get(key)
+                if column_id is not None:
+                    yield row_id, column_id, None, value, raw_data.get(key), versions.get(key, 0)
+
+    def read_grid(self, sheet, columns, row_ids=None):
+        keys = {str(column['id']): column['key'] for column in columns}
+        rows = SheetRow.objects.filter(sheet=sheet)
+        if row_ids is not None:
+            rows = rows.filter(id__in=row_ids)
+        rows = rows.values_list(text_id('id'), 'data', 'raw_data', 'versions')
+        for row_id, data, raw_data, versions in rows.iterator(chunk_size=2000):
+            for column_id, value in data.items():
+                key = keys.get(column_id)
+                if key is not None:
+                    yield row_id, key, None, value, raw_data.get(column_id), versions.get(column_id, 0)
+
+    def write(self, sheet, cells):
+        """Merge unsaved Cell instances into their rows' packed data"""
+        by_row = {}
+        for cell in cells:
+            by_row.setdefault(str(cell.row_id), []).append(cell)
+
+        now = timezone.now()
+        with transaction.atomic():
+            # Lock the rows so concurrent writers to one row do not lose updates
+            rows = list(SheetRow.objects.select_for_update().filter(id__in=by_row))
+            for row in rows:
+                for cell in by_row[str(row.id)]:
+                    key = str(cell.column_id)
+                    if cell.value is None or cell.value == '':
+                        row.data.pop(key, None)
+                    else:
+                        row.data[key] = cell.value
+                    if cell.raw_value is None:
+                        row.raw_data.pop(key, None)
+                    else:
+                        row.raw_data[key] = cell.raw_value
+                    # Kept for cleared cells too, so a stale editor still conflicts
+                    row.versions[key] = cell.version
+                    cell.updated_at = now
+                row.updated_at = now
+            # An upsert on the primary key is one statement per batch, unlike
+            # bulk_update's per-row CASE expressions
+            SheetRow.objects.bulk_create(
+                rows,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['id'],
+                update_fields=['data', 'raw_data', 'versions', 'updated_at'],
+            )
+
+    def insert(self, sheet, rows, cells, batch_size=1000):
+        by_row = {row.id: row for row in rows}
+        for cell in cells:
+            key = str(cell.column_id)
+            if cell.value is not None and cell.value != '':
+                by_row[cell.row_id].data[key] = cell.value
+            if cell.raw_value is not None:
+                by_row[cell.row_id].raw_data[key] = cell.raw_value
+            by_row[cell.row_id].versions[key] = cell.version
+        SheetRow.objects.bulk_create(rows, batch_size=batch_size)
+
+
+STORAGES = {
+    ProjectSheet.Storage.CELLS: CellStorage(),
+    ProjectSheet.Storage.PACKED: PackedStorage(),
+}
+
+
+def get_storage(sheet):
+    return STORAGES[sheet.storage]
+
+
+class StorageConversionError(Exception):
+    """Raised when a sheet cannot be moved to another storage mode"""
+
+
+def convert_storage(sheet, storage):
+    """
+    Move every cell of a sheet to another storage mode. Packed rows keep no
+    per-cell editor, so cells written back to CELLS are attributed to the
+    sheet's creator. Cell comments have no place in PACKED storage, and
+    deleting the cells would delete them, so such sheets are refused.
+    """
+    if sheet.storage == storage:
+        return 0
+    if storage == ProjectSheet.Storage.PACKED and SheetComment.objects.filter(sheet=sheet, cell__isnull=False).exists():
+        raise StorageConversionError("Resolve or delete the cell comments on this sheet before packing it")
+    source, target = get_storage(sheet), STORAGES[storage]
+    with transaction.atomic():
+        cells = [
+            Cell(
+                id=cell_id or uuid.uuid4(),
+                row_id=row_id,
+                column_id=column_id,
+                value=value,
+                raw_value=raw_value,
+                version=version,
+                updated_by_id=sheet.created_by_id,
+            )
+            for row_id, column_id, cell_id, value, raw_value, version in source.read(sheet)
+        ]
+        if storage == ProjectSheet.Storage.PACKED:
+            SheetRow.objects.filter(sheet=sheet).update(data={}, raw_data={}, versions={})
+        target.write(sheet, cells)
+        if sheet.storage == ProjectSheet.Storage.CELLS:
+            Cell.objects.filter(column__sheet=sheet).delete()
+        else:
+            SheetRow.objects.filter(sheet=sheet).update(data={}, raw_data={}, versions={})
+        sheet.storage = storage
+        sheet.save(update_fields=['storage'])
+    return len(cells)
@@ -0,0 +1,404 @@
+# users/sheet_views.py
+import hashlib
+import json
+import math
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+from django.db.models.functions import Lower
+from .models import Cell, SheetColumn, SheetRow, SheetView
+from . import sheet_cache, sheets
+from .sheet_storage import get_storage
+
+# SheetView definitions:
+#   filters:  {"match": "all" | "any", "conditions": [{"column": key, "op": op, "value": ...}]}
+#             (a bare list of conditions means match all)
+#   sort_by:  [{"column": key, "direction": "asc" | "desc"}] (or a single such dict)
+#   group_by: column key
+#
+# A view is compiled into a plan: conditions that can be answered from the
+# stored text in Cell.value become EXISTS subqueries, the rest (numeric
+# comparisons, or anything inside an "any" match that cannot be pushed down)
+# are evaluated in memory on typed values. The ordered row ids are cached
+# per (view definition, data version) and pages are slices of that list.
+
+RESULT_KEY = 'sheet:view:{sheet_id}:{digest}:{version}'
+
+# Row ids passed to one IN (...) query, well below SQLite's variable limit
+ROW_ID_CHUNK = 5000
+
+OPERATORS = {
+    'eq', 'neq', 'contains', 'not_contains', 'in', 'not_in',
+    'gt', 'gte', 'lt', 'lte', 'is_empty', 'is_not_empty',
+}
+
+NUMERIC_TYPES = frozenset((SheetColumn.ColumnType.NUMBER, SheetColumn.ColumnType.FORMULA))
+
+# Stored values of these types are canonical text (ISO dates, 'true'/'false',
+# option labels, user ids), so equality and, for dates, ordering can be
+# evaluated by the database on Cell.value.
+TEXT_ORDERED_TYPES = (SheetColumn.ColumnType.DATE,)
+
+
+class ViewDefinitionError(ValueError):
+    pass
+
+
+FILTER_KEYS = frozenset(('match', 'conditions'))
+CONDITION_KEYS = frozenset(('column', 'op', 'value'))
+SORT_KEYS = frozenset(('column', 'direction'))
+
+
+def _check_keys(name, value, allowed, required=()):
+    if not isinstance(value, dict):
+        raise ViewDefinitionError(f"{name} must be an object")
+    unknown = set(value) - allowed
+    if unknown:
+        raise ViewDefinitionError(f"Unknown {name} keys: {', '.join(sorted(unknown))}")
+    missing = [key for key in required if key not in value]
+    if missing:
+        raise ViewDefinitionError(f"{name} requires {', '.join(missing)}")
+
+
+def _normalize_filters(filters):
+    if not filters:
+        return 'all', []
+    if isinstance(filters, list):
+        match, conditions = 'all', filters
+    else:
+        _check_keys('filters', filters, FILTER_KEYS)
+        match = filters.get('match', 'all')
+        if match not in ('all', 'any'):
+            raise ViewDefinitionError("filters.match must be 'all' or 'any'")
+        conditions = filters.get('conditions', [])
+    if not isinstance(conditions, list):
+        raise ViewDefinitionError("filters.conditions must be a list")
+    for condition in conditions:
+        _check_keys('condition', condition, CONDITION_KEYS, required=('column', 'op'))
+    return match, conditions
+
+
+def _normalize_sort(sort_by):
+    if not sort_by:
+        return []
+    if isinstance(sort_by, dict):
+        sort_by = [sort_by]
+    if not isinstance(sort_by, list):
+        raise ViewDefinitionError("sort_by must be a list")
+    sorts = []
+    for sort in sort_by:
+        _check_keys('sort', sort, SORT_KEYS, required=('column',))
+        direction = sort.get('direction', 'asc')
+        if direction not in ('asc', 'desc'):
+            raise ViewDefinitionError("sort direction must be 'asc' or 'desc'")
+        sorts.append((sort['column'], direction == 'desc'))
+    return sorts
+
+
+def _typed(column, value, raw_value=None):
+    """Comparable value for in-memory evaluation; None for blanks"""
+    if value is None or value == '':
+        return None
+    if column.column_type in NUMERIC_TYPES:
+        if isinstance(raw_value, (int, float)) and not isinstance(raw_value, bool):
+            return float(raw_value)
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        return number if math.isfinite(number) else None
+    return str(value).lower()
+
+
+
+class Condition:
+    def __init__(self, column, op, value):
+        if op not in OPERATORS:
+            raise ViewDefinitionError(f"Unknown filter operator: {op}")
+        if op in ('in', 'not_in') and not isinstance(value, list):
+            raise ViewDefinitionError(f"'{op}' expects a list")
+        self.column = column
+        self.op = op
+        self.value = value
+
+    @property
+    def pushdown(self):
+        """Whether the database can evaluate this condition on Cell.value"""
+        if self.op in ('is_empty', 'is_not_empty', 'contains', 'not_contains'):
+            return True
+        numeric = self.column.column_type in NUMERIC_TYPES
+        if self.op in ('eq', 'neq', 'in', 'not_in'):
+            return not numeric
+        # Range comparisons only work on text that sorts like its values
+        return self.column.column_type in TEXT_ORDERED_TYPES
+
+    def to_q(self):
+        cells = Cell.objects.filter(row=OuterRef('pk'), column_id=self.column.id)
+        filled = cells.exclude(value__isnull=True).exclude(value='')
+        op, value = self.op, self.value
+        if op == 'is_empty':
+            return ~Exists(filled)
+        if op == 'is_not_empty':
+            return Exists(filled)
+        if op in ('contains', 'not_contains'):
+            found = Exists(cells.filter(value__icontains=str(value)))
+            return found if op == 'contains' else ~found
+        if op in ('eq', 'neq'):
+            found = Exists(cells.filter(value__iexact=str(value)))
+            return found if op == 'eq' else ~found
+        if op in ('in', 'not_in'):
+            found = Exists(cells.annotate(value_lower=Lower('value')).filter(
+                value_lower__in=[str(item).lower() for item in value]
+            ))
+            return found if op == 'in' else ~found
+        lookup = {'gt': 'value__gt', 'gte': 'value__gte', 'lt': 'value__lt', 'lte': 'value__lte'}[op]
+        return Exists(filled.filter(**{lookup: str(value)}))
+
+    def matches(self, value):
+        """value is the typed cell value from _typed()"""
+        op = self.op
+        if op == 'is_empty':
+            return value is None
+        if op == 'is_not_empty':
+            return value is not None
+        if op in ('contains', 'not_contains'):
+            found = value is not None and str(self.value).lower() in str(value).lower()
+            return found if op == 'contains' else not found
+        if op in ('in', 'not_in'):
+            found = value is not None and value in {_typed(self.column, item) for item in self.value}
+            return found if op == 'in' else not found
+        target = _typed(self.column, self.value)
+        if op == 'eq':
+            return value is not None and value == target
+        if op == 'neq':
+            return value is None or value != target
+        if value is None or target is None:
+            return False
+        if op == 'gt':
+            return value > target
+        if op == 'gte':
+            return value >= target
+        if op == 'lt':
+            return value < target
+        return value <= target
+
+
+class ViewPlan:
+    """A SheetView compiled against the sheet's current columns"""
+
+    def __init__(self, sheet, filters, sort_by, group_by, columns=None, date_range=None):
+        self.sheet = sheet
+        if columns is None:
+            columns = list(SheetColumn.objects.filter(sheet=sheet))
+        self.columns = {column.key: column for column in columns}
+
+        self.match, raw_conditions = _normalize_filters(filters)
+        self.conditions = []
+        for condition in raw_conditions:
+            column = self._column(condition.get('column'))
+            self.conditions.append(Condition(column, condition['op'], condition.get('value')))
+
+        self.sorts = [(self._column(key), descending) for key, descending in _normalize_sort(sort_by)]
+        if group_by and not isinstance(group_by, str):
+            raise ViewDefinitionError("group_by must be a column key")
+        self.group_column = self._column(group_by) if group_by else None
+
+        # Packed sheets have no Cell rows to push conditions down to
+        self.storage = get_storage(sheet)
+        def pushdown(condition):
+            return self.storage.supports_sql and condition.pushdown
+
+        if self.match == 'all':
+            self.sql_conditions = [c for c in self.conditions if pushdown(c)]
+            self.memory_conditions = [c for c in self.conditions if not pushdown(c)]
+        elif all(pushdown(c) for c in self.conditions):
+            self.sql_conditions, self.memory_conditions = self.conditions, []
+        else:
+            # An OR cannot be split between SQL and memory
+            self.sql_conditions, self.memory_conditions = [], self.conditions
+
+        # A calendar window (date column, start, end) always narrows the result
+        self.range_conditions = []
+        if date_range:
+            key, start, end = date_range
+            column = self._column(key)
+            if start:
+                self.range_conditions.append(Condition(column, 'gte', start))
+            if end:
+                self.range_conditions.append(Condition(column, 'lte', end))
+
+        self.definition = {
+            'match': self.match,
+            'range': [[c.column.key, c.op, c.value] for c in self.range_conditions],
+            'conditions': [[c.column.key, c.op, c.value] for c in self.conditions],
+            'sort': [[column.key, descending] for column, descending in self.sorts],
+            'group_by': self.group_column.key if self.group_column else None,
+        }
+
+    def _column(self, key):
+        if key not in self.columns:
+            raise ViewDefinitionError(f"Unknown column: {key}")
+        return self.columns[key]
+
+    @property
+    def sort_in_sql(self):
+        return self.storage.supports_sql and len(self.sorts) <= 1 and all(
+            column.column_type not in NUMERIC_TYPES for column, _ in self.sorts
+        )
+
+    def explain(self):
+        return {
+            'sql_filters': [[c.column.key, c.op] for c in self.sql_conditions],
+            'memory_filters': [[c.column.key, c.op] for c in self.memory_conditions],
+            'sort': 'sql' if self.sort_in_sql and not self._in_memory else 'memory',
+        }
+
+    def _base_queryset(self):
+        rows = SheetRow.objects.filter(sheet=self.sheet)
+        if self.sql_conditions:
+            q = Q()
+            for condition in self.sql_conditions:
+                q = (q & condition.to_q()) if self.match == 'all' else (q | condition.to_q())
+            rows = rows.filter(q)
+        if self.storage.supports_sql:
+            for condition in self.range_conditions:
+                rows = rows.filter(condition.to_q())
+        return rows
+
+    @property
+    def _in_memory(self):
+        return bool(self.memory_conditions) or (bool(self.range_conditions) and not self.storage.supports_sql)
+
+    def execute(self):
+        """Return the ordered row ids matching the view"""
+        rows = self._base_queryset()
+
+        if not self._in_memory and self.sort_in_sql:
+            ordering = []
+            if self.sorts:
+                column, descending = self.sorts[0]
+                rows = rows.annotate(sort_value=Subquery(
+                    Cell.objects.filter(row=OuterRef('pk'), column_id=column.id).values('value')[:1]
+                ))
+                ordering.append(F('sort_value').desc(nulls_last=True) if descending else F('sort_value').asc(nulls_last=True))
+            ordering += sheets.ROW_ORDERING
+            return list(rows.order_by(*ordering).values_list('id', flat=True))
+
+        # In-memory pass: load typed values of the columns involved for the
+        # candidate rows in one query
+        candidates = list(rows.order_by(*sheets.ROW_ORDERING).values_list('id', flat=True))
+        ranges = [] if self.storage.supports_sql else self.range_conditions
+        needed = {c.column.key: c.column for c in self.memory_conditions + ranges}
+        needed.update({column.key: column for column, _ in self.sorts})
+        values = {row_id: {} for row_id in candidates}
+        if needed:
+            by_id = {column.id: column for column in needed.values()}
+            for row_id, column_id, _, value, raw_value, _ in self.storage.read(self.sheet, column_ids=by_id.keys()):
+                row_values = values.get(row_id)
+                if row_values is not None:
+                    column = by_id[column_id]
+                    row_values[column.key] = _typed(column, value, raw_value)
+
+        if ranges:
+            candidates = [
+                row_id for row_id in candidates
+                if all(c.matches(values[row_id].get(c.column.key)) for c in ranges)
+            ]
+        if self.memory_conditions:
+            combine = all if self.match == 'all' else any
+            candidates = [
+                row_id for row_id in candidates
+                if combine(c.matches(values[row_id].get(c.column.key)) for c in self.memory_conditions)
+            ]
+
+        # Stable sorts from the last key to the first; blanks always last
+        for column, descending in reversed(self.sorts):
+            present = [row_id for row_id in candidates if values[row_id].get(column.key) is not None]
+            blank = [row_id for row_id in candidates if values[row_id].get(column.key) is None]
+            present.sort(key=lambda row_id: values[row_id][column.key], reverse=descending)
+            candidates = present + blank
+        return candidates
+
+    def _cache_key(self):
+        digest = hashlib.sha1(json.dumps(self.definition, sort_keys=True, default=str).encode()).hexdigest()
+        return RESULT_KEY.format(
+            sheet_id=self.sheet.id, digest=digest, version=sheet_cache.data_version(self.sheet.id)
+        )
+
+    def row_ids(self):
+        """Ordered matching row ids, materialized in the cache until the sheet changes"""
+        cache = sheet_cache.get_cache()
+        key = self._cache_key()
+        row_ids = cache.get(key)
+        if row_ids is None:
+            row_ids = self.execute()
+            cache.set(key, row_ids, sheet_cache.timeout())
+        return row_ids
+
+    def groups(self, row_ids):
+        """{group value: [row ids in view order]} for the group_by column"""
+        column = self.group_column
+        group_of = {}
+        for start in range(0, len(row_ids), ROW_ID_CHUNK):
+            chunk = row_ids[start:start + ROW_ID_CHUNK]
+            for row_id, _, _, value, _, _ in self.storage.read(self.sheet, column_ids=[column.id], row_ids=chunk):
+                group_of[row_id] = value
+        grouped = {}
+        for row_id in row_ids:
+            value = group_of.get(row_id)
+            grouped.setdefault(None if value == '' else value, []).append(row_id)
+
+        # Options order first (e.g. kanban lanes), then other values, blanks last
+        ordered = [option for option in (column.options or []) if option in grouped]
+        ordered += sorted(value for value in grouped if value is not None and value not in ordered)
+        if None in grouped:
+            ordered.append(None)
+        return [(value, grouped[value]) for value in ordered]
+
+
+def compile_view(view, columns=None, date_range=None):
+    return ViewPlan(view.sheet, view.filters, view.sort_by, view.group_by, columns, date_range)
+
+
+def calendar_range(view, start=None, end=None):
+    """(date column, start, end) for a calendar view, or None"""
+    key = (view.settings or {}).get('date_column') or view.group_by
+    if view.view_type != SheetView.ViewType.CALENDAR or not key or not (start or end):
+        return None
+    return key, start, end
+
+
+def execute_view(view, offset=0, limit=sheets.ROW_WINDOW_SIZE, group=None, start=None, end=None):
+    """
+    Run a saved view and return one window of rows in the grid's columnar
+    layout. Grouped (kanban) views return every group's count and its first
+    window of rows, or, with group=<value>, a window within that group.
+    Calendar views only include rows whose date falls in [start, end].
+    """
+    columns = list(SheetColumn.objects.filter(sheet=view.sheet).order_by(*sheets.COLUMN_ORDERING))
+    plan = compile_view(view, columns, calendar_range(view, start, end))
+    row_ids = plan.row_ids()
+    column_dicts = sheets.load_columns(view.sheet)
+
+    def window(ids):
+        page = ids[offset:offset + limit]
+        return {
+            'total': len(ids),
+            'offset': offset,
+            'limit': limit,
+            'has_more': offset + limit < len(ids),
+            **sheets.load_grid(view.sheet, column_dicts, row_ids=page),
+        }
+
+    result = {'view_id': view.id, 'columns': column_dicts, 'plan': plan.explain()}
+    if plan.group_column is None:
+        result.update(window(row_ids))
+        return result
+
+    groups = plan.groups(row_ids)
+    result['group_by'] = plan.group_column.key
+    result['total'] = len(row_ids)
+    if group is not None:
+        ids = next((ids for value, ids in groups if (value or '') == group), [])
+        result['groups'] = [{'value': group or None, **window(ids)}]
+    else:
+        result['groups'] = [{'value': value, **window(ids)} for value, ids in groups]
+    return result
@@ -0,0 +1,632 @@
+# users/sheets.py
+import base64
+import math
+import uuid
+from datetime import date, datetime
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from .models import ProjectSheet, SheetColumn, SheetRow, Cell, TeamMember
+from . import formulas, sheet_cache
+from .sheet_storage import get_storage, text_id
+
+COLUMN_FIELDS = ('id', 'sheet_id', 'name', 'key', 'column_type', 'width', 'order',
+                 'is_required', 'options', 'formula', 'settings')
+
+ROW_ORDERING = ('order', 'created_at', 'id')
+COLUMN_ORDERING = ('order', 'key')
+
+ROW_WINDOW_SIZE = 100
+MAX_ROW_WINDOW_SIZE = 500
+
+
+def sheets_for_project(project):
+    """Sheets of a project with their row counts, without loading rows"""
+    return (
+        ProjectSheet.objects.filter(project=project)
+        .select_related('created_by')
+        .annotate(row_count=Count('rows'))
+    )
+
+
+def ordered_rows(sheet):
+    return SheetRow.objects.filter(sheet=sheet).order_by(*ROW_ORDERING)
+
+
+def load_columns(sheet):
+    columns = []
+    for column in SheetColumn.objects.filter(sheet=sheet).order_by(*COLUMN_ORDERING).values(*COLUMN_FIELDS):
+        column['sheet'] = column.pop('sheet_id')
+        columns.append(column)
+    return columns
+
+
+def load_grid(sheet, columns=None, row_ids=None):
+    """
+    Load a sheet's rows and cells as a columnar grid using flat queries
+    (columns, rows, cells) instead of nested serializers. With row_ids,
+    only those rows are loaded, in the given order.
+
+    Returns:
+        {
+            'row_ids': [...], 'row_orders': [...],
+            'values': {column_key: [value per row]},
+            'cell_ids': {column_key: [cell id or None per row]},
+            'raw_values': {column_key: [...]},  # only columns with structured data
+            'versions': {column_key: [...]}  # only columns with edited cells
+        }
+    """
+    if columns is None:
+        columns = load_columns(sheet)
+
+    selected = row_ids
+    row_ids = []
+    row_orders = []
+    row_index = {}
+    rows = ordered_rows(sheet)
+    if selected is not None:
+        rows = rows.filter(id__in=selected)
+    rows = list(rows.annotate(id_text=text_id('id')).values_list('id', 'id_text', 'order'))
+    if selected is not None:
+        position = {row_id: index for index, row_id in enumerate(selected)}
+        rows.sort(key=lambda row: position[row[0]])
+    for index, (row_id, row_id_text, order) in enumerate(rows):
+        row_ids.append(row_id)
+        row_orders.append(order)
+        row_index[row_id_text] = index
+
+    row_count = len(row_ids)
+    values = {column['key']: [None] * row_count for column in columns}
+    cell_ids = {column['key']: [None] * row_count for column in columns}
+    raw_values = {}
+    versions = {}
+
+    cells = get_storage(sheet).read_grid(sheet, columns, row_ids if selected is not None else None)
+    for row_id, key, cell_id, value, raw_value, version in cells:
+        index = row_index.get(row_id)
+        if index is None or key not in values:
+            continue
+        values[key][index] = value
+        cell_ids[key][index] = cell_id
+        if raw_value is not None:
+            raw_values.setdefault(key, [None] * row_count)[index] = raw_value
+        if version:
+            versions.setdefault(key, [0] * row_count)[index] = version
+
+    return {
+        'row_ids': row_ids,
+        'row_orders': row_orders,
+        'values': values,
+        'cell_ids': cell_ids,
+        'raw_values': raw_values,
+        'versions': versions,
+    }
+
+
+def window_size(value, default=ROW_WINDOW_SIZE):
+    """Clamp a requested number of rows to 1..MAX_ROW_WINDOW_SIZE"""
+    try:
+        return max(1, min(int(value), MAX_ROW_WINDOW_SIZE))
+    except (TypeError, ValueError):
+        return default
+
+
+def encode_row_cursor(order, created_at, row_id):
+    """Opaque keyset cursor for a row's (order, created_at, id) position"""
+    raw = f"{order}|{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_row_cursor(cursor):
+    """Return (order, created_at, id) for a cursor, raising ValueError if it is malformed"""
+    try:
+        order, created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return int(order), datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def row_window(sheet, columns=None, offset=0, limit=ROW_WINDOW_SIZE, cursor=None):
+    """
+    Load one viewport of a sheet's rows in the columnar grid layout.
+    Rows are addressed by offset/limit, or by a keyset cursor (rows after
+    the cursor position) which stays cheap deep into large sheets.
+    Raises ValueError for a malformed cursor.
+    """
+    rows = ordered_rows(sheet)
+    if cursor:
+        order, created_at, row_id = decode_row_cursor(cursor)
+        rows = rows.filter(
+            Q(order__gt=order)
+            | Q(order=order, created_at__gt=created_at)
+            | Q(order=order, created_at=created_at, id__gt=row_id)
+        )
+        offset = 0
+
+    # Fetch one extra row to know whether another window exists
+    page = list(rows.values_list('id', 'order', 'created_at')[offset:offset + limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    window = load_grid(sheet, columns, row_ids=[row_id for row_id, _, _ in page])
+    window.update({
+        'offset': offset,
+        'limit': limit,
+        'total': SheetRow.objects.filter(sheet=sheet).count(),
+        'has_more': has_more,
+        'next_cursor': encode_row_cursor(*page[-1][1:], page[-1][0]) if page and has_more else None,
+    })
+    return window
+
+
+# Ordering: rows and columns are spaced ORDER_GAP apart so a move only
+# rewrites the moved item (the midpoint of its new neighbours). When a gap
+# runs out the sheet is renumbered; narrow gaps schedule that in the background.
+
+ORDER_GAP = 1024
+MIN_ORDER_GAP = 8
+
+
+def next_order(queryset):
+    """Order value that places a new item after every existing one"""
+    current = queryset.aggregate(max_order=Max('order'))['max_order']
+    return 0 if current is None else current + ORDER_GAP
+
+
+def rebalance_order(queryset, ordering):
+    """Renumber items ORDER_GAP apart, keeping their current order"""
+    items = list(queryset.order_by(*ordering).only('id', 'order'))
+    changed = []
+    for index, item in enumerate(items):
+        order = index * ORDER_GAP
+        if item.order != order:
+            item.order = order
+            changed.append(item)
+    queryset.model.objects.bulk_update(changed, ['order'], batch_size=1000)
+    return len(changed)
+
+
+def _order_between(scope, item, after, ordering):
+    """
+    Order value placing item directly after `after` (first when None),
+    or None when there is no free integer between the neighbours.
+    Returns (order, remaining gap).
+    """
+    others = scope.exclude(id=item.id).order_by(*ordering)
+    if after is None:
+        first = others.values_list('order', flat=True).first()
+        return (0, ORDER_GAP) if first is None else (first - ORDER_GAP, ORDER_GAP)
+
+    following = others.exclude(id=after.id).filter(order__gte=after.order).values_list('order', flat=True).first()
+    if following is None:
+        return after.order + ORDER_GAP, ORDER_GAP
+    if following - after.order < 2:
+        return None, 0
+    order = (after.order + following) // 2
+    return order, min(order - after.order, following - order)
+
+
+def move_item(sheet, scope, item, after, ordering):
+    """
+    Move a row or column right after `after` (to the start when None)
+    with a single write, renumbering the sheet only when the gap is exhausted.
+    """
+    with transaction.atomic():
+        order, gap = _order_between(scope, item, after, ordering)
+        if order is None:
+            rebalance_order(scope, ordering)
+            after.refresh_from_db(fields=['order'])
+            order, gap = _order_between(scope, item, after, ordering)
+
+        item.order = order
+        type(item).objects.filter(id=item.id).update(order=order)
+        sheet_cache.bump_data_version(sheet.id)
+
+        if gap < MIN_ORDER_GAP:
+            from .tasks import rebalance_sheet_order
+            transaction.on_commit(lambda: rebalance_sheet_order.delay(str(sheet.id)))
+    return item
+
+
+def move_row(sheet, row, after=None):
+    return move_item(sheet, SheetRow.objects.filter(sheet=sheet), row, after, ROW_ORDERING)
+
+
+def move_column(sheet, column, after=None):
+    return move_item(sheet, SheetColumn.objects.filter(sheet=sheet), column, after, COLUMN_ORDERING)
+
+
+def add_row(sheet, user):
+    row = SheetRow.objects.create(sheet=sheet, created_by=user, order=next_order(SheetRow.objects.filter(sheet=sheet)))
+    sheet_cache.bump_data_version(sheet.id)
+    # Formulas can produce values even for an empty row
+    formula_keys = SheetColumn.objects.filter(
+        sheet=sheet, column_type=SheetColumn.ColumnType.FORMULA
+    ).values_list('key', flat=True)
+    changed = {key: {row.id} for key in formula_keys}
+    if changed:
+        recalculate_formulas(sheet, changed, user)
+    return row
+
+
+# Bulk cell updates
+
+class CellUpdateError(Exception):
+    """Raised when a batch of cell updates fails validation; nothing is written"""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid cell updates")
+        self.errors = errors
+
+
+class CellConflictError(CellUpdateError):
+    """Raised when updates were based on outdated cell versions; nothing is written"""
+
+
+class InvalidCellValue(ValueError):
+    def __init__(self, position, message):
+        super().__init__(message)
+        self.position = position
+
+
+TRUE_VALUES = {'true', '1', 'yes', 'y', 'on', 'checked'}
+FALSE_VALUES = {'false', '0', 'no', 'n', 'off', 'unchecked'}
+
+# Each coercer converts a column's values to [(value, raw_value)] in one call
+# and raises ValueError on the first value it cannot convert.
+
+
+def _coerce_text(column, values, member_ids=None):
+    return [(str(value), None) for value in values]
+
+
+def _coerce_number(column, values, member_ids=None):
+    coerced = []
+    for value in values:
+        try:
+            if isinstance(value, bool):
+                raise ValueError
+            number = float(value)
+        except (TypeError, ValueError):
+            number = math.nan
+        if not math.isfinite(number):
+            raise ValueError(f"{value!r} is not a number")
+        if number.is_integer() and abs(number) < 2 ** 53:
+            number = int(number)
+        coerced.append((str(number), number))
+    return coerced
+
+
+def _coerce_date(column, values, member_ids=None):
+    coerced = []
+    for value in values:
+        try:
+            parsed = date.fromisoformat(str(value).strip()[:10])
+        except ValueError:
+            raise ValueError(f"{value!r} is not a date (YYYY-MM-DD)")
+        coerced.append((parsed.isoformat(), parsed.isoformat()))
+    return coerced
+
+
+def _coerce_choice(column, values, member_ids=None):
+    allowed = set(column.options or [])
+    coerced = []
+    for value in values:
+        text = str(value)
+        if allowed and text not in allowed:
+            raise ValueError(f"{text!r} is not one of the column options")
+        coerced.append((text, None))
+    return coerced
+
+
+def _coerce_checkbox(column, values, member_ids=None):
+    coerced = []
+    for value in values:
+        text = str(value).strip().lower()
+        if value is True or text in TRUE_VALUES:
+            checked = True
+        elif value is False or text in FALSE_VALUES:
+            checked = False
+        else:
+            raise ValueError(f"{value!r} is not a checkbox value")
+        coerced.append(('true' if checked else 'false', checked))
+    return coerced
+
+
+def _coerce_user(column, values, member_ids=None):
+    coerced = []
+    for value in values:
+        text = str(value)
+        if member_ids is not None and text not in member_ids:
+            raise ValueError(f"{text!r} is not a member of this team")
+        coerced.append((text, None))
+    return coerced
+
+
+def _reject_formula(column, values, member_ids=None):
+    raise ValueError("Formula columns are computed and cannot be edited")
+
+
+COERCERS = {
+    SheetColumn.ColumnType.TEXT: _coerce_text,
+    SheetColumn.ColumnType.NUMBER: _coerce_number,
+    SheetColumn.ColumnType.DATE: _coerce_date,
+    SheetColumn.ColumnType.SELECT: _coerce_choice,
+    SheetColumn.ColumnType.CHECKBOX: _coerce_checkbox,
+    SheetColumn.ColumnType.FORMULA: _reject_formula,
+    SheetColumn.ColumnType.USER: _coerce_user,
+    SheetColumn.ColumnType.STATUS: _coerce_choice,
+}
+
+
+def _is_blank(value):
+    return value is None or value == ''
+
+
+def _team_member_ids(sheet):
+    return {
+        str(user_id) for user_id in TeamMember.objects.filter(
+            team_id=sheet.project.team_id, is_active=True
+        ).values_list('user_id', flat=True)
+    }
+
+
+def coerce_column(column, values, member_ids=None):
+    """
+    Coerce every value written to one column in a single pass.
+    Returns [(value, raw_value)]; None or '' clears the cell.
+    Raises InvalidCellValue carrying the position of the first bad value.
+    """
+    if column.is_required:
+        for position, value in enumerate(values):
+            if _is_blank(value):
+                raise InvalidCellValue(position, "This column is required")
+
+    coercer = COERCERS.get(column.column_type, _coerce_text)
+    present = [(position, value) for position, value in enumerate(values) if not _is_blank(value)]
+    try:
+        coerced = coercer(column, [value for _, value in present], member_ids=member_ids)
+    except (TypeError, ValueError):
+        # Slow path, only taken on failure: find which value was rejected
+        for position, value in present:
+            try:
+                coercer(column, [value], member_ids=member_ids)
+            except (TypeError, ValueError) as e:
+                raise InvalidCellValue(position, str(e))
+        raise
+
+    result = [(None, None)] * len(values)
+    for (position, _), pair in zip(present, coerced):
+        result[position] = pair
+    return result
+
+
+def apply_cell_updates(sheet, updates, user, conflicts=None):
+    """
+    Apply [{row_id, column_key, value[, version]}] to a sheet with set-based
+    queries: one lookup each for columns, rows and existing cells, then a
+    single upsert inside a transaction. Later updates to the same cell win.
+    Returns the cells whose value actually changed, as dicts.
+    Raises CellUpdateError (and writes nothing) if any update is invalid.
+
+    An update carrying the cell version its author last saw conflicts when
+    the cell has been written since. Conflicts raise CellConflictError, or,
+    when a `conflicts` list is given, are appended to it (with the current
+    value and version) and skipped while the other updates are applied.
+    """
+    # Last write wins for repeated (row, column) pairs; the version checked
+    # is the one seen before the first of them
+    latest = {}
+    for index, update in enumerate(updates):
+        cell_key = (str(update['row_id']), update['column_key'])
+        previous = latest.get(cell_key)
+        version = previous[2] if previous and previous[2] is not None else update.get('version')
+        latest[cell_key] = (index, update['value'], version)
+
+    try:
+        requested_rows = {uuid.UUID(row_id) for row_id, _ in latest}
+    except ValueError:
+        raise CellUpdateError([{'error': 'Invalid row_id'}])
+
+    columns = {column.key: column for column in SheetColumn.objects.filter(
+        sheet=sheet, key__in={key for _, key in latest}
+    )}
+    rows = {str(row_id) for row_id in SheetRow.objects.filter(
+        sheet=sheet, id__in=requested_rows
+    ).values_list('id', flat=True)}
+
+    # Group by column so each column is coerced in one pass
+    errors = []
+    by_column = {}
+    for (row_id, key), (index, value, _) in latest.items():
+        if key not in columns:
+            errors.append({'index': index, 'column_key': key, 'error': 'Unknown column'})
+        elif row_id not in rows:
+            errors.append({'index': index, 'row_id': row_id, 'error': 'Row does not belong to this sheet'})
+        else:
+            by_column.setdefault(key, []).append((index, row_id, value))
+
+    member_ids = None
+    if any(columns[key].column_type == SheetColumn.ColumnType.USER for key in by_column):
+        member_ids = _team_member_ids(sheet)
+
+    coerced = {}  # (row_id, column_id) -> (value, raw_value)
+    for key, entries in by_column.items():
+        column = columns[key]
+        try:
+            pairs = coerce_column(column, [value for _, _, value in entries], member_ids)
+        except InvalidCellValue as e:
+            index, row_id, _ = entries[e.position]
+            errors.append({'index': index, 'row_id': row_id, 'column_key': key, 'error': str(e)})
+            continue
+        for (_, row_id, _), pair in zip(entries, pairs):
+            coerced[(row_id, column.id)] = pair
+
+    if errors:
+        raise CellUpdateError(sorted(errors, key=lambda error: error['index'] if 'index' in error else -1))
+    if not coerced:
+        return []
+
+    storage = get_storage(sheet)
+    key_by_column = {column.id: column.key for column in columns.values()}
+    with transaction.atomic():
+        # Existing cells, locked so versions cannot move under us: keep their
+        # ids, skip writes that change nothing and detect stale versions
+        existing = {}
+        for row_id, column_id, cell_id, value, raw_value, version in storage.read(
+            sheet,
+            column_ids={column_id for _, column_id in coerced},
+            row_ids={row_id for row_id, _ in coerced},
+            lock=True
+        ):
+            existing[(str(row_id), column_id)] = (cell_id, value, raw_value, version)
+
+        changed = []
+        stale = []
+        for (row_id, column_id), (value, raw_value) in coerced.items():
+            current = existing.get((row_id, column_id), storage.missing)
+            if current and current[1] == value and current[2] == raw_value:
+                continue
+            current_version = current[3] if current else 0
+            index, _, seen_version = latest[(row_id, key_by_column[column_id])]
+            if seen_version is not None and int(seen_version) != current_version:
+                stale.append({
+                    'index': index,
+                    'row_id': row_id,
+                    'column_key': key_by_column[column_id],
+                    'error': 'Cell was changed by someone else',
+                    'value': current[1] if current else None,
+                    'version': current_version,
+                })
+                continue
+            changed.append(Cell(
+                id=current[0] if current else uuid.uuid4(),
+                row_id=row_id,
+                column_id=column_id,
+                value=value,
+                raw_value=raw_value,
+                version=current_version + 1,
+                updated_by=user,
+            ))
+
+        if stale:
+            if conflicts is None:
+                raise CellConflictError(sorted(stale, key=lambda error: error['index']))
+            conflicts.extend(stale)
+        if not changed:
+            return []
+
+        storage.write(sheet, changed)
+        sheet_cache.bump_data_version(sheet.id)
+
+        # Recompute formula cells that read the edited cells
+        edited = {}
+        for cell in changed:
+            edited.setdefault(key_by_column[cell.column_id], set()).add(cell.row_id)
+        computed = recalculate_formulas(sheet, edited, user)
+
+    result = [serialize_cell(cell, key_by_column[cell.column_id]) for cell in changed]
+    result.extend(serialize_cell(cell, key) for key, cell in computed)
+    return result
+
+
+def _formula_input(value, raw_value):
+    return raw_value if raw_value is not None else value
+
+
+def recalculate_formulas(sheet, changed, user, columns=None):
+    """
+    Recompute formula cells downstream of changed cells.
+
+    changed maps column keys to the row ids that changed, or to None when
+    every row is affected (e.g. a new formula column). Only formula columns
+    reachable from the changed columns are evaluated, in dependency order,
+    and only for the affected rows. Results are cached on the cells
+    (value for display, raw_value for further computation).
+    Returns [(column_key, Cell)] for the formula cells whose result changed.
+    """
+    if columns is None:
+        columns = list(SheetColumn.objects.filter(sheet=sheet))
+    graph = formulas.FormulaGraph(columns, strict=False)
+    if not graph.formulas:
+        return []
+
+    changed_keys = set(changed)
+    targets = set(graph.downstream(changed_keys)) | (changed_keys & graph.formulas.keys())
+    if not targets:
+        return []
+    targets = [key for key in graph.order if key in targets]
+
+    row_ids = set()
+    all_rows = False
+    for key, rows in changed.items():
+        if rows is None:
+            all_rows = True
+        else:
+            row_ids |= {row_id if isinstance(row_id, uuid.UUID) else uuid.UUID(str(row_id)) for row_id in rows}
+
+    column_by_key = {column.key: column for column in columns}
+    needed = graph.inputs(targets) | set(targets)
+
+    storage = get_storage(sheet)
+    key_by_id = {column_by_key[key].id: key for key in needed if key in column_by_key}
+    cells = storage.read(sheet, column_ids=key_by_id.keys(), row_ids=None if all_rows else row_ids)
+    if all_rows:
+        row_ids = set(SheetRow.objects.filter(sheet=sheet).values_list('id', flat=True))
+
+    # row id -> {column key: value}, and the current formula results
+    contexts = {row_id: {} for row_id in row_ids}
+    current = {}
+    for row_id, column_id, cell_id, value, raw_value, version in cells:
+        if row_id not in contexts:
+            continue
+        key = key_by_id[column_id]
+        contexts[row_id][key] = _formula_input(value, raw_value)
+        if key in graph.formulas:
+            current[(row_id, key)] = (cell_id, value, raw_value, version)
+
+    written = []
+    for row_id, context in contexts.items():
+        for key in targets:
+            value, raw_value = graph.formulas[key](context)
+            context[key] = _formula_input(value, raw_value)
+            existing = current.get((row_id, key), storage.missing)
+            if existing and existing[1] == value and existing[2] == raw_value:
+                continue
+            written.append((key, Cell(
+                id=existing[0] if existing else uuid.uuid4(),
+                row_id=row_id,
+                column_id=column_by_key[key].id,
+                value=value,
+                raw_value=raw_value,
+                version=(existing[3] if existing else 0) + 1,
+                updated_by=user,
+            )))
+
+    if written:
+        storage.write(sheet, [cell for _, cell in written])
+        sheet_cache.bump_data_version(sheet.id)
+    return written
+
+
+def validate_formula_column(sheet, key, formula, column_type=SheetColumn.ColumnType.FORMULA):
+    """
+    Check that a new or changed formula column parses, only references
+    existing columns and does not create a cycle. Raises FormulaError.
+    """
+    columns = [column for column in SheetColumn.objects.filter(sheet=sheet) if column.key != key]
+    columns.append(SheetColumn(sheet=sheet, key=key, column_type=column_type, formula=formula))
+    formulas.FormulaGraph(columns)
+
+
+def serialize_cell(cell, column_key):
+    return {
+        'id': str(cell.id) if cell.id else None,
+        'row': str(cell.row_id),
+        'column': str(cell.column_id),
+        'column_key': column_key,
+        'value': cell.value,
+        'raw_value': cell.raw_value,
+        'version': cell.version,
+        'updated_by': str(cell.updated_by_id),
+        'updated_at': cell.updated_at,
+    }
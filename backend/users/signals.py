@@ -0,0 +1,229 @@
+# users/signals.py
+import threading
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from .models import (
+    Notification, Team, TeamMember, Project, ProjectAssignee, ProjectMember, ProjectPermission, Task, User,
+    UserDashboardStats,
+)
+from . import dashboard_stats, permission_cache, project_stats, team_cache
+from .notifications import publish_notifications
+
+
+@receiver([post_save, post_delete], sender=TeamMember)
+@receiver([post_save, post_delete], sender=ProjectAssignee)
+@receiver([post_save, post_delete], sender=ProjectPermission)
+def invalidate_user_permissions(sender, instance, **kwargs):
+    """Role, assignment or stored permission changes affect the user's grants"""
+    permission_cache.invalidate_user(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Project)
+def invalidate_project_permissions(sender, instance, **kwargs):
+    """A project moving between teams changes who can access it"""
+    if kwargs.get('created'):
+        return
+    permission_cache.invalidate_project(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Team)
+def invalidate_team_list_entry(sender, instance, **kwargs):
+    team_cache.invalidate([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=TeamMember)
+def invalidate_member_preview(sender, instance, **kwargs):
+    """Joins, leaves and role changes show in the team's member preview"""
+    team_cache.invalidate([instance.team_id])
+
+
+@receiver(post_save, sender=User)
+def invalidate_member_profile(sender, instance, created, update_fields=None, **kwargs):
+    """Name and avatar changes show in member previews (logins only touch last_login)"""
+    if created or (update_fields is not None and not set(update_fields) & set(team_cache.PREVIEW_USER_FIELDS)):
+        return
+    team_cache.invalidate_user_teams(instance.pk)
+
+
+@receiver(post_save, sender=Notification)
+def push_saved_notification(sender, instance, created, **kwargs):
+    """Deliver notifications to connected clients instead of waiting for a poll"""
+    publish_notifications([instance], 'notification.created' if created else 'notification.updated')
+
+
+@receiver(post_delete, sender=Notification)
+def push_deleted_notification(sender, instance, **kwargs):
+    publish_notifications([instance], 'notification.deleted')
+
+
+# Dashboard and project stats. post_init remembers the fields the stats
+# depend on as they were loaded; only a save that changes them reads the
+# stored values, so post_save can apply the difference. A project or team
+# delete cascades to its rows one by one; their hooks only note the users
+# affected, and the parent's post_delete refreshes those users once.
+
+STATS_FIELDS = {
+    Project: ('team_id', 'status'),
+    Task: ('project_id', 'assignee_id', 'status'),
+    TeamMember: ('is_active',),
+}
+
+_deleting = threading.local()
+
+
+def _deleting_set(name):
+    if not hasattr(_deleting, name):
+        setattr(_deleting, name, set())
+    return getattr(_deleting, name)
+
+
+def _loaded_state(instance):
+    values = instance.__dict__
+    fields = STATS_FIELDS[type(instance)]
+    if any(field not in values for field in fields):
+        return None  # Deferred; read from the database if it is saved
+    return tuple(values[field] for field in fields)
+
+
+@receiver(post_init, sender=Project)
+@receiver(post_init, sender=Task)
+@receiver(post_init, sender=TeamMember)
+def remember_loaded_state(sender, instance, **kwargs):
+    instance._stats_loaded = _loaded_state(instance)
+
+
+def _stored_state(instance, update_fields):
+    fields = STATS_FIELDS[type(instance)]
+    if instance._state.adding:
+        return None
+    if update_fields is not None:
+        # update_fields may name a foreign key by field or column name
+        names = {name[:-3] if name.endswith('_id') else name for name in update_fields}
+        if not names & {field[:-3] if field.endswith('_id') else field for field in fields}:
+            return None
+    loaded = getattr(instance, '_stats_loaded', None)
+    if loaded is not None and loaded == _loaded_state(instance):
+        return None  # Unchanged since it was loaded, nothing to apply
+    return type(instance).objects.filter(pk=instance.pk).values_list(*fields).first()
+
+
+@receiver(pre_save, sender=Project)
+@receiver(pre_save, sender=Task)
+@receiver(pre_save, sender=TeamMember)
+def remember_stored_state(sender, instance, update_fields=None, **kwargs):
+    instance._stats_state = _stored_state(instance, update_fields)
+
+
+def _saved_state(instance):
+    """The state as of this save; the next save compares against it"""
+    stored, instance._stats_state = getattr(instance, '_stats_state', None), None
+    instance._stats_loaded = _loaded_state(instance)
+    return stored
+
+
+@receiver(post_save, sender=Project)
+def update_stats_for_project(sender, instance, created, **kwargs):
+    stored = _saved_state(instance)
+    if created:
+        project_stats.project_created(instance.pk)
+        old = None
+    elif stored is None:
+        return
+    else:
+        old = (stored[0], stored[1] == Project.Status.ACTIVE)
+    dashboard_stats.project_changed(old, (instance.team_id, instance.status == Project.Status.ACTIVE))
+
+
+@receiver(pre_delete, sender=Project)
+def remember_deleted_project(sender, instance, **kwargs):
+    _deleting_set('projects').add(instance.pk)
+
+
+@receiver(post_delete, sender=Project)
+def update_stats_for_deleted_project(sender, instance, **kwargs):
+    _deleting_set('projects').discard(instance.pk)
+    if instance.team_id in _deleting_set('teams'):
+        return
+    dashboard_stats.project_changed((instance.team_id, instance.status == Project.Status.ACTIVE), None)
+    _refresh_deleted_users()
+
+
+@receiver(pre_delete, sender=Team)
+def remember_deleted_team(sender, instance, **kwargs):
+    _deleting_set('teams').add(instance.pk)
+
+
+@receiver(post_delete, sender=Team)
+def update_stats_for_deleted_team(sender, instance, **kwargs):
+    _deleting_set('teams').discard(instance.pk)
+    _refresh_deleted_users()
+
+
+def _refresh_deleted_users():
+    user_ids = _deleting_set('users')
+    if user_ids:
+        # Users without a stats row get one computed when they next read it
+        dashboard_stats.refresh_users(
+            UserDashboardStats.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+        )
+        user_ids.clear()
+
+
+@receiver(post_save, sender=Task)
+def update_stats_for_task(sender, instance, created, **kwargs):
+    stored = _saved_state(instance)
+    if not created and stored is None:
+        return
+    project_id, assignee_id, task_status = stored or (None, None, None)
+    project_stats.task_changed(
+        (project_id, task_status) if stored else None,
+        (instance.project_id, instance.status),
+    )
+    dashboard_stats.task_changed(
+        (assignee_id, task_status == Task.Status.DONE) if stored else None,
+        (instance.assignee_id, instance.status == Task.Status.DONE),
+    )
+
+
+@receiver(post_delete, sender=Task)
+def update_stats_for_deleted_task(sender, instance, **kwargs):
+    if instance.project_id in _deleting_set('projects'):
+        if instance.assignee_id and instance.status == Task.Status.DONE:
+            _deleting_set('users').add(instance.assignee_id)
+        return
+    project_stats.task_changed((instance.project_id, instance.status), None)
+    dashboard_stats.task_changed((instance.assignee_id, instance.status == Task.Status.DONE), None)
+
+
+@receiver(post_save, sender=TeamMember)
+def update_stats_for_membership(sender, instance, created, **kwargs):
+    stored = _saved_state(instance)
+    if not created and stored is None:
+        return
+    dashboard_stats.membership_changed(instance.team_id, instance.user_id, stored[0] if stored else False, instance.is_active)
+
+
+@receiver(post_delete, sender=TeamMember)
+def update_stats_for_deleted_membership(sender, instance, **kwargs):
+    if instance.team_id in _deleting_set('teams'):
+        if instance.is_active:
+            _deleting_set('users').add(instance.user_id)
+        return
+    dashboard_stats.membership_changed(instance.team_id, instance.user_id, instance.is_active, False)
+
+
+@receiver(post_save, sender=ProjectMember)
+@receiver(post_save, sender=ProjectAssignee)
+def update_stats_for_project_member(sender, instance, created, **kwargs):
+    if created:
+        changed = project_stats.members_changed if sender is ProjectMember else project_stats.assignees_changed
+        changed(instance.project_id, 1)
+
+
+@receiver(post_delete, sender=ProjectMember)
+@receiver(post_delete, sender=ProjectAssignee)
+def update_stats_for_deleted_project_member(sender, instance, **kwargs):
+    if instance.project_id in _deleting_set('projects'):
+        return
+    changed = project_stats.members_changed if sender is ProjectMember else project_stats.assignees_changed
+    changed(instance.project_id, -1)
@@ -0,0 +1,147 @@
+# users/tasks.py
+import logging
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def _retry_delay(attempts):
+    """Exponential backoff: EMAIL_RETRY_BACKOFF, then doubled per attempt"""
+    return getattr(settings, 'EMAIL_RETRY_BACKOFF', 30) * (2 ** max(attempts - 1, 0))
+
+
+def _claim(outbox_id):
+    """
+    Atomically take a due message. The lease pushes next_attempt_at forward so
+    a crashed worker's message is picked up again by the sweeper later on.
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=getattr(settings, 'EMAIL_SEND_LEASE', 120))
+    claimed = EmailOutbox.objects.filter(
+        Q(status=EmailOutbox.Status.PENDING) | Q(status=EmailOutbox.Status.SENDING),
+        id=outbox_id,
+        next_attempt_at__lte=now
+    ).update(status=EmailOutbox.Status.SENDING, next_attempt_at=lease)
+    if not claimed:
+        return None
+    return EmailOutbox.objects.filter(id=outbox_id).first()
+
+
+@shared_task
+def deliver_email(outbox_id):
+    """Send one outbox message, scheduling a retry with backoff on failure"""
+    from .email_service import email_service
+
+    outbox = _claim(outbox_id)
+    if outbox is None:
+        return False  # Already sent, not yet due, or taken by another worker
+
+    try:
+        message = email_service.build_message(outbox.template, outbox.to_email, outbox.context)
+        sent, error = email_service.send_message(message)
+    except Exception as e:
+        sent, error = False, str(e)
+
+    outbox.attempts += 1
+    if sent:
+        outbox.status = EmailOutbox.Status.SENT
+        outbox.sent_at = timezone.now()
+        outbox.last_error = ''
+        outbox.save(update_fields=['status', 'sent_at', 'attempts', 'last_error'])
+        return True
+
+    outbox.last_error = error or ''
+    if outbox.attempts >= getattr(settings, 'EMAIL_MAX_ATTEMPTS', 5):
+        outbox.status = EmailOutbox.Status.FAILED
+        logger.error(f"Giving up on email {outbox.id} to {outbox.to_email}: {error}")
+    else:
+        delay = _retry_delay(outbox.attempts)
+        outbox.status = EmailOutbox.Status.PENDING
+        outbox.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        logger.warning(f"Email {outbox.id} failed (attempt {outbox.attempts}), retrying in {delay}s: {error}")
+        # Without a broker the periodic sweep picks up retries instead
+        if not getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+            deliver_email.apply_async((str(outbox.id),), countdown=delay)
+    outbox.save(update_fields=['status', 'next_attempt_at', 'attempts', 'last_error'])
+    return False
+
+
+@shared_task
+def deliver_emails(outbox_ids):
+    """Send a batch of outbox messages, e.g. from a bulk invite, in one task"""
+    return sum(1 for outbox_id in outbox_ids if deliver_email(outbox_id))
+
+
+@shared_task
+def dispatch_pending_emails(limit=100):
+    """Periodic sweep for due retries and messages whose delivery was lost"""
+    due = EmailOutbox.objects.filter(
+        status__in=[EmailOutbox.Status.PENDING, EmailOutbox.Status.SENDING],
+        next_attempt_at__lte=timezone.now()
+    ).values_list('id', flat=True)[:limit]
+
+    sent = 0
+    for outbox_id in list(due):
+        if deliver_email(str(outbox_id)):
+            sent += 1
+    return sent
+
+
+@shared_task
+def rebalance_sheet_order(sheet_id):
+    """Respace a sheet's row and column orders once moves have narrowed the gaps"""
+    from .models import ProjectSheet, SheetColumn, SheetRow
+    from . import sheet_cache, sheets
+
+    with transaction.atomic():
+        # Serialize rebalances of the same sheet
+        if not ProjectSheet.objects.select_for_update().filter(id=sheet_id).exists():
+            return 0
+        changed = sheets.rebalance_order(SheetRow.objects.filter(sheet_id=sheet_id), sheets.ROW_ORDERING)
+        changed += sheets.rebalance_order(SheetColumn.objects.filter(sheet_id=sheet_id), sheets.COLUMN_ORDERING)
+        if changed:
+            sheet_cache.bump_data_version(sheet_id)
+    logger.info("Rebalanced order of sheet %s (%d items renumbered)", sheet_id, changed)
+    return changed
+
+
+@shared_task
+def import_project_file(job_id, path, file_format, target, project_id, user_id, name=None, sheet_id=None, storage=None):
+    """Import an uploaded CSV/XLSX file saved at `path`, then delete it"""
+    from django.core.files.storage import default_storage
+    from .models import Project, ProjectSheet, User
+    from . import importers
+
+    try:
+        project = Project.objects.get(id=project_id)
+        user = User.objects.get(id=user_id)
+        sheet = ProjectSheet.objects.get(id=sheet_id, project=project) if sheet_id else None
+        with default_storage.open(path, 'rb') as fileobj:
+            progress = importers.run_import(
+                job_id, fileobj, file_format, target, project, user,
+                size=default_storage.size(path), name=name, sheet=sheet, storage=storage,
+            )
+    except Exception:
+        logger.exception(f"Import {job_id} failed")
+        importers.set_progress(job_id, status='failed', error='The import failed')
+        raise
+    finally:
+        default_storage.delete(path)
+    logger.info(f"Import {job_id} finished: {progress.get('status')}")
+    return progress.get('status')
+
+
+@shared_task
+def reconcile_dashboard_stats():
+    """Recompute materialized dashboard stats, repairing drift from unsignalled writes"""
+    from . import dashboard_stats
+
+    teams, users = dashboard_stats.reconcile()
+    logger.info(f"Reconciled dashboard stats for {teams} teams and {users} users")
+    return teams, users
@@ -0,0 +1,88 @@
+# users/team_cache.py
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Prefetch
+from .models import Team, TeamMember
+from .serializers import TeamListSerializer
+from . import dashboard_stats
+
+# One cached TeamListSerializer payload per team. Entries hold nothing
+# user-specific, so every member's team list shares them. Counts are not
+# cached: they are read from TeamStats (one query for the whole list).
+TEAM_KEY = 'team:list:{}'
+
+# Profile fields shown in the member preview
+PREVIEW_USER_FIELDS = ('first_name', 'last_name', 'avatar')
+
+
+def _get_cache():
+    return caches[getattr(settings, 'TEAM_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'TEAM_CACHE_TIMEOUT', 600)
+
+
+def preview_size():
+    return getattr(settings, 'TEAM_MEMBER_PREVIEW_SIZE', 5)
+
+
+def _load(team_ids):
+    """Serialize teams with their member preview, in two queries"""
+    preview = (
+        TeamMember.objects.filter(is_active=True)
+        .select_related('user')
+        .only('id', 'role', 'team_id', 'user__id', *[f'user__{field}' for field in PREVIEW_USER_FIELDS])
+        .order_by('joined_at', 'id')[:preview_size()]
+    )
+    teams = (
+        Team.objects.filter(id__in=team_ids)
+        .select_related('created_by')
+        .prefetch_related(Prefetch('members', queryset=preview, to_attr='preview_members'))
+    )
+    return {team.id: TeamListSerializer(team).data for team in teams}
+
+
+def team_list(team_ids):
+    """
+    Team list payloads for these teams, in the given order. Cached entries
+    are reused; the rest are loaded together and cached.
+    """
+    team_ids = list(team_ids)
+    cache = _get_cache()
+    cached = cache.get_many([TEAM_KEY.format(team_id) for team_id in team_ids])
+    payloads = {team_id: cached[TEAM_KEY.format(team_id)] for team_id in team_ids if TEAM_KEY.format(team_id) in cached}
+    missing = [team_id for team_id in team_ids if team_id not in payloads]
+    if missing:
+        loaded = _load(missing)
+        cache.set_many({TEAM_KEY.format(team_id): payload for team_id, payload in loaded.items()}, _timeout())
+        payloads.update(loaded)
+
+    stats = dashboard_stats.get_team_stats(team_ids)
+    return [
+        {
+            **payloads[team_id],
+            'member_count': stats[team_id].member_count,
+            'project_count': stats[team_id].project_count,
+        }
+        for team_id in team_ids if team_id in payloads
+    ]
+
+
+def _delete_now_and_on_commit(keys):
+    # Delete immediately so no request reuses the old entry while the write
+    # is in flight, and again after commit in case a concurrent request
+    # cached what it read before the commit.
+    cache = _get_cache()
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate(team_ids):
+    _delete_now_and_on_commit([TEAM_KEY.format(team_id) for team_id in team_ids])
+
+
+def invalidate_user_teams(user_id):
+    """A member's name or avatar changed: drop the teams they appear in"""
+    invalidate(TeamMember.objects.filter(user_id=user_id, is_active=True).values_list('team_id', flat=True))
@@ -0,0 +1,77 @@
+# users/tests/base.py
+from datetime import timedelta
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from users import sheets
+from users.models import Project, ProjectMember, ProjectSheet, SheetColumn, SheetRow, Team, TeamMember, User
+
+
+def make_user(email, **fields):
+    user = User(email=email, username=email.split('@')[0], **fields)
+    user.set_password('password')
+    user.save()
+    return user
+
+
+class TeamTestCase(APITestCase):
+    """A team with an owner and a member sharing one project, plus an outsider"""
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.owner = make_user('owner@example.com', first_name='Olive', last_name='Owner')
+        self.member = make_user('member@example.com', first_name='Max', last_name='Member')
+        self.outsider = make_user('outsider@example.com')
+        self.team = Team.objects.create(name='Team', created_by=self.owner)
+        TeamMember.objects.create(team=self.team, user=self.owner, role=TeamMember.Role.OWNER)
+        TeamMember.objects.create(team=self.team, user=self.member, role=TeamMember.Role.MEMBER)
+        now = timezone.now()
+        self.project = Project.objects.create(
+            team=self.team, name='Project', start_date=now, end_date=now + timedelta(days=7), created_by=self.owner,
+        )
+        ProjectMember.objects.create(project=self.project, user=self.owner, role=ProjectMember.Role.MANAGER)
+        ProjectMember.objects.create(project=self.project, user=self.member)
+        self.team_url = f'/api/auth/teams/{self.team.id}'
+        self.project_url = f'{self.team_url}/projects/{self.project.id}'
+
+    def login(self, user):
+        self.client.force_authenticate(user)
+
+
+class SheetTestCase(TeamTestCase):
+    """TeamTestCase plus an empty sheet in the project"""
+
+    storage = ProjectSheet.Storage.CELLS
+
+    def setUp(self):
+        super().setUp()
+        self.sheet = ProjectSheet.objects.create(
+            project=self.project, name='Sheet', created_by=self.owner, storage=self.storage,
+        )
+        self.sheet_url = f'{self.project_url}/sheets/{self.sheet.id}'
+
+    def add_column(self, key, column_type=SheetColumn.ColumnType.TEXT, **fields):
+        return SheetColumn.objects.create(
+            sheet=self.sheet, name=key.title(), key=key, column_type=column_type,
+            order=sheets.next_order(SheetColumn.objects.filter(sheet=self.sheet)), **fields,
+        )
+
+    def add_rows(self, n):
+        return [sheets.add_row(self.sheet, self.owner) for _ in range(n)]
+
+    def set_cells(self, updates, user=None):
+        """Apply {(row, column key): value}"""
+        return sheets.apply_cell_updates(self.sheet, [
+            {'row_id': str(row.id), 'column_key': key, 'value': value}
+            for (row, key), value in updates.items()
+        ], user or self.owner)
+
+    def values(self):
+        """{(row id, column key): value} as the grid shows them"""
+        grid = sheets.load_grid(self.sheet)
+        return {
+            (row_id, key): values[index]
+            for key, values in grid['values'].items()
+            for index, row_id in enumerate(grid['row_ids'])
+        }
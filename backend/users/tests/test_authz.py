@@ -0,0 +1,37 @@
+import io
+from contextlib import redirect_stdout
+from users.models import Team
+from .base import TeamTestCase
+
+
+class ProjectCreationTests(TeamTestCase):
+    def create_project(self):
+        return self.client.post(f'{self.team_url}/projects/', {
+            'name': 'New project',
+            'start_date': '2026-01-01T00:00:00Z',
+            'end_date': '2026-02-01T00:00:00Z',
+        }, format='json')
+
+    def test_owner_can_create_without_logging_user_details(self):
+        self.login(self.owner)
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            response = self.create_project()
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertNotIn(self.owner.email, stdout.getvalue())
+
+    def test_member_needs_team_setting(self):
+        self.login(self.member)
+        self.assertEqual(self.create_project().status_code, 403)
+        self.team.settings = {'permissions': {'members_can_create_projects': True}}
+        self.team.save()
+        self.assertEqual(self.create_project().status_code, 201)
+
+    def test_outsider_is_rejected(self):
+        self.login(self.outsider)
+        self.assertEqual(self.client.get(f'{self.team_url}/projects/').status_code, 403)
+
+    def test_recent_activity_of_missing_team_is_404(self):
+        self.login(self.owner)
+        missing = Team(name='Missing', created_by=self.owner)
+        self.assertEqual(self.client.get(f'/api/auth/teams/{missing.id}/activity/recent/').status_code, 404)
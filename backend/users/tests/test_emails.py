@@ -0,0 +1,78 @@
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from users.email_service import email_service, enqueue_email
+from users.invitations import bulk_invite
+from users.models import EmailOutbox
+from .base import TeamTestCase
+
+CONTEXT = {
+    'token': 'abc',
+    'inviter_name': 'Olive Owner',
+    'team_name': 'Team',
+    'inviter_email': 'owner@example.com',
+}
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+class NoBrokerDeliveryTests(TestCase):
+    def enqueue(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return enqueue_email('invitation', 'someone@example.com', CONTEXT)
+
+    def test_enqueue_does_not_send_in_the_request(self):
+        with mock.patch.object(email_service, 'send_message') as send:
+            outbox = self.enqueue()
+        send.assert_not_called()
+        outbox.refresh_from_db()
+        self.assertEqual(outbox.status, EmailOutbox.Status.PENDING)
+
+    def test_dispatch_command_sends_pending_emails(self):
+        outbox = self.enqueue()
+        with mock.patch.object(email_service, 'send_message', return_value=(True, None)) as send:
+            call_command('dispatch_emails', stdout=StringIO())
+        send.assert_called_once()
+        outbox.refresh_from_db()
+        self.assertEqual(outbox.status, EmailOutbox.Status.SENT)
+
+    @override_settings(EMAIL_RETRY_BACKOFF=30)
+    def test_failed_send_is_left_for_the_next_sweep(self):
+        outbox = self.enqueue()
+        with mock.patch.object(email_service, 'send_message', return_value=(False, '500 - error')):
+            call_command('dispatch_emails', stdout=StringIO())
+        outbox.refresh_from_db()
+        self.assertEqual(outbox.status, EmailOutbox.Status.PENDING)
+        self.assertEqual(outbox.attempts, 1)
+        self.assertEqual(outbox.last_error, '500 - error')
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=False)
+class BrokerDeliveryTests(TestCase):
+    def test_enqueue_hands_the_email_to_the_worker_after_commit(self):
+        with mock.patch('users.tasks.deliver_email.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                outbox = enqueue_email('invitation', 'someone@example.com', CONTEXT)
+        delay.assert_called_once_with(str(outbox.id))
+
+
+class BulkInviteDeliveryTests(TeamTestCase):
+    entries = [(f'invitee{n}@example.com', None) for n in range(3)]
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=False)
+    def test_bulk_invite_queues_one_batch_task(self):
+        with mock.patch('users.tasks.deliver_emails.delay') as batch, mock.patch('users.tasks.deliver_email.delay') as single:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = bulk_invite(self.team, self.owner, self.entries)
+        self.assertEqual(len(result['invited']), 3)
+        single.assert_not_called()
+        batch.assert_called_once()
+        self.assertEqual(len(batch.call_args[0][0]), 3)
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    def test_bulk_invite_never_sends_in_the_request(self):
+        with mock.patch.object(email_service, 'send_message') as send:
+            with self.captureOnCommitCallbacks(execute=True):
+                bulk_invite(self.team, self.owner, self.entries)
+        send.assert_not_called()
+        self.assertEqual(EmailOutbox.objects.filter(status=EmailOutbox.Status.PENDING).count(), 3)
@@ -0,0 +1,34 @@
+import io
+import unittest
+from unittest import mock
+from users import exporters
+from users.models import Task
+from .base import TeamTestCase
+
+
+class ProjectExportTests(TeamTestCase):
+    def setUp(self):
+        super().setUp()
+        Task.objects.create(project=self.project, title='Write docs', status=Task.Status.TODO, created_by=self.owner)
+        self.url = f'{self.project_url}/export/'
+        self.login(self.owner)
+
+    def test_csv_export(self):
+        response = self.client.get(self.url, {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('Write docs', body)
+
+    @unittest.skipIf(exporters.openpyxl is None, 'openpyxl is not installed')
+    def test_xlsx_export(self):
+        response = self.client.get(self.url, {'format': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+        workbook = exporters.openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIn('Tasks', workbook.sheetnames)
+        titles = [row[1].value for row in workbook['Tasks'].iter_rows(min_row=2)]
+        self.assertIn('Write docs', titles)
+
+    def test_xlsx_export_without_openpyxl(self):
+        with mock.patch.object(exporters, 'openpyxl', None):
+            response = self.client.get(self.url, {'format': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
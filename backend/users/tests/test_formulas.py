@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+from django.test import SimpleTestCase
+from users.formulas import FormulaError, FormulaGraph, compile_formula
+from users.models import Cell, SheetColumn
+from .base import SheetTestCase
+
+NUMBER = SheetColumn.ColumnType.NUMBER
+FORMULA = SheetColumn.ColumnType.FORMULA
+
+
+def evaluate(source, row=None):
+    return compile_formula(source)(row or {})
+
+
+def column(key, formula=None):
+    return SimpleNamespace(key=key, column_type=FORMULA if formula else NUMBER, formula=formula)
+
+
+class PowerTests(SimpleTestCase):
+    def test_integer_power(self):
+        self.assertEqual(evaluate('2^10'), ('1024', 1024))
+
+    def test_right_associative(self):
+        self.assertEqual(evaluate('2^3^2'), ('512', 512))
+
+    def test_negative_base_with_fractional_exponent(self):
+        self.assertEqual(evaluate('(-8)^0.5'), ('#NUM!', None))
+        self.assertEqual(evaluate('x^0.5', {'x': -8}), ('#NUM!', None))
+
+    def test_power_binds_tighter_than_negation(self):
+        value = evaluate('-8^0.5')[1]
+        self.assertAlmostEqual(value, -8 ** 0.5)
+
+    def test_huge_exponent(self):
+        self.assertEqual(evaluate('9^3000000'), ('#NUM!', None))
+
+    def test_nested_powers_do_not_hang(self):
+        self.assertEqual(evaluate('9^9^9'), ('#NUM!', None))
+
+    def test_zero_to_a_negative_power(self):
+        self.assertEqual(evaluate('0^-1'), ('#NUM!', None))
+
+    def test_huge_result_from_columns(self):
+        self.assertEqual(evaluate('base ^ exp', {'base': '10', 'exp': 400}), ('#NUM!', None))
+
+
+class ParseErrorTests(SimpleTestCase):
+    def assertParseError(self, source):
+        with self.assertRaises(FormulaError):
+            compile_formula(source)
+
+    def test_empty(self):
+        self.assertParseError('=')
+
+    def test_unexpected_character(self):
+        self.assertParseError('1 $ 2')
+
+    def test_incomplete_expression(self):
+        self.assertParseError('1 +')
+        self.assertParseError('(1 + 2')
+
+    def test_unknown_function(self):
+        self.assertParseError('NOPE(1)')
+
+    def test_wrong_argument_count(self):
+        self.assertParseError('IF(1)')
+        self.assertParseError('IFERROR(1)')
+
+
+class FormulaGraphTests(SimpleTestCase):
+    def test_order_puts_dependencies_first(self):
+        graph = FormulaGraph([
+            column('total', 'subtotal + tax'),
+            column('tax', 'subtotal * 0.2'),
+            column('subtotal', 'price * quantity'),
+            column('price'),
+            column('quantity'),
+        ])
+        self.assertEqual(graph.order, ['subtotal', 'tax', 'total'])
+        self.assertEqual(graph.downstream({'quantity'}), ['subtotal', 'tax', 'total'])
+        self.assertEqual(graph.downstream({'tax'}), ['total'])
+
+    def test_cycle_is_rejected(self):
+        columns = [column('a', 'b + 1'), column('b', 'a + 1'), column('c', '1')]
+        with self.assertRaisesRegex(FormulaError, 'Circular reference between columns: a, b'):
+            FormulaGraph(columns)
+
+    def test_unknown_reference_is_rejected(self):
+        with self.assertRaisesRegex(FormulaError, 'unknown column missing'):
+            FormulaGraph([column('a', 'missing + 1')])
+
+    def test_broken_formulas_evaluate_to_error_when_not_strict(self):
+        graph = FormulaGraph([
+            column('a', 'b + 1'), column('b', 'a + 1'),
+            column('c', 'missing * 2'), column('d', '1 +'), column('e', '2 * 3'),
+        ], strict=False)
+        for key in 'abcd':
+            self.assertEqual(graph.formulas[key]({}), ('#ERROR!', None), key)
+        self.assertEqual(graph.formulas['e']({}), ('6', 6))
+
+
+class RecalculationTests(SheetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_column('a', NUMBER)
+        self.add_column('b', NUMBER)
+        self.add_column('double', FORMULA, formula='=a * 2')
+        self.add_column('quadruple', FORMULA, formula='=double * 2')
+        self.add_column('next_b', FORMULA, formula='=b + 1')
+        self.row, = self.add_rows(1)
+
+    def test_only_dependent_columns_are_recalculated(self):
+        self.set_cells({(self.row, 'a'): 2, (self.row, 'b'): 5})
+        row_id = self.row.id
+        self.assertEqual(self.values()[(row_id, 'quadruple')], '8')
+        self.assertEqual(self.values()[(row_id, 'next_b')], '6')
+
+        # A stale result in a column that does not read `a` must be left alone
+        Cell.objects.filter(row=self.row, column__key='next_b').update(value='stale', raw_value=None)
+        changed = self.set_cells({(self.row, 'a'): 3})
+        self.assertEqual([cell['column_key'] for cell in changed], ['a', 'double', 'quadruple'])
+        values = self.values()
+        self.assertEqual(values[(row_id, 'double')], '6')
+        self.assertEqual(values[(row_id, 'quadruple')], '12')
+        self.assertEqual(values[(row_id, 'next_b')], 'stale')
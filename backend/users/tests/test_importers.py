@@ -0,0 +1,75 @@
+import io
+import shutil
+import tempfile
+import uuid
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from users import importers
+from users.models import Task, TeamMember
+from .base import TeamTestCase, make_user
+
+
+class TaskImportTests(TeamTestCase):
+    def run_csv(self, text):
+        progress = importers.run_import(
+            uuid.uuid4(), io.BytesIO(text.encode()), 'csv', 'tasks', self.project, self.owner,
+        )
+        self.assertEqual(progress['status'], 'done', progress)
+        return progress['result']
+
+    def test_status_and_priority_accept_labels_names_and_numbers(self):
+        result = self.run_csv(
+            'title,status,priority\n'
+            'A,To Do,High\n'
+            'B,todo,urgent\n'
+            'C,in_progress,LOW\n'
+            'D,IN-REVIEW,2\n'
+            'E,5,medium\n'
+        )
+        self.assertEqual(result['error_count'], 0, result['errors'])
+        tasks = {task.title: task for task in Task.objects.filter(project=self.project)}
+        self.assertEqual(tasks['A'].status, Task.Status.TODO)
+        self.assertEqual(tasks['A'].priority, Task.Priority.HIGH)
+        self.assertEqual(tasks['B'].status, Task.Status.TODO)
+        self.assertEqual(tasks['B'].priority, Task.Priority.URGENT)
+        self.assertEqual(tasks['C'].status, Task.Status.IN_PROGRESS)
+        self.assertEqual(tasks['D'].status, Task.Status.IN_REVIEW)
+        self.assertEqual(tasks['D'].priority, Task.Priority.MEDIUM)
+        self.assertEqual(tasks['E'].status, Task.Status.DONE)
+
+    def test_unknown_status_is_reported(self):
+        result = self.run_csv('title,status\nA,someday\nB,done\n')
+        self.assertEqual(result['error_count'], 1)
+        self.assertEqual(list(Task.objects.filter(project=self.project).values_list('title', flat=True)), ['B'])
+
+    def test_assignee_email_matches_regardless_of_case(self):
+        mixed = make_user('Mixed.Case@Example.com')
+        TeamMember.objects.create(team=self.team, user=mixed, role=TeamMember.Role.MEMBER)
+        result = self.run_csv('title,assignee\nA,mixed.case@example.com\nB,MEMBER@EXAMPLE.COM\n')
+        self.assertEqual(result['error_count'], 0, result['errors'])
+        tasks = {task.title: task for task in Task.objects.filter(project=self.project)}
+        self.assertEqual(tasks['A'].assignee_id, mixed.id)
+        self.assertEqual(tasks['B'].assignee_id, self.member.id)
+
+
+class ImportViewTests(TeamTestCase):
+    def upload(self):
+        self.login(self.owner)
+        return self.client.post(f'{self.project_url}/import/', {
+            'target': 'tasks',
+            'file': SimpleUploadedFile('tasks.csv', b'title\nA\n', content_type='text/csv'),
+        }, format='multipart')
+
+    def test_refused_without_a_broker(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('broker', response.data['error'])
+
+    def test_runs_in_request_when_allowed(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with override_settings(IMPORT_ALLOW_IN_REQUEST=True, MEDIA_ROOT=media_root):
+            response = self.upload()
+        self.assertEqual(response.status_code, 202, response.data)
+        self.assertEqual(response.data['status'], 'done')
+        self.assertTrue(Task.objects.filter(project=self.project, title='A').exists())
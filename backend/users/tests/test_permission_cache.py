@@ -0,0 +1,60 @@
+from django.test import override_settings
+from users import permission_cache
+from users.authz import AuthorizationContext
+from users.models import ProjectAssignee, ProjectPermission, Team, TeamMember
+from .base import TeamTestCase, make_user
+
+Level = ProjectPermission.PermissionLevel
+
+
+@override_settings(PERMISSION_CACHE_ALLOW_LOCAL=True)
+class PermissionCacheInvalidationTests(TeamTestCase):
+    def level(self, user, team=None):
+        return AuthorizationContext(user, (team or self.team).id, self.project.id).permission_level
+
+    def assert_cached(self, user, expected, team=None):
+        self.assertEqual(self.level(user, team), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.level(user, team), expected)
+
+    def test_team_role_change_drops_cached_grant(self):
+        membership = TeamMember.objects.get(team=self.team, user=self.member)
+        membership.role = TeamMember.Role.ADMIN
+        membership.save()
+        self.assert_cached(self.member, Level.ADMIN)
+
+        membership.role = TeamMember.Role.MEMBER
+        membership.save()
+        self.assertEqual(self.level(self.member), Level.VIEW_ONLY)
+
+    def test_assignee_removal_drops_cached_grant(self):
+        assignee = ProjectAssignee.objects.create(
+            project=self.project, user=self.member, role=ProjectAssignee.AssigneeRole.LEAD, assigned_by=self.owner,
+        )
+        self.assert_cached(self.member, Level.ADMIN)
+
+        assignee.delete()
+        self.assertEqual(self.level(self.member), Level.VIEW_ONLY)
+
+    def test_project_moving_teams_drops_cached_grant(self):
+        self.assert_cached(self.owner, Level.ADMIN)
+
+        other_owner = make_user('other@example.com')
+        other_team = Team.objects.create(name='Other', created_by=other_owner)
+        TeamMember.objects.create(team=other_team, user=other_owner, role=TeamMember.Role.OWNER)
+        self.project.team = other_team
+        self.project.save()
+        self.assertIsNone(self.level(self.owner, other_team))
+
+
+class PermissionCacheBackendTests(TeamTestCase):
+    def test_local_memory_cache_is_bypassed(self):
+        context = AuthorizationContext(self.owner, self.team.id, self.project.id)
+        self.assertEqual(context.permission_level, Level.ADMIN)
+        # Every fresh context reads the database again
+        with self.assertNumQueries(1):
+            self.assertEqual(AuthorizationContext(self.owner, self.team.id, self.project.id).permission_level, Level.ADMIN)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379'}})
+    def test_shared_backend_enables_cache(self):
+        self.assertTrue(permission_cache.enabled())
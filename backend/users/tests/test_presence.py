@@ -0,0 +1,97 @@
+import os
+import time
+import unittest
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from users import presence
+from .base import make_user
+
+
+@override_settings(PRESENCE_MIN_WRITE_INTERVAL=60, PRESENCE_FLUSH_INTERVAL=60, PRESENCE_RETENTION=3600)
+class LocalPresenceStoreTests(TestCase):
+    def setUp(self):
+        self.store = presence.LocalPresenceStore()
+
+    def test_throttles_writes_per_user(self):
+        self.store.record('a', 1000)
+        self.assertEqual(self.store.claim_flush(2000, force=True), {'a': 1000})
+        self.store.record('a', 1030)
+        self.assertEqual(self.store.claim_flush(2001, force=True), {})
+        self.assertEqual(self.store.get_many(['a']), {'a': 1030})
+
+    def test_prunes_idle_users_and_writes_their_last_value(self):
+        self.store.record('a', 1000)
+        self.store.claim_flush(1000, force=True)
+        self.store.record('a', 1030)  # throttled, not yet written
+        self.store.record('b', 5000)
+        pending = self.store.claim_flush(5000, force=True)
+        self.assertEqual(pending, {'a': 1030, 'b': 5000})
+        self.assertEqual(self.store.get_many(['a', 'b']), {'b': 5000})
+
+    def test_flush_persists_last_active(self):
+        user = make_user('someone@example.com')
+        with mock.patch.object(presence, '_store', self.store):
+            presence.record_activity(user.id, time.time())
+            self.assertEqual(presence.flush(force=True), 1)
+        user.refresh_from_db()
+        self.assertIsNotNone(user.last_active)
+
+    def test_flush_command_needs_redis(self):
+        with mock.patch.object(presence, '_store', self.store):
+            with self.assertRaises(CommandError):
+                call_command('flush_presence')
+
+
+class ExitFlushTests(TestCase):
+    def test_not_registered_under_the_test_runner(self):
+        with mock.patch.object(presence, '_exit_flush_registered', False), \
+                mock.patch.object(presence.atexit, 'register') as register:
+            presence._register_exit_flush()
+        register.assert_not_called()
+
+    def test_registered_once_outside_the_test_runner(self):
+        with mock.patch.object(presence, '_exit_flush_registered', False), \
+                mock.patch.object(presence, '_under_test_runner', return_value=False), \
+                mock.patch.object(presence.atexit, 'register') as register:
+            presence._register_exit_flush()
+            presence._register_exit_flush()
+        register.assert_called_once_with(presence._flush_at_exit)
+
+    def test_skipped_when_tables_are_missing(self):
+        with mock.patch.object(presence, '_store', presence.LocalPresenceStore()), \
+                mock.patch.object(presence, '_user_table_exists', return_value=False), \
+                mock.patch.object(presence, 'flush') as flush:
+            presence._flush_at_exit()
+        flush.assert_not_called()
+
+
+def _redis_available():
+    url = os.environ.get('REDIS_URL')
+    if not url:
+        return False
+    try:
+        import redis
+        return redis.Redis.from_url(url).ping()
+    except Exception:
+        return False
+
+
+@unittest.skipUnless(_redis_available(), 'needs a Redis server at REDIS_URL')
+@override_settings(PRESENCE_MIN_WRITE_INTERVAL=60, PRESENCE_FLUSH_INTERVAL=60, PRESENCE_RETENTION=3600)
+class RedisPresenceStoreTests(TestCase):
+    def setUp(self):
+        self.store = presence.RedisPresenceStore(os.environ['REDIS_URL'])
+        keys = (self.store.SEEN_KEY, self.store.WRITTEN_KEY, self.store.DIRTY_KEY, self.store.LOCK_KEY)
+        self.store.client.delete(*keys)
+        self.addCleanup(self.store.client.delete, *keys)
+
+    def test_prunes_idle_users(self):
+        self.store.record('a', 1000)
+        self.assertEqual(self.store.claim_flush(1000, force=True), {'a': 1000})
+        self.store.record('a', 1030)
+        self.store.record('b', 5000)
+        self.assertEqual(self.store.claim_flush(5000, force=True), {'a': 1030, 'b': 5000})
+        self.assertEqual(self.store.client.hkeys(self.store.SEEN_KEY), [b'b'])
+        self.assertFalse(self.store.client.hexists(self.store.WRITTEN_KEY, 'a'))
@@ -0,0 +1,56 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from users.models import Project, ProjectMember, Subtask, Task, TaskComment, TeamMember
+from .base import TeamTestCase, make_user
+
+
+class ListQueryCountTests(TeamTestCase):
+    """List endpoints issue the same number of queries however many rows they return"""
+
+    def setUp(self):
+        super().setUp()
+        self.task = Task.objects.create(project=self.project, title='Task', created_by=self.owner)
+        self.login(self.owner)
+
+    def add_rows(self, n):
+        for i in range(n):
+            user = make_user(f'user{self.added + i}@example.com')
+            TeamMember.objects.create(team=self.team, user=user, role=TeamMember.Role.MEMBER)
+            project = Project.objects.create(
+                team=self.team, name=f'Project {self.added + i}', created_by=user,
+                start_date=self.project.start_date, end_date=self.project.end_date,
+            )
+            ProjectMember.objects.create(project=project, user=user, role=ProjectMember.Role.MANAGER)
+            ProjectMember.objects.create(project=self.project, user=user)
+            task = Task.objects.create(project=self.project, title=f'Task {i}', created_by=user, assignee=user)
+            Subtask.objects.create(task=task, title='Subtask', created_by=user)
+            Subtask.objects.create(task=self.task, title=f'Subtask {i}', created_by=user, assignee=user)
+            TaskComment.objects.create(task=self.task, user=user, content='Comment')
+        self.added += n
+
+    def count(self, path):
+        for cache in caches.all():
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_counts_do_not_grow(self):
+        task_url = f'{self.project_url}/tasks/{self.task.id}'
+        paths = (
+            f'{self.team_url}/',
+            f'{self.team_url}/projects/',
+            f'{self.project_url}/',
+            f'{self.project_url}/members/',
+            f'{self.project_url}/tasks/',
+            f'{task_url}/subtasks/',
+            f'{task_url}/comments/',
+        )
+        self.added = 0
+        self.add_rows(2)
+        before = {path: self.count(path) for path in paths}
+        self.add_rows(5)
+        after = {path: self.count(path) for path in paths}
+        self.assertEqual(after, before)
@@ -0,0 +1,42 @@
+from users import sheet_storage
+from users.models import Cell, ProjectSheet, SheetComment
+from .base import SheetTestCase
+
+
+class ConvertStorageTests(SheetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_column('name')
+        self.rows = self.add_rows(2)
+        self.set_cells({(self.rows[0], 'name'): 'Ada', (self.rows[1], 'name'): 'Grace'}, user=self.member)
+        self.login(self.owner)
+
+    def convert(self, storage):
+        return self.client.put(f'{self.sheet_url}/', {'storage': storage}, format='json')
+
+    def test_round_trip_keeps_values(self):
+        before = self.values()
+        self.assertEqual(self.convert(ProjectSheet.Storage.PACKED).status_code, 200)
+        self.sheet.refresh_from_db()
+        self.assertEqual(self.sheet.storage, ProjectSheet.Storage.PACKED)
+        self.assertFalse(Cell.objects.filter(column__sheet=self.sheet).exists())
+        self.assertEqual(self.values(), before)
+        self.assertEqual(self.convert(ProjectSheet.Storage.CELLS).status_code, 200)
+        self.sheet.refresh_from_db()
+        self.assertEqual(self.values(), before)
+
+    def test_cell_comments_block_packing(self):
+        cell = Cell.objects.get(row=self.rows[0])
+        SheetComment.objects.create(sheet=self.sheet, cell=cell, user=self.owner, content='Check this')
+        response = self.convert(ProjectSheet.Storage.PACKED)
+        self.assertEqual(response.status_code, 400)
+        self.sheet.refresh_from_db()
+        self.assertEqual(self.sheet.storage, ProjectSheet.Storage.CELLS)
+        self.assertEqual(SheetComment.objects.filter(sheet=self.sheet).count(), 1)
+        with self.assertRaises(sheet_storage.StorageConversionError):
+            sheet_storage.convert_storage(self.sheet, ProjectSheet.Storage.PACKED)
+
+    def test_sheet_comments_without_a_cell_do_not_block_packing(self):
+        SheetComment.objects.create(sheet=self.sheet, user=self.owner, content='General')
+        self.assertEqual(self.convert(ProjectSheet.Storage.PACKED).status_code, 200)
+        self.assertEqual(SheetComment.objects.filter(sheet=self.sheet).count(), 1)
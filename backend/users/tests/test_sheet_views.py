@@ -0,0 +1,92 @@
+from unittest import mock
+from users import sheet_views
+from users.models import ProjectSheet, SheetColumn, SheetView
+from .base import SheetTestCase, TeamTestCase
+
+
+class SheetViewDefinitionTests(TeamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sheet = ProjectSheet.objects.create(project=self.project, name='Sheet', created_by=self.owner)
+        SheetColumn.objects.create(sheet=self.sheet, name='Name', key='name')
+        self.url = f'{self.project_url}/sheets/{self.sheet.id}/views/'
+        self.login(self.owner)
+
+    def create(self, **definition):
+        return self.client.post(self.url, {'name': 'View', **definition}, format='json')
+
+    def assertRejected(self, **definition):
+        response = self.create(**definition)
+        self.assertEqual(response.status_code, 400, response.data)
+        self.assertFalse(SheetView.objects.exists())
+
+    def test_valid_definition(self):
+        response = self.create(
+            filters={'match': 'any', 'conditions': [{'column': 'name', 'op': 'contains', 'value': 'a'}]},
+            sort_by=[{'column': 'name', 'direction': 'desc'}],
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_unknown_filter_keys(self):
+        self.assertRejected(filters={'bogus': 1})
+
+    def test_conditions_must_be_a_list(self):
+        self.assertRejected(filters={'conditions': {'column': 'name', 'op': 'eq'}})
+
+    def test_condition_must_be_an_object(self):
+        self.assertRejected(filters=['name'])
+
+    def test_condition_requires_column_and_op(self):
+        self.assertRejected(filters=[{'column': 'name', 'value': 'a'}])
+        self.assertRejected(filters=[{'op': 'eq', 'value': 'a'}])
+
+    def test_unknown_condition_keys(self):
+        self.assertRejected(filters=[{'column': 'name', 'op': 'eq', 'values': 'a'}])
+
+    def test_sort_shape(self):
+        self.assertRejected(sort_by='name')
+        self.assertRejected(sort_by=[{'direction': 'asc'}])
+        self.assertRejected(sort_by=[{'column': 'name', 'order': 'asc'}])
+
+    def test_update_is_validated(self):
+        view = SheetView.objects.create(sheet=self.sheet, name='View', created_by=self.owner)
+        response = self.client.put(f'{self.url}{view.id}/', {'filters': {'bogus': 1}}, format='json')
+        self.assertEqual(response.status_code, 400)
+        view.refresh_from_db()
+        self.assertFalse(view.filters)
+
+
+class SheetViewRowsTests(SheetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_column('name')
+        self.rows = self.add_rows(3)
+        self.set_cells({(self.rows[0], 'name'): 'Alpha', (self.rows[1], 'name'): 'BETA', (self.rows[2], 'name'): 'gamma'})
+        self.login(self.owner)
+
+    def view(self, **definition):
+        return SheetView.objects.create(sheet=self.sheet, name='View', created_by=self.owner, **definition)
+
+    def rows_url(self, view):
+        return f'{self.sheet_url}/views/{view.id}/rows/'
+
+    def test_in_filter_ignores_case_in_sql(self):
+        view = self.view(filters=[{'column': 'name', 'op': 'in', 'value': ['alpha', 'Beta']}])
+        result = sheet_views.execute_view(view)
+        self.assertEqual(result['plan']['sql_filters'], [['name', 'in']])
+        self.assertEqual(result['row_ids'], [self.rows[0].id, self.rows[1].id])
+
+        view.filters = [{'column': 'name', 'op': 'not_in', 'value': ['ALPHA', 'beta']}]
+        view.save()
+        self.assertEqual(sheet_views.execute_view(view)['row_ids'], [self.rows[2].id])
+
+    def test_groups_read_row_ids_in_chunks(self):
+        view = self.view(group_by='name')
+        with mock.patch.object(sheet_views, 'ROW_ID_CHUNK', 2):
+            result = sheet_views.execute_view(view)
+        self.assertEqual([group['value'] for group in result['groups']], ['Alpha', 'BETA', 'gamma'])
+
+    def test_invalid_offset_is_rejected(self):
+        view = self.view()
+        self.assertEqual(self.client.get(self.rows_url(view), {'offset': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(self.rows_url(view), {'offset': '1'}).status_code, 200)
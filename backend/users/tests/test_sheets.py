@@ -0,0 +1,109 @@
+from users import sheets
+from users.models import ProjectSheet, SheetColumn
+from users.sheet_storage import get_storage
+from .base import SheetTestCase
+
+Type = SheetColumn.ColumnType
+
+
+class CellUpdateTests(SheetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.name = self.add_column('name')
+        self.add_column('amount', Type.NUMBER)
+        self.add_column('due', Type.DATE)
+        self.add_column('done', Type.CHECKBOX)
+        self.add_column('stage', Type.SELECT, options=['Open', 'Closed'])
+        self.add_column('owner', Type.USER)
+        self.add_column('double', Type.FORMULA, formula='=amount * 2')
+        self.row, self.other = self.add_rows(2)
+
+    def update(self, key, value, row=None, **fields):
+        return {'row_id': str((row or self.row).id), 'column_key': key, 'value': value, **fields}
+
+    def apply(self, *updates, conflicts=None):
+        return sheets.apply_cell_updates(self.sheet, list(updates), self.owner, conflicts=conflicts)
+
+    def test_values_are_coerced_per_column(self):
+        changed = self.apply(
+            self.update('amount', '3.0'),
+            self.update('due', '2026-01-05T10:00:00Z'),
+            self.update('done', 'yes'),
+            self.update('stage', 'Open'),
+            self.update('owner', str(self.member.id)),
+        )
+        cells = {cell['column_key']: (cell['value'], cell['raw_value']) for cell in changed}
+        self.assertEqual(cells['amount'], ('3', 3))
+        self.assertEqual(cells['due'], ('2026-01-05', '2026-01-05'))
+        self.assertEqual(cells['done'], ('true', True))
+        self.assertEqual(cells['stage'], ('Open', None))
+        self.assertEqual(cells['owner'], (str(self.member.id), None))
+
+    def test_invalid_values_are_reported_and_nothing_is_written(self):
+        with self.assertRaises(sheets.CellUpdateError) as caught:
+            self.apply(
+                self.update('name', 'Fine'),
+                self.update('amount', 'lots'),
+                self.update('stage', 'Someday'),
+                self.update('owner', str(self.outsider.id)),
+                self.update('double', 4),
+                self.update('missing', 1),
+            )
+        errors = caught.exception.errors
+        self.assertEqual([error['index'] for error in errors], [1, 2, 3, 4, 5])
+        self.assertEqual(errors[0]['column_key'], 'amount')
+        self.assertEqual(errors[4]['error'], 'Unknown column')
+        self.assertEqual(self.values()[(self.row.id, 'name')], None)
+
+    def test_rewrite_updates_in_place_and_bumps_the_version(self):
+        first, = self.apply(self.update('name', 'Ada'))
+        self.assertEqual(first['version'], 1)
+        second, = self.apply(self.update('name', 'Grace', version=1))
+        self.assertEqual((second['value'], second['version']), ('Grace', 2))
+        # Writing the current value again changes nothing
+        self.assertEqual(self.apply(self.update('name', 'Grace')), [])
+        self.assertEqual(self.values()[(self.row.id, 'name')], 'Grace')
+
+    def test_upsert_keeps_one_stored_cell(self):
+        self.apply(self.update('name', 'Ada'))
+        self.apply(self.update('name', 'Grace'), self.update('name', 'Ada', row=self.other))
+        stored = list(get_storage(self.sheet).read(self.sheet, column_ids=[self.name.id], row_ids=[self.row.id]))
+        self.assertEqual([(value, version) for _, _, _, value, _, version in stored], [('Grace', 2)])
+
+    def test_later_update_to_the_same_cell_wins(self):
+        self.apply(self.update('name', 'Ada'), self.update('name', 'Grace'))
+        self.assertEqual(self.values()[(self.row.id, 'name')], 'Grace')
+
+    def test_stale_version_raises_conflict(self):
+        self.apply(self.update('name', 'Ada'))
+        with self.assertRaises(sheets.CellConflictError) as caught:
+            self.apply(self.update('amount', 1), self.update('name', 'Grace', version=0))
+        conflict, = caught.exception.errors
+        self.assertEqual(conflict['index'], 1)
+        self.assertEqual((conflict['value'], conflict['version']), ('Ada', 1))
+        values = self.values()
+        self.assertEqual(values[(self.row.id, 'name')], 'Ada')
+        self.assertIsNone(values[(self.row.id, 'amount')])
+
+    def test_conflicts_list_skips_stale_updates_only(self):
+        self.apply(self.update('name', 'Ada'))
+        conflicts = []
+        changed = self.apply(
+            self.update('name', 'Grace', version=0),
+            self.update('name', 'Other row', row=self.other, version=0),
+            conflicts=conflicts,
+        )
+        self.assertEqual([cell['value'] for cell in changed], ['Other row'])
+        self.assertEqual([(c['index'], c['value'], c['version']) for c in conflicts], [(0, 'Ada', 1)])
+        self.assertEqual(self.values()[(self.row.id, 'name')], 'Ada')
+
+    def test_formula_cells_are_recalculated(self):
+        changed = self.apply(self.update('amount', 4), self.update('amount', 5, row=self.other))
+        computed = {(cell['row'], cell['column_key']): cell['value'] for cell in changed}
+        self.assertEqual(computed[(str(self.row.id), 'double')], '8')
+        self.assertEqual(computed[(str(self.other.id), 'double')], '10')
+        self.assertEqual(self.values()[(self.other.id, 'double')], '10')
+
+
+class PackedStorageUpdateTests(CellUpdateTests):
+    storage = ProjectSheet.Storage.PACKED
@@ -0,0 +1,125 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from users import dashboard_stats
+from users.models import Project, ProjectMember, ProjectStats, Task, Team, TeamMember, UserDashboardStats
+from .base import TeamTestCase, make_user
+
+
+class DashboardStatsCascadeTests(TeamTestCase):
+    def add_done_tasks(self, project, n):
+        for i in range(n):
+            Task.objects.create(
+                project=project, title=f'Task {i}', created_by=self.owner,
+                assignee=self.member, status=Task.Status.DONE,
+            )
+
+    def new_project(self, name):
+        return Project.objects.create(
+            team=self.team, name=name, created_by=self.owner,
+            start_date=self.project.start_date, end_date=self.project.end_date,
+        )
+
+    def user_stats(self, user):
+        return UserDashboardStats.objects.get(user=user)
+
+    def stats_queries(self, queries):
+        return [query for query in queries if 'userdashboardstats' in query['sql'].lower()]
+
+    def test_deleting_a_project_refreshes_its_users_once(self):
+        other = self.new_project('Other')
+        self.add_done_tasks(self.project, 2)
+        self.add_done_tasks(other, 6)
+        dashboard_stats.get_user_stats(self.member)
+        dashboard_stats.get_user_stats(self.owner)
+        self.assertEqual(self.user_stats(self.member).completed_task_count, 8)
+
+        counts = []
+        for project in (self.project, other):
+            with CaptureQueriesContext(connection) as queries:
+                project.delete()
+            counts.append(len(self.stats_queries(queries)))
+        self.assertEqual(counts[0], counts[1])
+
+        member = self.user_stats(self.member)
+        self.assertEqual(member.completed_task_count, 0)
+        self.assertEqual(member.project_count, 0)
+        self.assertEqual(self.user_stats(self.owner).project_count, 0)
+
+    def test_deleting_a_team_refreshes_its_members(self):
+        self.add_done_tasks(self.project, 3)
+        for user in (self.owner, self.member):
+            stats = dashboard_stats.get_user_stats(user)
+            self.assertEqual(stats.team_count, 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            Team.objects.get(pk=self.team.pk).delete()
+        # One refresh for both members rather than one update per membership
+        self.assertLessEqual(len(self.stats_queries(queries)), 4)
+
+        for user in (self.owner, self.member):
+            stats = self.user_stats(user)
+            self.assertFalse(stats.is_stale)
+            self.assertEqual(stats.team_count, 0)
+            self.assertEqual(stats.project_count, 0)
+            self.assertEqual(stats.member_count, 0)
+        self.assertEqual(self.user_stats(self.member).completed_task_count, 0)
+
+    def test_deleting_one_task_applies_a_delta(self):
+        self.add_done_tasks(self.project, 2)
+        dashboard_stats.get_user_stats(self.member)
+        Task.objects.filter(project=self.project).first().delete()
+        self.assertEqual(self.user_stats(self.member).completed_task_count, 1)
+
+
+class ProjectStatsWriteTests(TeamTestCase):
+    def stats(self):
+        return ProjectStats.objects.get(project=self.project)
+
+    def test_save_without_tracked_changes_reads_nothing(self):
+        task = Task.objects.create(project=self.project, title='Task', created_by=self.owner)
+        task = Task.objects.get(pk=task.pk)
+        task.title = 'Renamed'
+        with self.assertNumQueries(1):  # the UPDATE only
+            task.save()
+        member = TeamMember.objects.get(team=self.team, user=self.member)
+        member.role = TeamMember.Role.ADMIN
+        with self.assertNumQueries(1):
+            member.save()
+
+    def test_status_change_moves_the_counters(self):
+        task = Task.objects.create(project=self.project, title='Task', created_by=self.owner, status=Task.Status.TODO)
+        task = Task.objects.get(pk=task.pk)
+        task.status = Task.Status.DONE
+        task.save()
+        stats = self.stats()
+        self.assertEqual((stats.task_count, stats.todo_task_count, stats.done_task_count), (1, 0, 1))
+        # Saving again compares against what was just saved
+        task.status = Task.Status.IN_PROGRESS
+        task.save()
+        stats = self.stats()
+        self.assertEqual((stats.task_count, stats.done_task_count, stats.in_progress_task_count), (1, 0, 1))
+
+    def test_update_fields_by_column_name(self):
+        task = Task.objects.create(project=self.project, title='Task', created_by=self.owner, status=Task.Status.TODO)
+        task.status = Task.Status.DONE
+        task.save(update_fields=['status'])
+        self.assertEqual(self.stats().done_task_count, 1)
+
+    def test_deleting_a_project_does_not_update_per_row(self):
+        counts = []
+        for n in (2, 6):
+            project = Project.objects.create(
+                team=self.team, name=f'Project {n}', created_by=self.owner,
+                start_date=self.project.start_date, end_date=self.project.end_date,
+            )
+            for i in range(n):
+                Task.objects.create(project=project, title=f'Task {i}', created_by=self.owner)
+                ProjectMember.objects.create(project=project, user=make_user(f'p{n}-{i}@example.com'))
+            with CaptureQueriesContext(connection) as queries:
+                project.delete()
+            counts.append(len([query for query in queries if query['sql'].startswith('UPDATE')]))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_deleting_one_member_still_applies(self):
+        ProjectMember.objects.get(project=self.project, user=self.member).delete()
+        self.assertEqual(self.stats().member_count, 1)
@@ -0,0 +1,75 @@
+from datetime import timedelta
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from users import sheets
+from users.consumers import SheetConsumer
+from users.models import Project, ProjectSheet, SheetColumn, Team, TeamMember
+from .base import make_user
+
+TEST_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+@override_settings(CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class WebSocketOriginTests(TransactionTestCase):
+    def setUp(self):
+        self.token = Token.objects.create(user=make_user('socket@example.com'))
+
+    def connect(self, origin):
+        from shout_sync.asgi import application
+
+        async def run():
+            communicator = WebsocketCommunicator(
+                application, f'/ws/notifications/?token={self.token.key}', headers=[(b'origin', origin)],
+            )
+            connected, _ = await communicator.connect()
+            await communicator.disconnect()
+            return connected
+
+        return async_to_sync(run)()
+
+    def test_frontend_origin_is_accepted(self):
+        # Not in ALLOWED_HOSTS, only in CORS_ALLOWED_ORIGINS
+        self.assertTrue(self.connect(b'https://shout-sync.vercel.app'))
+
+    def test_other_origin_is_rejected(self):
+        self.assertFalse(self.connect(b'https://evil.example.com'))
+
+
+@override_settings(CHANNEL_LAYERS=TEST_CHANNEL_LAYERS)
+class SheetConsumerBatchTests(TransactionTestCase):
+    def setUp(self):
+        self.owner = make_user('owner@example.com')
+        team = Team.objects.create(name='Team', created_by=self.owner)
+        TeamMember.objects.create(team=team, user=self.owner, role=TeamMember.Role.OWNER)
+        now = timezone.now()
+        project = Project.objects.create(
+            team=team, name='Project', start_date=now, end_date=now + timedelta(days=7), created_by=self.owner,
+        )
+        self.sheet = ProjectSheet.objects.create(project=project, name='Sheet', created_by=self.owner)
+        SheetColumn.objects.create(sheet=self.sheet, name='Name', key='name', order=0)
+        SheetColumn.objects.create(sheet=self.sheet, name='Amount', key='amount', order=1, column_type=SheetColumn.ColumnType.NUMBER)
+        self.rows = [sheets.add_row(self.sheet, self.owner) for _ in range(2)]
+
+    def apply(self, edits):
+        consumer = SheetConsumer()
+        consumer.scope = {'user': self.owner}
+        consumer.sheet_id = str(self.sheet.id)
+        consumer.channel_name = 'test'
+        return async_to_sync(consumer._apply)([
+            ((str(row.id), key), {'value': value, 'version': None, 'op_ids': [op_id]})
+            for op_id, row, key, value in edits
+        ])
+
+    def test_errors_from_the_retried_batch_point_at_the_original_edits(self):
+        # A column reports one invalid value per attempt, so the second bad
+        # amount is only found when the remaining edits are retried
+        _, _, errors = self.apply([
+            ('a', self.rows[0], 'name', 'Ada'),
+            ('b', self.rows[0], 'amount', 'lots'),
+            ('c', self.rows[1], 'amount', 'many'),
+        ])
+        self.assertEqual([error['index'] for error in errors['errors']], [1, 2])
+        self.assertEqual(errors['op_ids'], ['b', 'c'])
@@ -32,6 +32,7 @@ urlpatterns = [
     
     # Notifications
     path('notifications/', views.notifications_view, name='notifications'),
+    path('notifications/unread-count/', views.unread_notification_count_view, name='unread-notification-count'),
     path('notifications/<uuid:notification_id>/read/', views.mark_notification_read_view, name='mark-notification-read'),
     path('notifications/read-all/', views.mark_all_notifications_read_view, name='mark-all-notifications-read'),
     path('notifications/<uuid:notification_id>/', views.delete_notification_view, name='delete-notification'),
@@ -54,6 +55,24 @@ urlpatterns = [
     # Task Comments
     path('teams/<uuid:team_id>/projects/<uuid:project_id>/tasks/<uuid:task_id>/comments/', views.task_comments_view, name='task-comments'),
 
+    # Sheet URLs
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/sheets/', views.sheets_view, name='sheets'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/sheets/<uuid:sheet_id>/', views.sheet_detail_view, name='sheet-detail'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/sheets/<uuid:sheet_id>/columns/', views.sheet_columns_view, name='sheet-columns'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/sheets/<uuid:sheet_id>/rows/', views.sheet_rows_view, name='sheet-rows'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/sheets/<uuid:sheet_id>/columns/<uuid:column_id>/move/', views.sheet_column_move_view, name='sheet-column-move'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/sheets/<uuid:sheet_id>/rows/<uuid:row_id>/move/', views.sheet_row_move_view, name='sheet-row-move'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/sheets/<uuid:sheet_id>/cells/<uuid:cell_id>/', views.sheet_cell_detail_view, name='sheet-cell-detail'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/sheets/<uuid:sheet_id>/bulk-update/', views.sheet_bulk_update_view, name='sheet-bulk-update'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/sheets/<uuid:sheet_id>/aggregates/', views.sheet_aggregates_view, name='sheet-aggregates'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/sheets/<uuid:sheet_id>/views/', views.sheet_views_view, name='sheet-views'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/sheets/<uuid:sheet_id>/views/<uuid:view_id>/', views.sheet_view_detail_view, name='sheet-view-detail'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/sheets/<uuid:sheet_id>/views/<uuid:view_id>/rows/', views.sheet_view_rows_view, name='sheet-view-rows'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/sheets/<uuid:sheet_id>/comments/', views.sheet_comments_view, name='sheet-comments'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/export/', views.project_export_view, name='project-export'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/import/', views.project_import_view, name='project-import'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/import/<uuid:job_id>/', views.project_import_progress_view, name='project-import-progress'),
+
     path('teams/<uuid:team_id>/join-request/', views.request_to_join_team_view, name='request-to-join-team'),
     path('teams/<uuid:team_id>/join-requests/', views.team_join_requests_view, name='team-join-requests'),
     path('teams/<uuid:team_id>/join-requests/<uuid:request_id>/approve/', views.approve_join_request_view, name='approve-join-request'),
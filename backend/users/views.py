@@ -1,16 +1,27 @@
 from django.utils import timezone 
 from rest_framework import status, permissions
-from rest_framework.decorators import api_view, permission_classes
-from .email_service import email_service
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.renderers import JSONRenderer
+from .email_service import enqueue_invitation_email
 from rest_framework.response import Response
 from django.contrib.auth import login, logout
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from rest_framework.authtoken.models import Token
 from django.shortcuts import get_object_or_404
+from django.http import FileResponse, StreamingHttpResponse
+from django.core.files.storage import default_storage
+import base64
+import csv
 import uuid
 from datetime import datetime, timedelta
-from .models import User, Team, TeamMember, TeamInvitation, Project, ProjectMember, Task, Subtask, TaskComment, TaskAttachment, TeamJoinRequest
+from .models import User, Team, TeamMember, TeamInvitation, Project, ProjectMember, Task, Subtask, TaskComment, TaskAttachment, TeamJoinRequest, ProjectSheet, SheetColumn, SheetRow, Cell, SheetComment, SheetView
 from .serializers import *
 from .notifications import *
+from .authz import AuthorizationContext, get_authz_context
+from .invitations import bulk_invite, parse_invitation_csv
+from .formulas import FormulaError
+from . import dashboard_stats, exporters, importers, presence, project_stats, sheets, sheet_aggregates, sheet_cache, sheet_events, sheet_storage, sheet_views, team_cache
 from django.db.models import Count, OuterRef, Exists, Subquery, Prefetch, Q
 from rest_framework.pagination import PageNumberPagination
 
@@ -25,7 +36,7 @@ def team_members_optimized_view(request, team_id):
     team = get_object_or_404(Team, id=team_id)
     
     # Check if user is member of this team
-    if not TeamMember.objects.filter(team=team, user=request.user, is_active=True).exists():
+    if not get_authz_context(request, team_id).is_team_member:
         return Response({'error': 'Not a member of this team'}, status=status.HTTP_403_FORBIDDEN)
     
     page = int(request.GET.get('page', 1))
@@ -46,7 +57,8 @@ def team_members_optimized_view(request, team_id):
     start_idx = (page - 1) * page_size
     end_idx = start_idx + page_size
     
-    paginated_members = members[start_idx:end_idx]
+    paginated_members = list(members[start_idx:end_idx])
+    presence.apply_recent_activity([member.user for member in paginated_members])
     
     data = [{
         'id': str(member.id),
@@ -156,9 +168,19 @@ def profile_view(request):
 @api_view(['GET', 'POST'])
 def teams_view(request):
     if request.method == 'GET':
-        teams = Team.objects.filter(members__user=request.user, members__is_active=True)
-        serializer = TeamSerializer(teams, many=True)
-        return Response(serializer.data)
+        # Lean, cached entries (counts and a member preview, not every member)
+        team_ids = Team.objects.filter(
+            members__user=request.user, members__is_active=True
+        ).order_by('created_at', 'id').values_list('id', flat=True)
+        
+        # Paginate only if the frontend asks for a 'page', like the project list
+        if request.query_params.get('page'):
+            paginator = PageNumberPagination()
+            paginator.page_size = 50
+            page_ids = paginator.paginate_queryset(team_ids, request)
+            return paginator.get_paginated_response(team_cache.team_list(page_ids))
+        
+        return Response(team_cache.team_list(team_ids))
     
     elif request.method == 'POST':
         print("Received data:", request.data)  # Debug print
@@ -311,70 +333,6 @@ def reject_invitation_view(request, token):
     return Response({'message': 'Invitation rejected'})
 
 
-@api_view(['POST'])
-def invite_member_view(request, team_id):
-    team = get_object_or_404(Team, id=team_id)
-    
-    # Check if user has permission to invite (Owner or Admin)
-    member = TeamMember.objects.get(team=team, user=request.user)
-    if member.role not in [TeamMember.Role.OWNER, TeamMember.Role.ADMIN]:
-        return Response({'error': 'Insufficient permissions to invite members'}, status=status.HTTP_403_FORBIDDEN)
-    
-    serializer = InvitationCreateSerializer(data=request.data)
-    if serializer.is_valid():
-        email = serializer.validated_data['email']
-        role = serializer.validated_data['role']
-        
-        # Check if user already exists and is already a member
-        existing_user = User.objects.filter(email=email).first()
-        if existing_user and TeamMember.objects.filter(team=team, user=existing_user).exists():
-            return Response({'error': 'User is already a member of this team'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Check for existing pending invitation
-        existing_invitation = TeamInvitation.objects.filter(
-            email=email,
-            team=team,
-            status=TeamInvitation.Status.PENDING,
-            expires_at__gt=timezone.now()
-        ).first()
-        
-        if existing_invitation:
-            return Response({'error': 'An active invitation already exists for this email'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Create invitation
-        invitation = TeamInvitation.objects.create(
-            email=email,
-            team=team,
-            invited_by=request.user,
-            token=str(uuid.uuid4()),
-            role=role,
-            expires_at=timezone.now() + timedelta(days=7)
-        )
-        
-        # Send email invitation
-        inviter_name = f"{request.user.first_name} {request.user.last_name}"
-        email_sent = email_service.send_invitation_email(invitation, inviter_name, team.name)
-        
-        # Create notification for the invited user if they exist in the system
-        if existing_user:
-            Notification.objects.create(
-                user=existing_user,
-                type=Notification.Type.INVITATION,
-                title="Team Invitation",
-                message=f"{inviter_name} invited you to join {team.name}",
-                related_id=invitation.id,
-                action_url=f"/invitation/accept/{invitation.token}"
-            )
-        
-        return Response({
-            'message': f'Invitation sent to {email}',
-            'invitation_id': invitation.id,
-            'email_sent': email_sent,
-            'user_exists': existing_user is not None
-        }, status=status.HTTP_201_CREATED)
-    
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def invitation_details_view(request, token):
@@ -614,7 +572,7 @@ def team_members_view(request, team_id):
     team = get_object_or_404(Team, id=team_id)
     
     # Check if user is member of this team
-    if not TeamMember.objects.filter(team=team, user=request.user, is_active=True).exists():
+    if not get_authz_context(request, team_id).is_team_member:
         return Response({'error': 'Not a member of this team'}, status=status.HTTP_403_FORBIDDEN)
     
     # Use select_related to optimize database queries
@@ -629,11 +587,10 @@ def team_members_view(request, team_id):
 @api_view(['POST'])
 def create_project_optimized(request, team_id):
     """Optimized project creation endpoint"""
-    team = get_object_or_404(Team, id=team_id)
+    get_object_or_404(Team, id=team_id)
     
     # Check if user is member of this team
-    team_member = TeamMember.objects.filter(team=team, user=request.user, is_active=True).first()
-    if not team_member:
+    if not get_authz_context(request, team_id).is_team_member:
         return Response({'error': 'Not a member of this team'}, status=status.HTTP_403_FORBIDDEN)
     
     serializer = ProjectCreateSerializer(data=request.data, context={'request': request})
@@ -656,7 +613,7 @@ def search_team_members_view(request, team_id):
     team = get_object_or_404(Team, id=team_id)
     
     # Check if user is member of this team
-    if not TeamMember.objects.filter(team=team, user=request.user, is_active=True).exists():
+    if not get_authz_context(request, team_id).is_team_member:
         return Response({'error': 'Not a member of this team'}, status=status.HTTP_403_FORBIDDEN)
     
     search_query = request.GET.get('q', '')
@@ -694,11 +651,8 @@ def search_team_members_view(request, team_id):
     start_idx = (page - 1) * page_size
     end_idx = start_idx + page_size
     
-    members = members_query[start_idx:end_idx]
-    
-    # FIXED: Debug logging
-    for member in members:
-        print(f"DEBUG Member: {member.user.email} - last_active: {member.user.last_active}")
+    members = list(members_query[start_idx:end_idx])
+    presence.apply_recent_activity([member.user for member in members])
     
     data = [{
         'id': str(member.id),
@@ -729,8 +683,7 @@ def remove_member_view(request, team_id, member_id):
     team = get_object_or_404(Team, id=team_id)
     
     # Check if user has permission (Owner or Admin)
-    requester_member = TeamMember.objects.get(team=team, user=request.user)
-    if requester_member.role not in [TeamMember.Role.OWNER, TeamMember.Role.ADMIN]:
+    if not get_authz_context(request, team_id).is_team_admin:
         return Response({'error': 'Insufficient permissions'}, status=status.HTTP_403_FORBIDDEN)
     
     # Get the member to remove
@@ -748,17 +701,19 @@ def team_detail_view(request, team_id):
     team = get_object_or_404(Team, id=team_id)
     
     # Check if user is member of this team
-    if not TeamMember.objects.filter(team=team, user=request.user, is_active=True).exists():
+    if not get_authz_context(request, team_id).is_team_member:
         return Response({'error': 'Not a member of this team'}, status=status.HTTP_403_FORBIDDEN)
     
     if request.method == 'GET':
+        team = Team.objects.select_related('created_by').prefetch_related(
+            Prefetch('members', queryset=TeamMember.objects.select_related('user'))
+        ).get(pk=team.pk)
         serializer = TeamSerializer(team)
         return Response(serializer.data)
     
     elif request.method == 'PUT':
         # Check if user has permission to edit (Owner or Admin)
-        member = TeamMember.objects.get(team=team, user=request.user)
-        if member.role not in [TeamMember.Role.OWNER, TeamMember.Role.ADMIN]:
+        if not get_authz_context(request, team_id).is_team_admin:
             return Response({'error': 'Insufficient permissions'}, status=status.HTTP_403_FORBIDDEN)
         
         serializer = TeamSerializer(team, data=request.data, partial=True)
@@ -769,8 +724,7 @@ def team_detail_view(request, team_id):
     
     elif request.method == 'DELETE':
         # Only owner can delete team
-        member = TeamMember.objects.get(team=team, user=request.user)
-        if member.role != TeamMember.Role.OWNER:
+        if not get_authz_context(request, team_id).is_team_owner:
             return Response({'error': 'Only owner can delete team'}, status=status.HTTP_403_FORBIDDEN)
         
         team.delete()
@@ -782,8 +736,8 @@ def update_member_role_view(request, team_id, member_id):
     team = get_object_or_404(Team, id=team_id)
     
     # Check if user has permission (Owner or Admin)
-    requester_member = TeamMember.objects.get(team=team, user=request.user)
-    if requester_member.role not in [TeamMember.Role.OWNER, TeamMember.Role.ADMIN]:
+    authz = get_authz_context(request, team_id)
+    if not authz.is_team_admin:
         return Response({'error': 'Insufficient permissions'}, status=status.HTTP_403_FORBIDDEN)
     
     # Get the member to update
@@ -810,11 +764,11 @@ def update_member_role_view(request, team_id, member_id):
     
     # Additional permission checks
     # Admins cannot assign Owner role
-    if requester_member.role == TeamMember.Role.ADMIN and new_role == TeamMember.Role.OWNER:
+    if authz.team_role == TeamMember.Role.ADMIN and new_role == TeamMember.Role.OWNER:
         return Response({'error': 'Admins cannot assign Owner role'}, status=status.HTTP_403_FORBIDDEN)
     
     # Admins cannot change other admins' roles
-    if (requester_member.role == TeamMember.Role.ADMIN and 
+    if (authz.team_role == TeamMember.Role.ADMIN and 
         member_to_update.role == TeamMember.Role.ADMIN):
         return Response({'error': 'Admins cannot change other admins roles'}, status=status.HTTP_403_FORBIDDEN)
     
@@ -834,8 +788,7 @@ def delete_team_view(request, team_id):
     team = get_object_or_404(Team, id=team_id)
     
     # Check if user is the owner
-    member = TeamMember.objects.get(team=team, user=request.user)
-    if member.role != TeamMember.Role.OWNER:
+    if not get_authz_context(request, team_id).is_team_owner:
         return Response({'error': 'Only owner can delete team'}, status=status.HTTP_403_FORBIDDEN)
     
     # Verify confirmation
@@ -852,9 +805,9 @@ def transfer_ownership_view(request, team_id, member_id):
     team = get_object_or_404(Team, id=team_id)
     
     # Check if user is the current owner
-    requester_member = TeamMember.objects.get(team=team, user=request.user)
-    if requester_member.role != TeamMember.Role.OWNER:
+    if not get_authz_context(request, team_id).is_team_owner:
         return Response({'error': 'Only owner can transfer ownership'}, status=status.HTTP_403_FORBIDDEN)
+    requester_member = TeamMember.objects.get(team=team, user=request.user)
     
     # Get the new owner
     new_owner_member = get_object_or_404(TeamMember, id=member_id, team=team)
@@ -874,12 +827,89 @@ def transfer_ownership_view(request, team_id, member_id):
 
 
 
+NOTIFICATION_PAGE_SIZE = 50
+MAX_NOTIFICATION_PAGE_SIZE = 200
+
+def encode_notification_cursor(notification):
+    """Opaque keyset cursor for a notification's (created_at, id) position"""
+    raw = f"{notification.created_at.isoformat()}|{notification.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_notification_cursor(cursor):
+    """Return (created_at, id) for a cursor, raising ValueError if it is malformed"""
+    try:
+        created_at, notification_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), uuid.UUID(notification_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
 @api_view(['GET'])
 def notifications_view(request):
-    """Get user's notifications"""
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-    serializer = NotificationSerializer(notifications, many=True)
-    return Response(serializer.data)
+    """
+    Get user's notifications.
+    With ?limit, ?cursor or ?since the feed is keyset-paginated:
+    - cursor: page through older notifications (newest first)
+    - since: only notifications newer than the given cursor (oldest first)
+    Without them the full list is returned, as before.
+    """
+    notifications = Notification.objects.filter(user=request.user)
+    
+    cursor = request.query_params.get('cursor')
+    since = request.query_params.get('since')
+    limit = request.query_params.get('limit')
+    
+    if not (cursor or since or limit):
+        serializer = NotificationSerializer(notifications.order_by('-created_at'), many=True)
+        return Response(serializer.data)
+    
+    try:
+        limit = min(int(limit or NOTIFICATION_PAGE_SIZE), MAX_NOTIFICATION_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return Response({'error': 'Invalid limit'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        if since:
+            created_at, notification_id = decode_notification_cursor(since)
+            notifications = notifications.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=notification_id)
+            ).order_by('created_at', 'id')
+        else:
+            if cursor:
+                created_at, notification_id = decode_notification_cursor(cursor)
+                notifications = notifications.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=notification_id)
+                )
+            notifications = notifications.order_by('-created_at', '-id')
+    except ValueError:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Fetch one extra row to know whether another page exists
+    page = list(notifications[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    
+    if since:
+        latest_cursor = encode_notification_cursor(page[-1]) if page else since
+        next_cursor = None
+    else:
+        latest_cursor = encode_notification_cursor(page[0]) if page else None
+        next_cursor = encode_notification_cursor(page[-1]) if page and has_more else None
+    
+    return Response({
+        'results': NotificationSerializer(page, many=True).data,
+        'has_more': has_more,
+        'next_cursor': next_cursor,
+        'latest_cursor': latest_cursor,
+        'unread_count': Notification.objects.filter(user=request.user, status=Notification.Status.UNREAD).count()
+    })
+
+@api_view(['GET'])
+def unread_notification_count_view(request):
+    """Get the number of unread notifications"""
+    count = Notification.objects.filter(user=request.user, status=Notification.Status.UNREAD).count()
+    return Response({'unread_count': count})
 
 @api_view(['POST'])
 def mark_notification_read_view(request, notification_id):
@@ -904,16 +934,18 @@ def delete_notification_view(request, notification_id):
     notification.delete()
     return Response({'message': 'Notification deleted'})
 
-# In views.py - Update the invite_member_view function
 @api_view(['POST'])
 def invite_member_view(request, team_id):
     team = get_object_or_404(Team, id=team_id)
     
     # Check if user has permission to invite (Owner or Admin)
-    member = TeamMember.objects.get(team=team, user=request.user)
-    if member.role not in [TeamMember.Role.OWNER, TeamMember.Role.ADMIN]:
+    if not get_authz_context(request, team_id).is_team_admin:
         return Response({'error': 'Insufficient permissions to invite members'}, status=status.HTTP_403_FORBIDDEN)
     
+    # Many emails (or a CSV upload) go through the batched path
+    if 'emails' in request.data or 'file' in request.FILES:
+        return bulk_invite_members(request, team)
+    
     serializer = InvitationCreateSerializer(data=request.data)
     if serializer.is_valid():
         email = serializer.validated_data['email']
@@ -935,49 +967,79 @@ def invite_member_view(request, team_id):
         if existing_invitation:
             return Response({'error': 'An active invitation already exists for this email'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create invitation
-        invitation = TeamInvitation.objects.create(
-            email=email,
-            team=team,
-            invited_by=request.user,
-            token=str(uuid.uuid4()),
-            role=role,
-            expires_at=timezone.now() + timedelta(days=7)
-        )
-        
-        # Send email invitation
         inviter_name = f"{request.user.first_name} {request.user.last_name}"
-        email_sent = email_service.send_invitation_email(invitation, inviter_name, team.name)
         
-        # Create notification for the invited user if they exist in the system
-        if existing_user:
+        # The invitation, notifications and outbox entry commit together; the
+        # email itself is delivered by a worker once the transaction commits.
+        with transaction.atomic():
+            invitation = TeamInvitation.objects.create(
+                email=email,
+                team=team,
+                invited_by=request.user,
+                token=str(uuid.uuid4()),
+                role=role,
+                expires_at=timezone.now() + timedelta(days=7)
+            )
+            
+            # Queue email invitation
+            enqueue_invitation_email(invitation, inviter_name, team.name)
+            
+            # Create notification for the invited user if they exist in the system
+            if existing_user:
+                Notification.objects.create(
+                    user=existing_user,
+                    type=Notification.Type.INVITATION,
+                    title="Team Invitation",
+                    message=f"{inviter_name} invited you to join {team.name}",
+                    related_id=invitation.id,
+                    action_url=f"/invitation/accept/{invitation.token}"
+                )
+            
+            # ALSO create a notification for the inviter to track the invitation
             Notification.objects.create(
-                user=existing_user,
+                user=request.user,
                 type=Notification.Type.INVITATION,
-                title="Team Invitation",
-                message=f"{inviter_name} invited you to join {team.name}",
-                related_id=invitation.id,
-                action_url=f"/invitation/accept/{invitation.token}"
+                title="Invitation Sent",
+                message=f"You invited {email} to join {team.name}",
+                related_id=invitation.id
             )
         
-        # ALSO create a notification for the inviter to track the invitation
-        Notification.objects.create(
-            user=request.user,
-            type=Notification.Type.INVITATION,
-            title="Invitation Sent",
-            message=f"You invited {email} to join {team.name}",
-            related_id=invitation.id
-        )
-        
         return Response({
             'message': f'Invitation sent to {email}',
             'invitation_id': invitation.id,
-            'email_sent': email_sent,
+            'email_queued': True,
             'user_exists': existing_user is not None
         }, status=status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+def bulk_invite_members(request, team):
+    """Invite a list of emails or a CSV of email[,role] rows in one request"""
+    serializer = BulkInvitationSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    default_role = serializer.validated_data['role']
+    try:
+        if serializer.validated_data.get('file'):
+            entries = parse_invitation_csv(serializer.validated_data['file'])
+        else:
+            entries = [(email, None) for email in serializer.validated_data['emails']]
+    except (DjangoValidationError, UnicodeDecodeError, csv.Error) as e:
+        message = e.messages[0] if isinstance(e, DjangoValidationError) else 'Could not read the CSV file'
+        return Response({'error': message}, status=status.HTTP_400_BAD_REQUEST)
+    
+    result = bulk_invite(team, request.user, entries, default_role=default_role)
+    invited = len(result['invited'])
+    return Response({
+        'message': f'Invitations sent to {invited} people',
+        'invited_count': invited,
+        'skipped_count': len(result['skipped']),
+        'invited': result['invited'],
+        'skipped': result['skipped'],
+        'email_queued': invited > 0
+    }, status=status.HTTP_201_CREATED if invited else status.HTTP_200_OK)
+
 @api_view(['POST'])
 def leave_team_view(request, team_id):
     team = get_object_or_404(Team, id=team_id)
@@ -996,8 +1058,6 @@ def leave_team_view(request, team_id):
         return Response({'error': 'Not a member of this team'}, status=status.HTTP_400_BAD_REQUEST)
     
 
-from django.db.models import Count, Q, Prefetch # Make sure Q and Prefetch are imported
-
 @api_view(['GET'])
 def user_dashboard_stats_view(request):
     """
@@ -1021,9 +1081,6 @@ def user_dashboard_stats_view(request):
         'team', 'created_by'
     ).prefetch_related(
         Prefetch('assignees', queryset=User.objects.only('id', 'first_name', 'last_name', 'avatar'))
-    ).annotate(
-        active_task_count=Count('tasks'),
-        active_member_count=Count('memberships', distinct=True),
     ).order_by('-updated_at')[:5]
 
     # 3. Get User Tasks
@@ -1031,25 +1088,21 @@ def user_dashboard_stats_view(request):
         'project', 'project__team'
     ).order_by('due_date')
 
-    # 4. Calculate GLOBAL Stats (The "Total" numbers)
-    total_projects = Project.objects.filter(team_id__in=user_team_ids).count()
-    active_projects = Project.objects.filter(team_id__in=user_team_ids, status=2).count()
-    completed_tasks_count = Task.objects.filter(assignee=user, status=5).count()
+    # 4. GLOBAL Stats (The "Total" numbers) are materialized, see dashboard_stats.py
+    stats = dashboard_stats.get_user_stats(user)
     
+    # Due tasks depend on the current time, so they are counted live (indexed on assignee)
     due_tasks_query = user_tasks.filter(due_date__lte=tomorrow, status__lt=5)
     due_tasks_count = due_tasks_query.count()
-    
-    # Fix Unique Member Count: Query TeamMember directly using the Team IDs
-    unique_members_count = TeamMember.objects.filter(
-        team_id__in=user_team_ids, 
-        is_active=True
-    ).values('user').distinct().count()
 
     # 5. Serialize Projects (Manually to include team_members avatars)
+    # Task and member totals come from ProjectStats
+    recent_projects = list(recent_projects)
+    counts = project_stats.get_project_stats([p.id for p in recent_projects])
     projects_data = []
     for p in recent_projects:
-        total_p_tasks = p.tasks.count()
-        done_p_tasks = p.tasks.filter(status=5).count()
+        total_p_tasks = counts[p.id].task_count
+        done_p_tasks = counts[p.id].done_task_count
         progress = int((done_p_tasks / total_p_tasks) * 100) if total_p_tasks > 0 else 0
         
         # Extract first 3 avatars manually
@@ -1071,8 +1124,8 @@ def user_dashboard_stats_view(request):
             'progress': progress,
             'team_name': p.team.name,
             'team_id': str(p.team.id),
-            'member_count': p.active_member_count,
-            'task_count': p.active_task_count,
+            'member_count': counts[p.id].member_count,
+            'task_count': total_p_tasks,
             'start_date': p.start_date,
             'end_date': p.end_date,
             'created_by_name': f"{p.created_by.first_name} {p.created_by.last_name}",
@@ -1104,30 +1157,29 @@ def user_dashboard_stats_view(request):
 
     # 6. Serialize Teams (Fixing the "1 member" bug)
     # We query Team FRESH using the IDs to avoid the previous filter inheritance
-    teams_queryset = Team.objects.filter(id__in=user_team_ids).annotate(
-        real_member_count=Count('members', filter=Q(members__is_active=True), distinct=True),
-        real_project_count=Count('projects', distinct=True)
-    ).select_related('created_by').order_by('-real_project_count', 'name')
+    teams = list(Team.objects.filter(id__in=user_team_ids).select_related('created_by'))
+    team_stats = dashboard_stats.get_team_stats([t.id for t in teams])
+    teams.sort(key=lambda t: (-team_stats[t.id].project_count, t.name))
 
     all_teams_data = []
-    for t in teams_queryset:
+    for t in teams:
         all_teams_data.append({
             'id': str(t.id),
             'name': t.name,
             'description': t.description,
-            'member_count': t.real_member_count,     # Uses fresh annotation (Corrects "1 member" issue)
-            'project_count': t.real_project_count,   
+            'member_count': team_stats[t.id].member_count,     # Active members only (Corrects "1 member" issue)
+            'project_count': team_stats[t.id].project_count,   
             'created_by_name': f"{t.created_by.first_name} {t.created_by.last_name}"
         })
 
     return Response({
         'stats': {
-            'totalTeams': len(user_team_ids),
-            'totalProjects': total_projects, # Uses DB count (e.g. 100), not list length (5)
-            'activeProjects': active_projects,
-            'completedTasks': completed_tasks_count,
+            'totalTeams': stats.team_count,
+            'totalProjects': stats.project_count, # Uses DB count (e.g. 100), not list length (5)
+            'activeProjects': stats.active_project_count,
+            'completedTasks': stats.completed_task_count,
             'tasksDueToday': due_tasks_count,
-            'teamMembers': unique_members_count # Fixed logic
+            'teamMembers': stats.member_count # Distinct active teammates
         },
         'recent_projects': projects_data,
         'due_tasks': due_tasks_data,
@@ -1135,12 +1187,19 @@ def user_dashboard_stats_view(request):
         'all_teams': all_teams_data 
     })
     
+# Relations ProjectSerializer nests, with the users each of them shows
+PROJECT_DETAIL_PREFETCH = (
+    Prefetch('assignee_relations', queryset=ProjectAssignee.objects.select_related('user', 'assigned_by')),
+    Prefetch('memberships', queryset=ProjectMember.objects.select_related('user')),
+    Prefetch('permissions', queryset=ProjectPermission.objects.select_related('user')),
+)
+
 @api_view(['GET', 'POST'])
 def projects_view(request, team_id):
     team = get_object_or_404(Team, id=team_id)
     
-    team_member = TeamMember.objects.filter(team=team, user=request.user, is_active=True).first()
-    if not team_member:
+    authz = get_authz_context(request, team_id)
+    if not authz.is_team_member:
         return Response({'error': 'Not a member'}, status=status.HTTP_403_FORBIDDEN)
 
     if request.method == 'GET':
@@ -1153,13 +1212,8 @@ def projects_view(request, team_id):
         projects = Project.objects.filter(team=team).select_related(
             'created_by', 'team'
         ).prefetch_related(
-            'assignee_relations', 
-            'assignee_relations__user',
-            'memberships',
-            'permissions'
+            *PROJECT_DETAIL_PREFETCH
         ).annotate(
-            active_task_count=Count('tasks'),
-            active_member_count=Count('memberships', distinct=True),
             is_user_favorite=Exists(is_favorite_subquery)
         ).order_by('-created_at')
 
@@ -1168,21 +1222,18 @@ def projects_view(request, team_id):
         if request.query_params.get('page'):
             paginator = PageNumberPagination()
             paginator.page_size = 50
-            result_page = paginator.paginate_queryset(projects, request)
+            result_page = project_stats.with_counts(paginator.paginate_queryset(projects, request))
             serializer = ProjectSerializer(result_page, many=True, context={'request': request})
             # Returns { count: 100, results: [...] } -> For ProjectList
             return paginator.get_paginated_response(serializer.data)
         
         else:
             # Returns [...] -> For Sidebar, Dashboard, etc. (No frontend changes needed!)
-            serializer = ProjectSerializer(projects, many=True, context={'request': request})
+            # Counts come from ProjectStats, not a GROUP BY over tasks
+            serializer = ProjectSerializer(project_stats.with_counts(projects), many=True, context={'request': request})
             return Response(serializer.data)
     
     elif request.method == 'POST':
-        # DEBUG: Check user's team role and permissions
-        print(f"🔍 DEBUG: User {request.user.email} has team role: {team_member.role}")
-        print(f"🔍 DEBUG: Team settings: {team.settings}")
-        
         # Check team settings for project creation permissions
         team_settings = team.settings
         permissions = team_settings.get('permissions', {})
@@ -1190,22 +1241,20 @@ def projects_view(request, team_id):
         # Allow project creation for:
         # - Owners and Admins (always)
         # - Members if team settings allow it
-        if team_member.role in [TeamMember.Role.OWNER, TeamMember.Role.ADMIN]:
+        if authz.is_team_admin:
             # Owners and Admins can always create projects
             can_create = True
-        elif team_member.role == TeamMember.Role.MEMBER:
+        elif authz.team_role == TeamMember.Role.MEMBER:
             # Members can create if team settings allow it
             can_create = permissions.get('members_can_create_projects', False)
         else:
             # Guests cannot create projects
             can_create = False
         
-        print(f"🔍 DEBUG: Can create project: {can_create}")
-        
         if not can_create:
             return Response({
                 'error': 'Insufficient permissions to create projects in this team',
-                'user_role': team_member.get_role_display(),
+                'user_role': TeamMember.Role(authz.team_role).label,
                 'required_permission': 'members_can_create_projects',
                 'current_setting': permissions.get('members_can_create_projects', False)
             }, status=status.HTTP_403_FORBIDDEN)
@@ -1271,14 +1320,7 @@ def project_detail_view(request, team_id, project_id):
 
         project = get_object_or_404(
             Project.objects.select_related('team', 'created_by')
-            .prefetch_related(
-                'assignee_relations', 
-                'assignee_relations__user',
-                'memberships',
-                'permissions'
-            ).annotate(
-                active_task_count=Count('tasks'),
-                active_member_count=Count('memberships', distinct=True),
+            .prefetch_related(*PROJECT_DETAIL_PREFETCH).annotate(
                 is_user_favorite=Exists(is_favorite_subquery)
             ), 
             id=project_id, 
@@ -1287,12 +1329,13 @@ def project_detail_view(request, team_id, project_id):
     else:
         project = get_object_or_404(Project, id=project_id, team=team)
     
-    permission = get_user_project_permissions(request.user, project)
+    permission = get_authz_context(request, team_id, project_id).project_permission(project)
     
     if not permission:
         return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
     
     if request.method == 'GET':
+        project_stats.with_counts([project])
         serializer = ProjectSerializer(project, context={'request': request})
         return Response(serializer.data)
     
@@ -1418,18 +1461,17 @@ def project_members_view(request, team_id, project_id):
     project = get_object_or_404(Project, id=project_id, team=team)
     
     # Check if user is project member
-    if not ProjectMember.objects.filter(project=project, user=request.user).exists():
+    if not get_authz_context(request, team_id, project_id).is_project_member:
         return Response({'error': 'Not a member of this project'}, status=status.HTTP_403_FORBIDDEN)
     
     if request.method == 'GET':
-        members = ProjectMember.objects.filter(project=project)
+        members = ProjectMember.objects.filter(project=project).select_related('user')
         serializer = ProjectMemberSerializer(members, many=True)
         return Response(serializer.data)
     
     elif request.method == 'POST':
         # Check if user has permission to add members
-        project_member = ProjectMember.objects.get(project=project, user=request.user)
-        if project_member.role != ProjectMember.Role.MANAGER:
+        if not get_authz_context(request, team_id, project_id).is_project_manager:
             return Response({'error': 'Insufficient permissions to add members'}, status=status.HTTP_403_FORBIDDEN)
         
         email = request.data.get('email')
@@ -1469,11 +1511,13 @@ def tasks_view(request, team_id, project_id):
     project = get_object_or_404(Project, id=project_id, team=team)
     
     # Check if user is project member
-    if not ProjectMember.objects.filter(project=project, user=request.user).exists():
+    if not get_authz_context(request, team_id, project_id).is_project_member:
         return Response({'error': 'Not a member of this project'}, status=status.HTTP_403_FORBIDDEN)
     
     if request.method == 'GET':
-        tasks = Task.objects.filter(project=project)
+        tasks = Task.objects.filter(project=project).select_related(
+            'project', 'assignee', 'created_by'
+        ).annotate(active_subtask_count=Count('subtasks'))
         
         # Filter by status if provided
         status_filter = request.GET.get('status')
@@ -1505,7 +1549,7 @@ def task_detail_view(request, team_id, project_id, task_id):
     task = get_object_or_404(Task, id=task_id, project=project)
     
     # Check if user is project member
-    if not ProjectMember.objects.filter(project=project, user=request.user).exists():
+    if not get_authz_context(request, team_id, project_id).is_project_member:
         return Response({'error': 'Not a member of this project'}, status=status.HTTP_403_FORBIDDEN)
     
     if request.method == 'GET':
@@ -1522,8 +1566,7 @@ def task_detail_view(request, team_id, project_id, task_id):
     
     elif request.method == 'DELETE':
         # Only task creator or project manager can delete
-        project_member = ProjectMember.objects.get(project=project, user=request.user)
-        if task.created_by != request.user and project_member.role != ProjectMember.Role.MANAGER:
+        if task.created_by != request.user and not get_authz_context(request, team_id, project_id).is_project_manager:
             return Response({'error': 'Insufficient permissions to delete task'}, status=status.HTTP_403_FORBIDDEN)
         
         task.delete()
@@ -1538,11 +1581,11 @@ def subtasks_view(request, team_id, project_id, task_id):
     task = get_object_or_404(Task, id=task_id, project=project)
     
     # Check if user is project member
-    if not ProjectMember.objects.filter(project=project, user=request.user).exists():
+    if not get_authz_context(request, team_id, project_id).is_project_member:
         return Response({'error': 'Not a member of this project'}, status=status.HTTP_403_FORBIDDEN)
     
     if request.method == 'GET':
-        subtasks = Subtask.objects.filter(task=task)
+        subtasks = Subtask.objects.filter(task=task).select_related('task', 'assignee', 'created_by')
         serializer = SubtaskSerializer(subtasks, many=True)
         return Response(serializer.data)
     
@@ -1564,7 +1607,7 @@ def subtask_detail_view(request, team_id, project_id, task_id, subtask_id):
     subtask = get_object_or_404(Subtask, id=subtask_id, task=task)
     
     # Check if user is project member
-    if not ProjectMember.objects.filter(project=project, user=request.user).exists():
+    if not get_authz_context(request, team_id, project_id).is_project_member:
         return Response({'error': 'Not a member of this project'}, status=status.HTTP_403_FORBIDDEN)
     
     if request.method == 'GET':
@@ -1581,8 +1624,7 @@ def subtask_detail_view(request, team_id, project_id, task_id, subtask_id):
     
     elif request.method == 'DELETE':
         # Only subtask creator or project manager can delete
-        project_member = ProjectMember.objects.get(project=project, user=request.user)
-        if subtask.created_by != request.user and project_member.role != ProjectMember.Role.MANAGER:
+        if subtask.created_by != request.user and not get_authz_context(request, team_id, project_id).is_project_manager:
             return Response({'error': 'Insufficient permissions to delete subtask'}, status=status.HTTP_403_FORBIDDEN)
         
         subtask.delete()
@@ -1597,11 +1639,11 @@ def task_comments_view(request, team_id, project_id, task_id):
     task = get_object_or_404(Task, id=task_id, project=project)
     
     # Check if user is project member
-    if not ProjectMember.objects.filter(project=project, user=request.user).exists():
+    if not get_authz_context(request, team_id, project_id).is_project_member:
         return Response({'error': 'Not a member of this project'}, status=status.HTTP_403_FORBIDDEN)
     
     if request.method == 'GET':
-        comments = TaskComment.objects.filter(task=task)
+        comments = TaskComment.objects.filter(task=task).select_related('user')
         serializer = TaskCommentSerializer(comments, many=True)
         return Response(serializer.data)
     
@@ -1689,8 +1731,7 @@ def team_join_requests_view(request, team_id):
     team = get_object_or_404(Team, id=team_id)
     
     # Check if user has permission (Owner or Admin)
-    member = TeamMember.objects.get(team=team, user=request.user)
-    if member.role not in [TeamMember.Role.OWNER, TeamMember.Role.ADMIN]:
+    if not get_authz_context(request, team_id).is_team_admin:
         return Response({'error': 'Insufficient permissions'}, status=status.HTTP_403_FORBIDDEN)
     
     join_requests = TeamJoinRequest.objects.filter(team=team, status=TeamJoinRequest.Status.PENDING)
@@ -1825,8 +1866,7 @@ def approve_join_request_view(request, team_id, request_id):
     join_request = get_object_or_404(TeamJoinRequest, id=request_id, team=team)
     
     # Check if user has permission (Owner or Admin)
-    member = TeamMember.objects.get(team=team, user=request.user)
-    if member.role not in [TeamMember.Role.OWNER, TeamMember.Role.ADMIN]:
+    if not get_authz_context(request, team_id).is_team_admin:
         return Response({'error': 'Insufficient permissions'}, status=status.HTTP_403_FORBIDDEN)
     
     # Check if request is still pending
@@ -1873,8 +1913,7 @@ def reject_join_request_view(request, team_id, request_id):
     join_request = get_object_or_404(TeamJoinRequest, id=request_id, team=team)
     
     # Check if user has permission (Owner or Admin)
-    member = TeamMember.objects.get(team=team, user=request.user)
-    if member.role not in [TeamMember.Role.OWNER, TeamMember.Role.ADMIN]:
+    if not get_authz_context(request, team_id).is_team_admin:
         return Response({'error': 'Insufficient permissions'}, status=status.HTTP_403_FORBIDDEN)
     
     # Check if request is still pending
@@ -1908,8 +1947,7 @@ def team_settings_view(request, team_id):
     team = get_object_or_404(Team, id=team_id)
     
     # Check if user has permission (Owner or Admin)
-    member = TeamMember.objects.get(team=team, user=request.user)
-    if member.role not in [TeamMember.Role.OWNER, TeamMember.Role.ADMIN]:
+    if not get_authz_context(request, team_id).is_team_admin:
         return Response({'error': 'Insufficient permissions'}, status=status.HTTP_403_FORBIDDEN)
     
     if request.method == 'GET':
@@ -1945,8 +1983,7 @@ def update_team_setting_view(request, team_id):
     team = get_object_or_404(Team, id=team_id)
     
     # Check if user has permission (Owner or Admin)
-    member = TeamMember.objects.get(team=team, user=request.user)
-    if member.role not in [TeamMember.Role.OWNER, TeamMember.Role.ADMIN]:
+    if not get_authz_context(request, team_id).is_team_admin:
         return Response({'error': 'Insufficient permissions'}, status=status.HTTP_403_FORBIDDEN)
     
     setting_path = request.data.get('path')
@@ -2013,7 +2050,7 @@ def team_activity_view(request, team_id):
     team = get_object_or_404(Team, id=team_id)
     
     # Check if user is team member
-    if not TeamMember.objects.filter(team=team, user=request.user, is_active=True).exists():
+    if not get_authz_context(request, team_id).is_team_member:
         return Response({'error': 'Not a member of this team'}, status=status.HTTP_403_FORBIDDEN)
     
     # Get filters from query params
@@ -2032,7 +2069,7 @@ def team_activity_view(request, team_id):
     if action_type:
         activities = activities.filter(action_type=action_type)
     
-    activities = activities.select_related('user', 'project').order_by('-created_at')
+    activities = activities.select_related('user', 'team', 'project').order_by('-created_at')
     
     serializer = ActivityLogSerializer(activities, many=True)
     return Response(serializer.data)
@@ -2044,7 +2081,7 @@ def project_activity_view(request, team_id, project_id):
     project = get_object_or_404(Project, id=project_id, team=team)
     
     # Check if user is project member
-    if not ProjectMember.objects.filter(project=project, user=request.user).exists():
+    if not get_authz_context(request, team_id, project_id).is_project_member:
         return Response({'error': 'Not a member of this project'}, status=status.HTTP_403_FORBIDDEN)
     
     days = int(request.GET.get('days', 30))
@@ -2053,7 +2090,7 @@ def project_activity_view(request, team_id, project_id):
     activities = ActivityLog.objects.filter(
         project=project,
         created_at__gte=from_date
-    ).select_related('user').order_by('-created_at')
+    ).select_related('user', 'team', 'project').order_by('-created_at')
     
     serializer = ActivityLogSerializer(activities, many=True)
     return Response(serializer.data)
@@ -2061,9 +2098,9 @@ def project_activity_view(request, team_id, project_id):
 @api_view(['GET'])
 def recent_activity_view(request, team_id):
     """Get recent activity across user's teams"""
-    team = get_object_or_404(Team, id=team_id)
+    get_object_or_404(Team, id=team_id)
     
-    if not TeamMember.objects.filter(team=team, user=request.user, is_active=True).exists():
+    if not get_authz_context(request, team_id).is_team_member:
         return Response({'error': 'Not a member of this team'}, status=status.HTTP_403_FORBIDDEN)
     
     limit = int(request.GET.get('limit', 10))
@@ -2087,83 +2124,8 @@ def get_user_project_permissions(user, project):
     Get or calculate user's permissions for a project.
     Prioritizes Team Role > Project Assignee Role > Stored Permission.
     """
-    
-    # 1. Check Team Membership (Owner/Admin override everything)
-    team_member = TeamMember.objects.filter(team=project.team, user=user, is_active=True).first()
-    if not team_member:
-        return None
-
-    # Default level
-    level = ProjectPermission.PermissionLevel.VIEW_ONLY
-
-    # 2. Determine Level based on Hierarchy
-    if team_member.role in [TeamMember.Role.OWNER, TeamMember.Role.ADMIN]:
-        level = ProjectPermission.PermissionLevel.ADMIN
-    else:
-        # Check Project Assignee Status (Real-time Source of Truth)
-        assignee = ProjectAssignee.objects.filter(project=project, user=user).first()
-        
-        if assignee:
-            if assignee.role == ProjectAssignee.AssigneeRole.LEAD:
-                level = ProjectPermission.PermissionLevel.ADMIN # Leads act as Admins
-            elif assignee.role == ProjectAssignee.AssigneeRole.MANAGER:
-                level = ProjectPermission.PermissionLevel.EDIT_ALL
-            else:
-                level = ProjectPermission.PermissionLevel.EDIT_BASIC
-        else:
-             # Fallback to DB Permission
-             db_perm = ProjectPermission.objects.filter(project=project, user=user).first()
-             if db_perm:
-                 return db_perm
-             
-             # Default for regular team members
-             level = ProjectPermission.PermissionLevel.VIEW_ONLY
-
-    # 3. Construct Temporary Object
-    temp_permission = ProjectPermission(project=project, user=user, level=level)
-
-    # 4. Set Flags based on Level
-    if level == ProjectPermission.PermissionLevel.ADMIN:
-        temp_permission.can_edit_name = True
-        temp_permission.can_edit_description = True
-        temp_permission.can_edit_dates = True
-        temp_permission.can_edit_status = True
-        temp_permission.can_assign_tasks = True
-        temp_permission.can_manage_members = True
-        temp_permission.can_transfer_project = True
-        temp_permission.can_delete_project = True
-        
-    elif level == ProjectPermission.PermissionLevel.EDIT_ALL:
-        temp_permission.can_edit_name = True
-        temp_permission.can_edit_description = True
-        temp_permission.can_edit_dates = True
-        temp_permission.can_edit_status = True
-        temp_permission.can_assign_tasks = True
-        temp_permission.can_manage_members = True
-        temp_permission.can_transfer_project = False
-        temp_permission.can_delete_project = False
-        
-    elif level == ProjectPermission.PermissionLevel.EDIT_BASIC:
-        temp_permission.can_edit_name = True
-        temp_permission.can_edit_description = True
-        temp_permission.can_edit_dates = True
-        temp_permission.can_edit_status = True
-        temp_permission.can_assign_tasks = True
-        temp_permission.can_manage_members = False
-        temp_permission.can_transfer_project = False
-        temp_permission.can_delete_project = False
-        
-    else: # VIEW_ONLY
-        temp_permission.can_edit_name = False
-        temp_permission.can_edit_description = False
-        temp_permission.can_edit_dates = False
-        temp_permission.can_edit_status = False
-        temp_permission.can_assign_tasks = False
-        temp_permission.can_manage_members = False
-        temp_permission.can_transfer_project = False
-        temp_permission.can_delete_project = False
-
-    return temp_permission
+    authz = AuthorizationContext(user, project.team_id, project.id)
+    return authz.project_permission(project)
 
 @api_view(['POST'])
 def toggle_project_favorite_view(request, team_id, project_id):
@@ -2172,7 +2134,7 @@ def toggle_project_favorite_view(request, team_id, project_id):
     project = get_object_or_404(Project, id=project_id, team=team)
     
     # Check if user is a member of the team
-    if not TeamMember.objects.filter(team=team, user=request.user, is_active=True).exists():
+    if not get_authz_context(request, team_id).is_team_member:
         return Response({'error': 'Not a member of this team'}, status=status.HTTP_403_FORBIDDEN)
 
     is_favorite = False
@@ -2189,4 +2151,488 @@ def toggle_project_favorite_view(request, team_id, project_id):
         'status': 'success', 
         'is_favorite': is_favorite,
         'project_id': str(project.id)
-    })
\ No newline at end of file
+    })
+# Sheet Views
+def _get_sheet_project(request, team_id, project_id):
+    """Return (project, error_response) for sheet endpoints"""
+    team = get_object_or_404(Team, id=team_id)
+    project = get_object_or_404(Project, id=project_id, team=team)
+    
+    # Check if user is project member
+    if not get_authz_context(request, team_id, project_id).is_project_member:
+        return project, Response({'error': 'Not a member of this project'}, status=status.HTTP_403_FORBIDDEN)
+    return project, None
+
+@api_view(['GET', 'POST'])
+def sheets_view(request, team_id, project_id):
+    """List the sheets of a project or create a new sheet"""
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    
+    if request.method == 'GET':
+        serializer = ProjectSheetListSerializer(sheets.sheets_for_project(project), many=True)
+        return Response(serializer.data)
+    
+    serializer = ProjectSheetCreateSerializer(data=request.data, context={'request': request})
+    if serializer.is_valid():
+        sheet = serializer.save(project=project)
+        sheet.row_count = 0
+        return Response(ProjectSheetListSerializer(sheet).data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET', 'PUT', 'DELETE'])
+def sheet_detail_view(request, team_id, project_id, sheet_id):
+    """
+    Get a sheet with its columns and a columnar grid of cell values,
+    update its details, or delete it.
+    """
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    sheet = get_object_or_404(ProjectSheet.objects.select_related('created_by'), id=sheet_id, project=project)
+    
+    if request.method == 'GET':
+        columns = sheets.load_columns(sheet)
+        if 'limit' in request.GET:
+            # Only the first viewport; the grid fetches the rest from rows/
+            grid = sheets.row_window(sheet, columns, limit=sheets.window_size(request.GET['limit']))
+            sheet.row_count = grid['total']
+        else:
+            grid = sheets.load_grid(sheet, columns)
+            sheet.row_count = len(grid['row_ids'])
+        data = ProjectSheetListSerializer(sheet).data
+        data['columns'] = columns
+        data['grid'] = grid
+        return Response(data)
+    
+    elif request.method == 'PUT':
+        serializer = ProjectSheetCreateSerializer(sheet, data=request.data, partial=True, context={'request': request})
+        if serializer.is_valid():
+            # Changing the storage mode moves the existing cells over
+            storage = serializer.validated_data.pop('storage', sheet.storage)
+            try:
+                with transaction.atomic():
+                    serializer.save()
+                    if storage != sheet.storage:
+                        sheet_storage.convert_storage(sheet, storage)
+                        sheet_cache.bump_data_version(sheet.id)
+            except sheet_storage.StorageConversionError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            sheet.row_count = sheet.rows.count()
+            return Response(ProjectSheetListSerializer(sheet).data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    elif request.method == 'DELETE':
+        # Only sheet creator or project manager can delete
+        if sheet.created_by_id != request.user.id and not get_authz_context(request, team_id, project_id).is_project_manager:
+            return Response({'error': 'Insufficient permissions to delete sheet'}, status=status.HTTP_403_FORBIDDEN)
+        
+        sheet.delete()
+        return Response({'message': 'Sheet deleted successfully'})
+
+@api_view(['POST'])
+def sheet_columns_view(request, team_id, project_id, sheet_id):
+    """Add a column to a sheet"""
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    sheet = get_object_or_404(ProjectSheet, id=sheet_id, project=project)
+    
+    serializer = SheetColumnSerializer(data=request.data)
+    if serializer.is_valid():
+        if SheetColumn.objects.filter(sheet=sheet, key=serializer.validated_data['key']).exists():
+            return Response({'error': 'A column with this key already exists'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        is_formula = serializer.validated_data.get('column_type') == SheetColumn.ColumnType.FORMULA
+        if is_formula:
+            try:
+                sheets.validate_formula_column(sheet, serializer.validated_data['key'], serializer.validated_data.get('formula'))
+            except FormulaError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # New columns go last unless an explicit position was given
+        order = serializer.validated_data['order'] if 'order' in request.data else sheets.next_order(SheetColumn.objects.filter(sheet=sheet))
+        with transaction.atomic():
+            column = serializer.save(sheet=sheet, order=order)
+            sheet_cache.bump_data_version(sheet.id)
+            if is_formula:
+                sheets.recalculate_formulas(sheet, {column.key: None}, request.user)
+        data = SheetColumnSerializer(column).data
+        sheet_events.publish_sheet_event(sheet.id, 'column.created', {'column': data}, request.user)
+        return Response(data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET', 'POST'])
+def sheet_rows_view(request, team_id, project_id, sheet_id):
+    """
+    Get one window of rows for a virtualized grid, or append an empty row.
+    GET takes ?offset and ?limit, or ?cursor (the previous window's
+    next_cursor) to continue after a row without an OFFSET scan.
+    """
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    sheet = get_object_or_404(ProjectSheet, id=sheet_id, project=project)
+    
+    if request.method == 'GET':
+        try:
+            offset = max(int(request.GET.get('offset', 0)), 0)
+        except ValueError:
+            return Response({'error': 'Invalid offset'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = sheets.window_size(request.GET.get('limit'))
+        try:
+            window = sheets.row_window(sheet, offset=offset, limit=limit, cursor=request.GET.get('cursor'))
+        except ValueError:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        if request.GET.get('include_columns', '').lower() in ('1', 'true'):
+            window['columns'] = sheets.load_columns(sheet)
+        return Response(window)
+    
+    row = sheets.add_row(sheet, request.user)
+    data = SheetRowSerializer(row).data
+    sheet_events.publish_sheet_event(sheet.id, 'row.created', {'row': data}, request.user)
+    return Response(data, status=status.HTTP_201_CREATED)
+
+def _move_sheet_item(request, sheet, item, model, move):
+    """Shared body of the row/column move endpoints"""
+    if 'after_id' not in request.data:
+        return Response({'error': 'after_id is required (null moves to the start)'}, status=status.HTTP_400_BAD_REQUEST)
+    after = None
+    if request.data['after_id']:
+        after = model.objects.filter(id=request.data['after_id'], sheet=sheet).first()
+        if after is None:
+            return Response({'error': 'after_id does not belong to this sheet'}, status=status.HTTP_400_BAD_REQUEST)
+        if after.id == item.id:
+            return Response({'error': 'Cannot move an item after itself'}, status=status.HTTP_400_BAD_REQUEST)
+    move(sheet, item, after)
+    return None
+
+@api_view(['POST'])
+def sheet_row_move_view(request, team_id, project_id, sheet_id, row_id):
+    """Move a row directly after another row ({"after_id": row id or null for the top})"""
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    sheet = get_object_or_404(ProjectSheet, id=sheet_id, project=project)
+    row = get_object_or_404(SheetRow, id=row_id, sheet=sheet)
+    
+    error = _move_sheet_item(request, sheet, row, SheetRow, sheets.move_row)
+    if error:
+        return error
+    sheet_events.publish_sheet_event(sheet.id, 'row.moved', {'id': row.id, 'order': row.order}, request.user)
+    return Response({'id': row.id, 'order': row.order})
+
+@api_view(['POST'])
+def sheet_column_move_view(request, team_id, project_id, sheet_id, column_id):
+    """Move a column directly after another column ({"after_id": column id or null for the first position})"""
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    sheet = get_object_or_404(ProjectSheet, id=sheet_id, project=project)
+    column = get_object_or_404(SheetColumn, id=column_id, sheet=sheet)
+    
+    error = _move_sheet_item(request, sheet, column, SheetColumn, sheets.move_column)
+    if error:
+        return error
+    sheet_events.publish_sheet_event(sheet.id, 'column.moved', {'id': column.id, 'order': column.order}, request.user)
+    return Response({'id': column.id, 'order': column.order})
+
+@api_view(['PUT'])
+def sheet_cell_detail_view(request, team_id, project_id, sheet_id, cell_id):
+    """Update the value of an existing cell"""
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    sheet = get_object_or_404(ProjectSheet, id=sheet_id, project=project)
+    cell = get_object_or_404(Cell.objects.select_related('column'), id=cell_id, column__sheet=sheet)
+    
+    if 'value' not in request.data:
+        return Response({'error': 'value is required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Optional: the version the editor saw, to detect concurrent changes
+    version = request.data.get('version')
+    if version is not None:
+        try:
+            version = int(version)
+        except (TypeError, ValueError):
+            return Response({'error': 'version must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        changed = sheets.apply_cell_updates(sheet, [{
+            'row_id': cell.row_id,
+            'column_key': cell.column.key,
+            'value': request.data['value'],
+            'version': version
+        }], request.user)
+    except sheets.CellConflictError as e:
+        return Response({'error': e.errors[0]['error'], 'errors': e.errors}, status=status.HTTP_409_CONFLICT)
+    except sheets.CellUpdateError as e:
+        return Response({'error': e.errors[0]['error'], 'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+    
+    sheet_events.publish_cells(sheet.id, changed, request.user)
+    cell.refresh_from_db()
+    return Response(CellSerializer(cell).data)
+
+@api_view(['POST'])
+def sheet_bulk_update_view(request, team_id, project_id, sheet_id):
+    """
+    Apply many cell updates ({row_id, column_key, value}) at once, e.g. a
+    pasted range. All updates are validated first; nothing is written if
+    any is invalid. Only the cells that changed are returned.
+    """
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    sheet = get_object_or_404(ProjectSheet, id=sheet_id, project=project)
+    
+    serializer = BulkCellUpdateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        changed = sheets.apply_cell_updates(sheet, serializer.validated_data['updates'], request.user)
+    except sheets.CellConflictError as e:
+        return Response({'error': 'Some cells were changed by someone else', 'errors': e.errors}, status=status.HTTP_409_CONFLICT)
+    except sheets.CellUpdateError as e:
+        return Response({'error': 'Some updates are invalid', 'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+    
+    sheet_events.publish_cells(sheet.id, changed, request.user)
+    return Response({'updated': changed, 'updated_count': len(changed)})
+
+@api_view(['GET'])
+def sheet_aggregates_view(request, team_id, project_id, sheet_id):
+    """
+    Column summaries for a sheet footer: count/blank/distinct for every
+    column, sum/avg/min/max/percentiles for numbers, min/max for dates and
+    counts by value for status, dropdown, user and checkbox columns.
+    Optional ?columns=key1,key2 limits the result.
+    """
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    sheet = get_object_or_404(ProjectSheet, id=sheet_id, project=project)
+    
+    keys = [key for key in request.GET.get('columns', '').split(',') if key]
+    return Response(sheet_aggregates.column_aggregates(sheet, keys or None))
+
+def _validate_view_definition(sheet, data):
+    """Compile a view definition to check its columns and operators"""
+    try:
+        sheet_views.ViewPlan(sheet, data.get('filters'), data.get('sort_by'), data.get('group_by'))
+    except (sheet_views.ViewDefinitionError, AttributeError, TypeError) as e:
+        return Response({'error': f"Invalid view definition: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+    return None
+
+@api_view(['GET', 'POST'])
+def sheet_views_view(request, team_id, project_id, sheet_id):
+    """List the saved views visible to the user or save a new view"""
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    sheet = get_object_or_404(ProjectSheet, id=sheet_id, project=project)
+    
+    if request.method == 'GET':
+        views = SheetView.objects.filter(sheet=sheet).filter(
+            Q(is_shared=True) | Q(created_by=request.user)
+        ).select_related('created_by')
+        return Response(SheetViewSerializer(views, many=True).data)
+    
+    serializer = SheetViewSerializer(data=request.data)
+    if serializer.is_valid():
+        error = _validate_view_definition(sheet, serializer.validated_data)
+        if error:
+            return error
+        view = serializer.save(sheet=sheet, created_by=request.user)
+        return Response(SheetViewSerializer(view).data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+def _get_sheet_view(request, sheet, view_id):
+    return get_object_or_404(
+        SheetView.objects.select_related('created_by', 'sheet').filter(Q(is_shared=True) | Q(created_by=request.user)),
+        id=view_id, sheet=sheet
+    )
+
+@api_view(['GET', 'PUT', 'DELETE'])
+def sheet_view_detail_view(request, team_id, project_id, sheet_id, view_id):
+    """Get, update or delete a saved view; only its creator can change it"""
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    sheet = get_object_or_404(ProjectSheet, id=sheet_id, project=project)
+    view = _get_sheet_view(request, sheet, view_id)
+    
+    if request.method == 'GET':
+        return Response(SheetViewSerializer(view).data)
+    
+    if view.created_by_id != request.user.id:
+        return Response({'error': 'Only the creator can change this view'}, status=status.HTTP_403_FORBIDDEN)
+    
+    if request.method == 'PUT':
+        serializer = SheetViewSerializer(view, data=request.data, partial=True)
+        if serializer.is_valid():
+            definition = {
+                field: serializer.validated_data.get(field, getattr(view, field))
+                for field in ('filters', 'sort_by', 'group_by')
+            }
+            error = _validate_view_definition(sheet, definition)
+            if error:
+                return error
+            serializer.save()
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    view.delete()
+    return Response({'message': 'View deleted successfully'})
+
+@api_view(['GET'])
+def sheet_view_rows_view(request, team_id, project_id, sheet_id, view_id):
+    """
+    Execute a saved view and return one window of matching rows.
+    Query params: offset, limit; group=<value> pages within one kanban
+    group; start/end (ISO dates) limit a calendar view to the visible range.
+    """
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    sheet = get_object_or_404(ProjectSheet, id=sheet_id, project=project)
+    view = _get_sheet_view(request, sheet, view_id)
+    
+    try:
+        offset = max(int(request.GET.get('offset', 0)), 0)
+    except ValueError:
+        return Response({'error': 'Invalid offset'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = sheets.window_size(request.GET.get('limit'))
+    
+    try:
+        result = sheet_views.execute_view(
+            view, offset, limit,
+            group=request.GET.get('group'),
+            start=request.GET.get('start'),
+            end=request.GET.get('end')
+        )
+    except sheet_views.ViewDefinitionError as e:
+        # e.g. a column used by the view was deleted after it was saved
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result)
+
+@api_view(['GET', 'POST'])
+def sheet_comments_view(request, team_id, project_id, sheet_id):
+    """List (optionally per cell) or add comments on a sheet"""
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    sheet = get_object_or_404(ProjectSheet, id=sheet_id, project=project)
+    
+    if request.method == 'GET':
+        comments = SheetComment.objects.filter(sheet=sheet).select_related('user')
+        cell_id = request.GET.get('cell_id')
+        if cell_id:
+            comments = comments.filter(cell_id=cell_id)
+        return Response(SheetCommentSerializer(comments, many=True).data)
+    
+    serializer = SheetCommentSerializer(data=request.data)
+    if serializer.is_valid():
+        cell = serializer.validated_data.get('cell')
+        if cell is not None and not Cell.objects.filter(id=cell.id, column__sheet=sheet).exists():
+            return Response({'error': 'Cell does not belong to this sheet'}, status=status.HTTP_400_BAD_REQUEST)
+        comment = serializer.save(sheet=sheet, user=request.user)
+        return Response(SheetCommentSerializer(comment).data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['POST'])
+def project_import_view(request, team_id, project_id):
+    """
+    Start importing an uploaded CSV/XLSX file into a new sheet (target=sheet,
+    the default), an existing sheet (sheet_id) or the project's tasks
+    (target=tasks). Returns the job's progress; poll import/<job_id>/.
+    """
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    
+    reason = importers.unavailable_reason()
+    if reason:
+        return Response({'error': reason}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'A file is required'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        file_format = importers.file_format(upload.name)
+    except importers.ImportFileError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    target = request.data.get('target') or 'sheet'
+    if target not in importers.TARGETS:
+        return Response({'error': f"target must be one of: {', '.join(importers.TARGETS)}"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    sheet_id = request.data.get('sheet_id') or None
+    if sheet_id:
+        sheet_id = str(get_object_or_404(ProjectSheet, id=sheet_id, project=project).id)
+    storage = request.data.get('storage') or None
+    if storage is not None:
+        try:
+            storage = int(storage)
+        except (TypeError, ValueError):
+            storage = None
+        if storage not in ProjectSheet.Storage.values:
+            return Response({'error': 'Invalid storage'}, status=status.HTTP_400_BAD_REQUEST)
+    name = (request.data.get('name') or upload.name.rsplit('.', 1)[0])[:255]
+    
+    from .tasks import import_project_file
+    
+    # The upload is handed to the worker through storage rather than memory
+    job_id = str(uuid.uuid4())
+    path = default_storage.save(f'imports/{job_id}.{file_format}', upload)
+    importers.set_progress(
+        job_id,
+        status='queued',
+        target=target,
+        filename=upload.name,
+        project_id=str(project.id),
+        user_id=str(request.user.id),
+        processed=0,
+        percent=0,
+    )
+    import_project_file.delay(job_id, path, file_format, target, str(project.id), str(request.user.id), name=name, sheet_id=sheet_id, storage=storage)
+    return Response(importers.get_progress(job_id), status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+def project_import_progress_view(request, team_id, project_id, job_id):
+    """Progress (and, once done, the result) of an import started by this user"""
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    
+    progress = importers.get_progress(job_id)
+    if not progress or progress.get('project_id') != str(project.id) or progress.get('user_id') != str(request.user.id):
+        return Response({'error': 'Import not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(progress)
+
+@api_view(['GET'])
+@renderer_classes([JSONRenderer, exporters.CSVRenderer, exporters.XLSXRenderer])
+def project_export_view(request, team_id, project_id):
+    """
+    Download a project's tasks, subtasks, comments and sheet data as
+    ?format=json (default), csv or xlsx. The body is streamed as it is read.
+    """
+    project, error = _get_sheet_project(request, team_id, project_id)
+    if error:
+        return error
+    
+    file_format = request.query_params.get('format') or 'json'
+    if file_format not in exporters.FORMATS:
+        return Response({'error': f"format must be one of: {', '.join(exporters.FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+    filename = exporters.filename(project, file_format)
+    
+    if file_format == 'xlsx':
+        if exporters.openpyxl is None:
+            return Response({'error': 'XLSX export is not available on this server; use csv or json'}, status=status.HTTP_400_BAD_REQUEST)
+        # Workbooks are zip files, written in full before they can be sent
+        return FileResponse(exporters.export_xlsx(project), as_attachment=True, filename=filename, content_type=exporters.CONTENT_TYPES['xlsx'])
+    
+    stream = exporters.stream_csv(project) if file_format == 'csv' else exporters.stream_json(project)
+    response = StreamingHttpResponse(stream, content_type=f"{exporters.CONTENT_TYPES[file_format]}; charset=utf-8")
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -38,7 +38,7 @@ import { useNavigate, useLocation } from 'react-router-dom';
 import { useSelector, useDispatch } from 'react-redux';
 import { RootState, AppDispatch } from '../shared/store/store';
 import { logout } from '../shared/store/slices/authSlice';
-import { notificationAPI } from '../shared/services/notificationAPI';
+import { notificationAPI, connectNotificationSocket } from '../shared/services/notificationAPI';
 import { authAPI } from '../shared/services/api';
 
 interface CommonHeaderProps {
@@ -100,21 +100,111 @@ const CommonHeader: React.FC<CommonHeaderProps> = ({
     notification: null,
   });
 
+  const [unreadCount, setUnreadCount] = React.useState(0);
+  const [nextCursor, setNextCursor] = React.useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = React.useState(false);
+  // Newest notification seen, for catching up with ?since after a disconnect
+  const latestCursorRef = React.useRef<string | null>(null);
+
   const loadNotifications = async () => {
     try {
-      const response = await notificationAPI.getNotifications();
-      setNotifications(response.data);
+      const response = await notificationAPI.getNotificationPage();
+      setNotifications(response.data.results);
+      setNextCursor(response.data.next_cursor);
+      setUnreadCount(response.data.unread_count);
+      latestCursorRef.current = response.data.latest_cursor;
+    } catch (error) {
+      console.error('Failed to load notifications:', error);
+    }
+  };
+
+  const loadMoreNotifications = async () => {
+    if (!nextCursor || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const response = await notificationAPI.getNotificationPage({ cursor: nextCursor });
+      setNotifications(prev => [
+        ...prev,
+        ...response.data.results.filter((n: Notification) => !prev.some(p => p.id === n.id)),
+      ]);
+      setNextCursor(response.data.next_cursor);
+      setUnreadCount(response.data.unread_count);
+    } catch (error) {
+      console.error('Failed to load more notifications:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Fetch only what arrived since the newest notification we have; fall back
+  // to a full reload when nothing is loaded yet or more than a page was missed.
+  const catchUpNotifications = async () => {
+    if (!latestCursorRef.current) {
+      await loadNotifications();
+      return;
+    }
+    try {
+      const response = await notificationAPI.getNotificationPage({ since: latestCursorRef.current });
+      if (response.data.has_more) {
+        await loadNotifications();
+        return;
+      }
+      // ?since returns oldest first
+      const missed: Notification[] = [...response.data.results].reverse();
+      setNotifications(prev => [...missed, ...prev.filter(n => !missed.some(m => m.id === n.id))]);
+      setUnreadCount(response.data.unread_count);
+      latestCursorRef.current = response.data.latest_cursor;
     } catch (error) {
       console.error('Failed to load notifications:', error);
     }
   };
 
+  const refreshUnreadCount = async () => {
+    try {
+      const response = await notificationAPI.getUnreadCount();
+      setUnreadCount(response.data.unread_count);
+    } catch (error) {
+      console.error('Failed to load unread count:', error);
+    }
+  };
+
   React.useEffect(() => {
     loadNotifications();
     
-    // Refresh notifications every 30 seconds
-    const interval = setInterval(loadNotifications, 30000);
-    return () => clearInterval(interval);
+    // Notifications are pushed over a WebSocket; poll every 30 seconds only
+    // while the socket is disconnected.
+    let interval: ReturnType<typeof setInterval> | null = null;
+    const stopPolling = () => {
+      if (interval) clearInterval(interval);
+      interval = null;
+    };
+
+    const disconnect = connectNotificationSocket(
+      (event) => {
+        if (event.type === 'notification.deleted') {
+          setNotifications(prev => prev.filter(n => n.id !== event.notification_id));
+        } else {
+          setNotifications(prev => [
+            event.notification,
+            ...prev.filter(n => n.id !== event.notification.id),
+          ].sort((a, b) => b.created_at.localeCompare(a.created_at)));
+        }
+        refreshUnreadCount();
+      },
+      (connected) => {
+        if (connected) {
+          stopPolling();
+          catchUpNotifications(); // Catch up on anything missed while offline
+        } else if (!interval) {
+          interval = setInterval(catchUpNotifications, 30000);
+        }
+      }
+    );
+
+    return () => {
+      stopPolling();
+      disconnect();
+    };
   }, []);
 
   // Navigation Handlers
@@ -142,7 +232,8 @@ const CommonHeader: React.FC<CommonHeaderProps> = ({
   const handleMarkAsRead = async (notificationId: string) => {
     try {
       await notificationAPI.markAsRead(notificationId);
-      await loadNotifications();
+      setNotifications(prev => prev.map(n => (n.id === notificationId ? { ...n, status: 2 } : n)));
+      await refreshUnreadCount();
     } catch (error) {
       console.error('Failed to mark notification as read:', error);
     }
@@ -329,7 +420,6 @@ const CommonHeader: React.FC<CommonHeaderProps> = ({
     handleMainMenuClose();
   };
 
-  const unreadNotifications = notifications.filter(n => n.status === 1);
 
   // Get header styles based on variant
   const getHeaderStyles = () => {
@@ -385,7 +475,7 @@ const CommonHeader: React.FC<CommonHeaderProps> = ({
           background: theme.palette.text.secondary,
         }
       }}>
-        {notifications.slice(0, 8).map((notification) => {
+        {notifications.map((notification) => {
           const isPending = isPendingInvitation(notification);
           const isProcessing = processingNotifications.has(notification.id);
           const isProcessed = processedInvitations.has(notification.id);
@@ -516,6 +606,13 @@ const CommonHeader: React.FC<CommonHeaderProps> = ({
             </MenuItem>
           );
         })}
+        {nextCursor && (
+          <Box sx={{ p: 1, textAlign: 'center' }}>
+            <Button size="small" onClick={loadMoreNotifications} disabled={loadingMore} sx={{ textTransform: 'none' }}>
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </Button>
+          </Box>
+        )}
       </Box>
     );
   };
@@ -677,7 +774,7 @@ const CommonHeader: React.FC<CommonHeaderProps> = ({
                 onClick={handleNotificationClick}
                 size="small"
               >
-                <Badge badgeContent={unreadNotifications.length} color="error">
+                <Badge badgeContent={unreadCount} color="error">
                   <NotificationIcon />
                 </Badge>
               </IconButton>
@@ -953,7 +1050,7 @@ const CommonHeader: React.FC<CommonHeaderProps> = ({
             }
           }}
         >
-          <Badge badgeContent={unreadNotifications.length} color="error">
+          <Badge badgeContent={unreadCount} color="error">
             <NotificationIcon />
           </Badge>
         </IconButton>
@@ -52,49 +52,56 @@ const NotificationBell: React.FC = () => {
   
   const { isAuthenticated } = useSelector((state: RootState) => state.auth); // Removed unused 'user'
 
+  const [unreadCount, setUnreadCount] = useState(0);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // Enhance notifications with current invitation status
+  const enhanceNotifications = (page: Notification[]) => Promise.all(
+    page.map(async (notification: Notification) => {
+      if (notification.type === 1 && notification.action_url) {
+        const token = notification.action_url.split('/').pop();
+        if (token) {
+          try {
+            const invitationResponse = await authAPI.getInvitationDetails(token);
+            return {
+              ...notification,
+              metadata: {
+                invitation_status: invitationResponse.data.status,
+                invitation_id: invitationResponse.data.id,
+                is_expired: new Date(invitationResponse.data.expires_at) < new Date(),
+                team_name: invitationResponse.data.team_name
+              }
+            };
+          } catch (error) {
+            console.error('Failed to get invitation details:', error);
+            return {
+              ...notification,
+              metadata: {
+                invitation_status: getStatusFromTitle(notification.title),
+                is_expired: notification.title.includes('Expired'),
+                team_name: extractTeamName(notification.message)
+              }
+            };
+          }
+        }
+      }
+      return notification;
+    })
+  );
+
   // Wrap loadNotifications in useCallback to avoid useEffect dependency issues
   const loadNotifications = useCallback(async () => {
     if (!isAuthenticated) return;
     
     try {
       setLoading(true);
-      const response = await notificationAPI.getNotifications();
-      
-      // Enhance notifications with current invitation status
-      const enhancedNotifications = await Promise.all(
-        response.data.map(async (notification: Notification) => {
-          if (notification.type === 1 && notification.action_url) {
-            const token = notification.action_url.split('/').pop();
-            if (token) {
-              try {
-                const invitationResponse = await authAPI.getInvitationDetails(token);
-                return {
-                  ...notification,
-                  metadata: {
-                    invitation_status: invitationResponse.data.status,
-                    invitation_id: invitationResponse.data.id,
-                    is_expired: new Date(invitationResponse.data.expires_at) < new Date(),
-                    team_name: invitationResponse.data.team_name
-                  }
-                };
-              } catch (error) {
-                console.error('Failed to get invitation details:', error);
-                return {
-                  ...notification,
-                  metadata: {
-                    invitation_status: getStatusFromTitle(notification.title),
-                    is_expired: notification.title.includes('Expired'),
-                    team_name: extractTeamName(notification.message)
-                  }
-                };
-              }
-            }
-          }
-          return notification;
-        })
-      );
+      const response = await notificationAPI.getNotificationPage();
+      const enhancedNotifications = await enhanceNotifications(response.data.results);
       
       setNotifications(enhancedNotifications);
+      setNextCursor(response.data.next_cursor);
+      setUnreadCount(response.data.unread_count);
       setNotificationsLoaded(true);
     } catch (error) {
       console.error('Failed to load notifications:', error);
@@ -103,6 +110,27 @@ const NotificationBell: React.FC = () => {
     }
   }, [isAuthenticated]); // Add dependencies
 
+  const loadMoreNotifications = async () => {
+    if (!nextCursor || loadingMore) return;
+    
+    try {
+      setLoadingMore(true);
+      const response = await notificationAPI.getNotificationPage({ cursor: nextCursor });
+      const enhancedNotifications = await enhanceNotifications(response.data.results);
+      
+      setNotifications(prev => [
+        ...prev,
+        ...enhancedNotifications.filter(n => !prev.some(p => p.id === n.id)),
+      ]);
+      setNextCursor(response.data.next_cursor);
+      setUnreadCount(response.data.unread_count);
+    } catch (error) {
+      console.error('Failed to load more notifications:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const getStatusFromTitle = (title: string): number => {
     if (title.includes('Accepted')) return 2;
     if (title.includes('Declined')) return 3;
@@ -173,6 +201,9 @@ const NotificationBell: React.FC = () => {
             : notification
         )
       );
+      if (notifications.some(n => n.id === notificationId && n.status === 1)) {
+        setUnreadCount(count => Math.max(count - 1, 0));
+      }
     } catch (error) {
       console.error('Failed to mark notification as read:', error);
     }
@@ -184,6 +215,7 @@ const NotificationBell: React.FC = () => {
       setNotifications(prev => 
         prev.map(notification => ({ ...notification, status: 2 }))
       );
+      setUnreadCount(0);
     } catch (error) {
       console.error('Failed to mark all notifications as read:', error);
     }
@@ -318,7 +350,6 @@ const NotificationBell: React.FC = () => {
     return null;
   };
 
-  const unreadCount = notifications.filter(n => n.status === 1).length;
   const open = Boolean(anchorEl);
 
   if (!isAuthenticated) {
@@ -430,6 +461,14 @@ const NotificationBell: React.FC = () => {
               })}
             </List>
           )}
+
+          {nextCursor && (
+            <Box sx={{ p: 1, textAlign: 'center' }}>
+              <Button size="small" onClick={loadMoreNotifications} disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </Button>
+            </Box>
+          )}
         </Box>
       </Popover>
     </>
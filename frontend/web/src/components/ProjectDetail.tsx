@@ -544,7 +544,11 @@ const ProjectDetail: React.FC = () => {
 
   // Sheet management functions
   const handleSheetSelect = (sheet: ProjectSheet) => {
-    setSelectedSheet(sheet);
+    // The sheet list only carries metadata; load the grid for the selected sheet
+    setSelectedSheet({ ...sheet, columns: [], rows: [] });
+    sheetAPI.getSheet(teamId!, projectId!, sheet.id)
+      .then(response => setSelectedSheet(response.data))
+      .catch(console.error);
     // Switch to Sheets tab when a sheet is selected
     setTabValue(4); // Assuming Sheets tab is at index 4
   };
@@ -91,10 +91,10 @@ const ProjectSheetComponent: React.FC<ProjectSheetProps> = ({
       const row = sheet.rows.find(r => r.id === rowId);
       const cell = row?.cells.find(c => c.column_key === columnKey);
       
-      if (cell) {
+      if (cell?.id) {
         await sheetAPI.updateCell(teamId, projectId, sheet.id, cell.id, { value });
       } else {
-        // If cell doesn't exist, use bulk update
+        // If cell doesn't exist (or the sheet uses packed storage), use bulk update
         await sheetAPI.bulkUpdateCells(teamId, projectId, sheet.id, {
           updates: [{ row_id: rowId, column_key: columnKey, value }]
         });
@@ -1,7 +1,67 @@
 import api from './api';
 
+const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://127.0.0.1:8000';
+
+export type NotificationSocketEvent =
+  | { type: 'notification.created' | 'notification.updated'; notification: any }
+  | { type: 'notification.deleted'; notification_id: string };
+
+// Open a WebSocket that receives notifications as they happen.
+// Returns a function that closes the socket.
+export const connectNotificationSocket = (
+  onEvent: (event: NotificationSocketEvent) => void,
+  onStatusChange?: (connected: boolean) => void
+) => {
+  const token = localStorage.getItem('token');
+  if (!token) {
+    onStatusChange?.(false);
+    return () => {};
+  }
+
+  const wsBaseUrl = API_BASE_URL.replace(/^http/, 'ws');
+  let socket: WebSocket | null = null;
+  let retryTimer: ReturnType<typeof setTimeout> | null = null;
+  let retryDelay = 1000;
+  let closed = false;
+
+  const open = () => {
+    socket = new WebSocket(`${wsBaseUrl}/ws/notifications/?token=${encodeURIComponent(token)}`);
+    socket.onopen = () => {
+      retryDelay = 1000;
+      onStatusChange?.(true);
+    };
+    socket.onmessage = (message) => {
+      try {
+        onEvent(JSON.parse(message.data));
+      } catch (error) {
+        console.error('Invalid notification message:', error);
+      }
+    };
+    socket.onclose = () => {
+      onStatusChange?.(false);
+      if (!closed) {
+        // Reconnect with backoff, capped at 30 seconds
+        retryTimer = setTimeout(open, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 30000);
+      }
+    };
+  };
+
+  open();
+
+  return () => {
+    closed = true;
+    if (retryTimer) clearTimeout(retryTimer);
+    socket?.close();
+  };
+};
+
 export const notificationAPI = {
   getNotifications: () => api.get('/auth/notifications/'),
+  // Keyset-paginated feed: { results, has_more, next_cursor, latest_cursor, unread_count }
+  getNotificationPage: (params: { limit?: number; cursor?: string; since?: string } = {}) =>
+    api.get('/auth/notifications/', { params: { limit: 50, ...params } }),
+  getUnreadCount: () => api.get('/auth/notifications/unread-count/'),
   markAsRead: (notificationId: string) => api.post(`/auth/notifications/${notificationId}/read/`),
   markAllAsRead: () => api.post('/auth/notifications/read-all/'),
   deleteNotification: (notificationId: string) => api.delete(`/auth/notifications/${notificationId}/`),
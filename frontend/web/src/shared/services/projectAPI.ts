@@ -198,7 +198,7 @@ export const projectAPI = {
     api.post(`/auth/teams/${teamId}/projects/${projectId}/tasks/quick-create/`, data),
 
   // ==================== EXPORT & IMPORT ====================
-  exportProjectData: (teamId: string, projectId: string, format: 'json' | 'csv' = 'json') =>
+  exportProjectData: (teamId: string, projectId: string, format: 'json' | 'csv' | 'xlsx' = 'json') =>
     api.get(`/auth/teams/${teamId}/projects/${projectId}/export/?format=${format}`, {
       responseType: 'blob'
     }),
@@ -208,6 +208,9 @@ export const projectAPI = {
       headers: { 'Content-Type': 'multipart/form-data' }
     }),
 
+  getImportProgress: (teamId: string, projectId: string, jobId: string) =>
+    api.get(`/auth/teams/${teamId}/projects/${projectId}/import/${jobId}/`),
+
   // ==================== ADVANCED FEATURES ====================
   getProjectTimeline: (teamId: string, projectId: string) =>
     api.get(`/auth/teams/${teamId}/projects/${projectId}/timeline/`),
@@ -1,4 +1,108 @@
 import api from './api';
+import { ProjectSheet, SheetColumn, SheetRow } from '../types/sheetTypes';
+
+// The sheet detail endpoint returns cells as a columnar grid
+// ({ row_ids, values: { key: [...] }, cell_ids: { key: [...] } }) to keep the
+// payload small; expand it into the row/cell shape the components use.
+export const expandSheetGrid = (data: any): ProjectSheet => {
+  const { grid, ...sheet } = data;
+  if (!grid) return data;
+
+  const columns: SheetColumn[] = sheet.columns || [];
+  const rows: SheetRow[] = grid.row_ids.map((rowId: string, index: number) => ({
+    id: rowId,
+    sheet: sheet.id,
+    order: grid.row_orders[index],
+    // Packed sheets have values but no cell ids
+    cells: columns
+      .filter((column) => grid.cell_ids[column.key]?.[index] || grid.values[column.key]?.[index] != null)
+      .map((column) => ({
+        id: grid.cell_ids[column.key]?.[index] ?? '',
+        row: rowId,
+        column: column.id,
+        column_key: column.key,
+        value: grid.values[column.key][index],
+        raw_value: grid.raw_values[column.key]?.[index] ?? null,
+        version: grid.versions?.[column.key]?.[index] ?? 0,
+      })),
+  }));
+
+  return { ...sheet, rows };
+};
+
+const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://127.0.0.1:8000';
+
+export interface SheetCellOp {
+  op_id: string;
+  row_id: string;
+  column_key: string;
+  value: any;
+  // Version of the cell the edit is based on; stale edits come back as ops.conflict
+  version?: number;
+}
+
+// ops.applied / ops.conflict / ops.rejected answer this session's edits;
+// other events (cells.updated, row.created, row.moved, ...) come from teammates.
+export type SheetSocketEvent = { type: string; [key: string]: any };
+
+// Open a live editing session on a sheet. The server batches edits per cell,
+// so every keystroke can be sent. Returns { send, close }.
+export const connectSheetSocket = (
+  sheetId: string,
+  onEvent: (event: SheetSocketEvent) => void,
+  onStatusChange?: (connected: boolean) => void
+) => {
+  const token = localStorage.getItem('token');
+  if (!token) {
+    onStatusChange?.(false);
+    return { send: (_op: SheetCellOp) => false, close: () => {} };
+  }
+
+  const wsBaseUrl = API_BASE_URL.replace(/^http/, 'ws');
+  let socket: WebSocket | null = null;
+  let retryTimer: ReturnType<typeof setTimeout> | null = null;
+  let retryDelay = 1000;
+  let closed = false;
+
+  const open = () => {
+    socket = new WebSocket(`${wsBaseUrl}/ws/sheets/${sheetId}/?token=${encodeURIComponent(token)}`);
+    socket.onopen = () => {
+      retryDelay = 1000;
+      onStatusChange?.(true);
+    };
+    socket.onmessage = (message) => {
+      try {
+        onEvent(JSON.parse(message.data));
+      } catch (error) {
+        console.error('Invalid sheet message:', error);
+      }
+    };
+    socket.onclose = () => {
+      onStatusChange?.(false);
+      if (!closed) {
+        // Reconnect with backoff, capped at 30 seconds
+        retryTimer = setTimeout(open, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 30000);
+      }
+    };
+  };
+
+  open();
+
+  return {
+    // Returns false when offline so the caller can fall back to bulkUpdateCells
+    send: (op: SheetCellOp) => {
+      if (socket?.readyState !== WebSocket.OPEN) return false;
+      socket.send(JSON.stringify({ type: 'cell.update', ...op }));
+      return true;
+    },
+    close: () => {
+      closed = true;
+      if (retryTimer) clearTimeout(retryTimer);
+      socket?.close();
+    },
+  };
+};
 
 export const sheetAPI = {
   // Sheets
@@ -8,8 +112,12 @@ export const sheetAPI = {
   createSheet: (teamId: string, projectId: string, data: any) => 
     api.post(`/auth/teams/${teamId}/projects/${projectId}/sheets/`, data),
   
-  getSheet: (teamId: string, projectId: string, sheetId: string) => 
-    api.get(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/`),
+  // Pass limit to load only the first window of rows (see getRowWindow)
+  getSheet: (teamId: string, projectId: string, sheetId: string, limit?: number) => 
+    api.get(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/`, {
+      params: limit ? { limit } : {},
+    })
+      .then((response) => ({ ...response, data: expandSheetGrid(response.data) })),
   
   updateSheet: (teamId: string, projectId: string, sheetId: string, data: any) => 
     api.put(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/`, data),
@@ -21,10 +129,28 @@ export const sheetAPI = {
   addColumn: (teamId: string, projectId: string, sheetId: string, data: any) => 
     api.post(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/columns/`, data),
 
+  // Moves place the item directly after afterId (null = first position)
+  moveColumn: (teamId: string, projectId: string, sheetId: string, columnId: string, afterId: string | null) => 
+    api.post(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/columns/${columnId}/move/`, { after_id: afterId }),
+
   // Rows
+  // One viewport of rows for virtualized scrolling; the response is a grid
+  // window ({ row_ids, values, ..., has_more, next_cursor, total }), expand
+  // it with expandSheetGrid({ columns, grid: window }).
+  getRowWindow: (
+    teamId: string,
+    projectId: string,
+    sheetId: string,
+    params: { offset?: number; limit?: number; cursor?: string; include_columns?: boolean } = {}
+  ) => 
+    api.get(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/rows/`, { params }),
+
   addRow: (teamId: string, projectId: string, sheetId: string) => 
     api.post(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/rows/`, {}),
 
+  moveRow: (teamId: string, projectId: string, sheetId: string, rowId: string, afterId: string | null) => 
+    api.post(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/rows/${rowId}/move/`, { after_id: afterId }),
+
   // Cells
   updateCell: (teamId: string, projectId: string, sheetId: string, cellId: string, data: any) => 
     api.put(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/cells/${cellId}/`, data),
@@ -32,6 +158,34 @@ export const sheetAPI = {
   bulkUpdateCells: (teamId: string, projectId: string, sheetId: string, data: any) => 
     api.post(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/bulk-update/`, data),
 
+  // Column summaries (totals, averages, counts by status, date ranges)
+  getAggregates: (teamId: string, projectId: string, sheetId: string, columns?: string[]) => 
+    api.get(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/aggregates/`, {
+      params: columns ? { columns: columns.join(',') } : {},
+    }),
+
+  // Saved views
+  getViews: (teamId: string, projectId: string, sheetId: string) => 
+    api.get(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/views/`),
+  
+  createView: (teamId: string, projectId: string, sheetId: string, data: any) => 
+    api.post(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/views/`, data),
+  
+  updateView: (teamId: string, projectId: string, sheetId: string, viewId: string, data: any) => 
+    api.put(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/views/${viewId}/`, data),
+  
+  deleteView: (teamId: string, projectId: string, sheetId: string, viewId: string) => 
+    api.delete(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/views/${viewId}/`),
+  
+  getViewRows: (
+    teamId: string,
+    projectId: string,
+    sheetId: string,
+    viewId: string,
+    params: { offset?: number; limit?: number; group?: string; start?: string; end?: string } = {}
+  ) => 
+    api.get(`/auth/teams/${teamId}/projects/${projectId}/sheets/${sheetId}/views/${viewId}/rows/`, { params }),
+
   // Comments
   getComments: (teamId: string, projectId: string, sheetId: string, cellId?: string) => {
     const params = cellId ? { cell_id: cellId } : {};
@@ -16,6 +16,11 @@ export enum ColumnType {
   STATUS = 8
 }
 
+export enum SheetStorage {
+  CELLS = 1,
+  PACKED = 2
+}
+
 export interface SheetColumn {
   id: string;
   sheet: string;
@@ -37,19 +42,20 @@ export interface Cell {
   column_key: string;
   value: string;
   raw_value: any;
-  updated_by: string;
-  updated_by_name: string;
-  updated_at: string;
+  version?: number;
+  updated_by?: string;
+  updated_by_name?: string;
+  updated_at?: string;
 }
 
 export interface SheetRow {
   id: string;
   sheet: string;
   order: number;
-  created_by: string;
-  created_by_name: string;
-  created_at: string;
-  updated_at: string;
+  created_by?: string;
+  created_by_name?: string;
+  created_at?: string;
+  updated_at?: string;
   cells: Cell[];
 }
 
@@ -63,6 +69,7 @@ export interface ProjectSheet {
   created_by_name: string;
   is_public: boolean;
   settings: any;
+  storage?: SheetStorage;
   columns: SheetColumn[];
   rows: SheetRow[];
   row_count: number;